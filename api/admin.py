@@ -1,12 +1,12 @@
 # api/admin.py
 from django.contrib import admin
-from .models import Employe
+from .models import Employe, PresenceArchive, Terminal
 
 @admin.register(Employe)
 class EmployeAdmin(admin.ModelAdmin):
     list_display = ('nom', 'poste', 'user', 'email', 'telephone')
     list_filter = ('poste',)
-    search_fields = ('nom', 'user__username', 'email')
+    search_fields = ('nom', 'user__username', 'email', 'badge')
     raw_id_fields = ('user',)  # ← Meilleur pour les ForeignKey
 
 # api/admin.py (suite)
@@ -14,8 +14,8 @@ from .models import Presence
 
 @admin.register(Presence)
 class PresenceAdmin(admin.ModelAdmin):
-    list_display = ('employe', 'date', 'statut', 'heure_arrivee', 'heure_sortie')
-    list_filter = ('statut', 'date')
+    list_display = ('employe', 'date', 'statut', 'heure_arrivee', 'heure_sortie', 'a_verifier')
+    list_filter = ('statut', 'a_verifier', 'date')
     search_fields = ('employe__nom', 'employe__user__username')
     raw_id_fields = ('employe',)
     date_hierarchy = 'date'  # ← Navigation par date
@@ -29,4 +29,19 @@ class RapportAdmin(admin.ModelAdmin):
     list_filter = ('type', 'date_debut')
     search_fields = ('employe__nom', 'contenu')
     raw_id_fields = ('employe',)
-    date_hierarchy = 'date_debut'
\ No newline at end of file
+    date_hierarchy = 'date_debut'
+
+
+@admin.register(Terminal)
+class TerminalAdmin(admin.ModelAdmin):
+    list_display = ('identifiant', 'dernier_sequence', 'derniere_synchro')
+    search_fields = ('identifiant',)
+
+
+@admin.register(PresenceArchive)
+class PresenceArchiveAdmin(admin.ModelAdmin):
+    list_display = ('employe', 'date', 'statut', 'heure_arrivee', 'heure_sortie')
+    list_filter = ('statut', 'date')
+    search_fields = ('employe__nom', 'employe__user__username')
+    raw_id_fields = ('employe',)
+    date_hierarchy = 'date'
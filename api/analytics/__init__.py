@@ -0,0 +1,7 @@
+# api/analytics/__init__.py
+"""
+Calculs analytiques sur les présences (courbes d'occupation, ponctualité).
+
+Chaque module charge ses données en une requête, sous forme de colonnes
+d'entiers, puis calcule avec NumPy : pas de boucle Python par présence.
+"""
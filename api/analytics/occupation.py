@@ -0,0 +1,111 @@
+# api/analytics/occupation.py
+"""
+Occupation du site par créneau (15 minutes par défaut) : nombre de
+personnes présentes à un moment quelconque du créneau.
+
+Chaque présence pointée devient un intervalle [arrivée, arrivée + durée[
+en minutes depuis le premier jour demandé. L'occupation s'obtient par
+comptage d'événements : +1 au créneau d'arrivée, -1 au créneau qui suit la
+sortie, puis somme cumulée (np.bincount + np.cumsum). Une sortie après
+minuit déborde sur le créneau du lendemain ; une présence encore ouverte
+compte jusqu'à maintenant si elle est du jour, et est ignorée sinon.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import connection
+from django.utils import timezone
+
+from api.models import Employe
+from api.services.archive import modele_presences
+
+PAS_MINUTES = 15
+MINUTES_JOUR = 24 * 60
+
+
+def charger_intervalles(debut, fin, poste=None):
+    """
+    Présences pointées entre `debut` et `fin` (inclus), en une requête.
+    Retourne deux tableaux int64 : minute d'arrivée depuis `debut` 00:00 et
+    durée en secondes.
+    """
+    maintenant = timezone.localtime()
+    secondes_maintenant = maintenant.hour * 3600 + maintenant.minute * 60 + maintenant.second
+    qn = connection.ops.quote_name
+    table = qn(modele_presences(debut)._meta.db_table)
+
+    # FLOOR avant la conversion : ::integer arrondit, 08:14:59.6 tomberait à 08:15.
+    secondes_arrivee = "FLOOR(EXTRACT(EPOCH FROM p.heure_arrivee))::integer"
+    sql = (
+        f"SELECT (p.date - %s) * {MINUTES_JOUR} + {secondes_arrivee} / 60, "
+        f"COALESCE(p.duree_secondes, GREATEST(%s - {secondes_arrivee}, 0)) "
+        f"FROM {table} p WHERE p.date BETWEEN %s AND %s AND p.heure_arrivee IS NOT NULL "
+        f"AND (p.duree_secondes IS NOT NULL OR (p.date = %s AND p.heure_sortie IS NULL))"
+    )
+    params = [debut, secondes_maintenant, debut, fin, maintenant.date()]
+    if poste:
+        sql += f" AND p.employe_id IN (SELECT id FROM {qn(Employe._meta.db_table)} WHERE poste = %s)"
+        params.append(poste)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        valeurs = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    return valeurs[:, 0], valeurs[:, 1]
+
+
+def occupation(arrivees, durees, nb_jours, pas=PAS_MINUTES):
+    """
+    Matrice (nb_jours, créneaux par jour) du nombre de présents par créneau.
+    Calcul entièrement vectorisé.
+    """
+    creneaux_jour = MINUTES_JOUR // pas
+    total = nb_jours * creneaux_jour
+
+    sorties = arrivees + durees // 60
+    premier = arrivees // pas
+    # Créneau suivant la sortie (exclu) ; au moins le créneau d'arrivée
+    apres = np.maximum(-(-sorties // pas), premier + 1)
+    np.minimum(apres, total, out=apres)
+
+    evenements = np.bincount(premier, minlength=total + 1) - np.bincount(apres, minlength=total + 1)
+    return np.cumsum(evenements[:total]).reshape(nb_jours, creneaux_jour)
+
+
+def par_semaine(matrice, debut):
+    """
+    Regroupe les lignes journalières par semaine ISO (lundi) : pour chaque
+    créneau, le maximum des jours de la semaine. Retourne (lundis, matrice).
+    """
+    decalage = debut.weekday()
+    semaines = (np.arange(matrice.shape[0]) + decalage) // 7
+    nb_semaines = int(semaines[-1]) + 1 if len(semaines) else 0
+    resultat = np.zeros((nb_semaines, matrice.shape[1]), dtype=matrice.dtype)
+    np.maximum.at(resultat, semaines, matrice)
+    lundi = debut - timedelta(days=decalage)
+    return [lundi + timedelta(weeks=s) for s in range(nb_semaines)], resultat
+
+
+def courbes_occupation(debut, fin, granularite="jour", pas=PAS_MINUTES, poste=None):
+    """
+    Courbes d'occupation entre `debut` et `fin` : une par jour ou par semaine.
+    Retourne une liste de dicts {periode, pic, heure_pic, occupation}.
+    """
+    nb_jours = (fin - debut).days + 1
+    matrice = occupation(*charger_intervalles(debut, fin, poste), nb_jours=nb_jours, pas=pas)
+
+    if granularite == "semaine":
+        periodes, matrice = par_semaine(matrice, debut)
+    else:
+        periodes = [debut + timedelta(days=j) for j in range(nb_jours)]
+
+    pics = matrice.max(axis=1)
+    creneaux_pic = matrice.argmax(axis=1) * pas
+    return [
+        {
+            "periode": periode.isoformat(),
+            "pic": int(pic),
+            "heure_pic": f"{creneau // 60:02d}:{creneau % 60:02d}",
+            "occupation": ligne,
+        }
+        for periode, pic, creneau, ligne in zip(periodes, pics, creneaux_pic, matrice.tolist())
+    ]
@@ -0,0 +1,170 @@
+# api/analytics/ponctualite.py
+"""
+Ponctualité : distribution des heures d'arrivée par employé ou par poste,
+comparées à l'heure de début configurée (settings.PONCTUALITE_HEURE_DEBUT).
+
+Les arrivées de la fenêtre sont lues en une projection (employe_id, secondes
+depuis minuit) sur le queryset déjà restreint au périmètre de l'utilisateur.
+Les arrivées sont triées par groupe puis par heure (np.lexsort) : médiane et
+p90 se lisent alors par arithmétique d'indices, retards et histogrammes par
+np.bincount, sans boucle par présence ni par groupe.
+
+Les résultats sont mis en cache par (périmètre, fenêtre, regroupement)
+pendant PONCTUALITE_CACHE_SECONDES.
+"""
+from datetime import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.functions import Extract
+
+from api.models import Employe
+
+# Bornes (minutes de retard) des classes de l'histogramme
+BORNES_RETARD = (0, 5, 15, 30, 60)
+CLASSES = ("à l'heure", "≤ 5 min", "≤ 15 min", "≤ 30 min", "≤ 60 min", "> 60 min")
+REGROUPEMENTS = ("employe", "poste")
+
+
+def charger_arrivees(queryset):
+    """
+    (employe_ids, secondes) des présences du queryset ayant une arrivée,
+    en une requête ; deux tableaux int64.
+    """
+    projection = (
+        queryset.filter(heure_arrivee__isnull=False)
+        .order_by()
+        .annotate(secondes_arrivee=Extract("heure_arrivee", "epoch"))
+        .values_list("employe_id", "secondes_arrivee")
+    )
+    sql, params = projection.query.sql_with_params()
+    with connection.cursor() as cursor:
+        # FLOOR : ::integer arrondirait 08:59:59.6 à 09:00:00
+        cursor.execute(f"SELECT e, FLOOR(s)::integer FROM ({sql}) AS a(e, s)", params)
+        valeurs = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+    return valeurs[:, 0], valeurs[:, 1]
+
+
+def _percentiles(triees, debuts, effectifs, q):
+    """Percentile `q` de chaque groupe (interpolation linéaire, comme np.percentile)."""
+    position = debuts + (effectifs - 1) * (q / 100)
+    bas = np.floor(position).astype(np.int64)
+    haut = np.minimum(bas + 1, debuts + effectifs - 1)
+    fraction = position - bas
+    return triees[bas] * (1 - fraction) + triees[haut] * fraction
+
+
+def _heure(secondes):
+    minutes = int(round(secondes / 60))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def distributions(groupes, secondes, nb_groupes, debut_secondes, tolerance_secondes=0):
+    """
+    Statistiques par groupe (groupes : indices 0..nb_groupes-1, un par arrivée).
+    Retourne un dict de tableaux de longueur nb_groupes : jours, retards,
+    retard_moyen (minutes, sur les jours en retard), mediane et p90 (secondes,
+    NaN pour un groupe vide), histogramme (nb_groupes x len(CLASSES)).
+
+    Une arrivée dans la tolérance compte comme à l'heure partout, y compris
+    dans l'histogramme.
+    """
+    effectifs = np.bincount(groupes, minlength=nb_groupes)
+    ordre = np.lexsort((secondes, groupes))
+    triees = secondes[ordre].astype(np.float64)
+    debuts = np.concatenate(([0], np.cumsum(effectifs)[:-1]))
+
+    non_vides = effectifs > 0
+    mediane = np.full(nb_groupes, np.nan)
+    p90 = np.full(nb_groupes, np.nan)
+    if len(triees):
+        mediane[non_vides] = _percentiles(triees, debuts[non_vides], effectifs[non_vides], 50)
+        p90[non_vides] = _percentiles(triees, debuts[non_vides], effectifs[non_vides], 90)
+
+    retard = secondes - debut_secondes
+    en_retard = retard > tolerance_secondes
+    retards = np.bincount(groupes, weights=en_retard, minlength=nb_groupes).astype(np.int64)
+    cumul_retard = np.bincount(groupes, weights=np.where(en_retard, retard, 0), minlength=nb_groupes)
+    retard_moyen = np.divide(cumul_retard / 60, retards, out=np.zeros(nb_groupes), where=retards > 0)
+
+    classes = np.searchsorted(np.array(BORNES_RETARD) * 60, np.where(en_retard, retard, 0), side="left")
+    histogramme = np.bincount(
+        groupes * len(CLASSES) + classes, minlength=nb_groupes * len(CLASSES)
+    ).reshape(nb_groupes, len(CLASSES))
+
+    return {
+        "jours": effectifs, "retards": retards, "retard_moyen": retard_moyen,
+        "mediane": mediane, "p90": p90, "histogramme": histogramme,
+    }
+
+
+def _lignes(stats, etiquettes):
+    lignes = []
+    for i, etiquette in enumerate(etiquettes):
+        jours = int(stats["jours"][i])
+        if not jours:
+            continue
+        retards = int(stats["retards"][i])
+        lignes.append({
+            **etiquette,
+            "jours": jours,
+            "jours_en_retard": retards,
+            "taux_retard": round(100 * retards / jours, 1),
+            "retard_moyen_minutes": round(float(stats["retard_moyen"][i]), 1),
+            "arrivee_mediane": _heure(stats["mediane"][i]),
+            "arrivee_p90": _heure(stats["p90"][i]),
+            "histogramme": stats["histogramme"][i].tolist(),
+        })
+    return lignes
+
+
+def analyser_ponctualite(queryset, par="employe"):
+    """
+    Ponctualité des présences de `queryset` (déjà restreint à la fenêtre et au
+    périmètre), regroupée par employé ou par poste, plus une ligne d'ensemble.
+    Deux requêtes : les arrivées, puis les noms et postes des employés vus.
+    """
+    debut = time.fromisoformat(settings.PONCTUALITE_HEURE_DEBUT)
+    debut_secondes = debut.hour * 3600 + debut.minute * 60
+    tolerance = settings.PONCTUALITE_TOLERANCE_MINUTES * 60
+
+    employe_ids, secondes = charger_arrivees(queryset)
+    ids, groupes_employe = np.unique(employe_ids, return_inverse=True)
+    employes = {e["id"]: e for e in Employe.objects.filter(id__in=ids.tolist()).values("id", "nom", "poste")}
+
+    if par == "poste":
+        postes, poste_par_employe = np.unique(
+            np.array([employes[i]["poste"] for i in ids.tolist()], dtype=object), return_inverse=True
+        )
+        groupes = poste_par_employe[groupes_employe]
+        etiquettes = [{"poste": poste} for poste in postes.tolist()]
+    else:
+        groupes = groupes_employe
+        etiquettes = [
+            {"employe": i, "nom": employes[i]["nom"], "poste": employes[i]["poste"]} for i in ids.tolist()
+        ]
+
+    stats = distributions(groupes, secondes, len(etiquettes), debut_secondes, tolerance)
+    ensemble = distributions(np.zeros(len(secondes), dtype=np.int64), secondes, 1, debut_secondes, tolerance)
+    return {
+        "heure_debut": debut.strftime("%H:%M"),
+        "tolerance_minutes": settings.PONCTUALITE_TOLERANCE_MINUTES,
+        "classes": list(CLASSES),
+        "ensemble": (_lignes(ensemble, [{}]) or [None])[0],
+        "groupes": _lignes(stats, etiquettes),
+    }
+
+
+def ponctualite_en_cache(perimetre, debut, fin, par, calculer):
+    """Résultat de `calculer()` mis en cache par (périmètre, fenêtre, regroupement)."""
+    cle = (
+        f"ponctualite:{perimetre}:{par}:{debut.isoformat()}:{fin.isoformat()}:"
+        f"{settings.PONCTUALITE_HEURE_DEBUT}:{settings.PONCTUALITE_TOLERANCE_MINUTES}"
+    )
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = calculer()
+        cache.set(cle, resultat, settings.PONCTUALITE_CACHE_SECONDES)
+    return resultat
@@ -1,8 +1,63 @@
+# api/filters.py
 import django_filters
+from django import forms
+from django.conf import settings
+from django.utils import timezone
 
-from .models import TonModele  # Remplace par le nom de ton modèle
+from .models import Presence
+
+
+class PresenceFilterForm(forms.Form):
+    """
+    Validation croisée des bornes : date_before >= date_after, écart plafonné.
+    Une période ouverte est plafonnée aussi : sans date_before, elle court
+    jusqu'à aujourd'hui ; date_before seule est refusée.
+    """
+    plafonnee = True
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_after = cleaned_data.get("date_after")
+        date_before = cleaned_data.get("date_before")
+        if date_after and date_before and date_before < date_after:
+            self.add_error("date_before", "date_before doit être postérieure à date_after.")
+        elif self.plafonnee and (date_after or date_before):
+            if not date_after:
+                self.add_error("date_after", "date_after est obligatoire avec date_before.")
+            elif ((date_before or timezone.localdate()) - date_after).days > settings.PRESENCE_FILTRE_MAX_JOURS:
+                self.add_error(
+                    "date_after" if date_before is None else "date_before",
+                    f"La période ne peut pas dépasser {settings.PRESENCE_FILTRE_MAX_JOURS} jours.",
+                )
+        return cleaned_data
+
+
+class PresenceExportFilterForm(PresenceFilterForm):
+    """Export en flux : mémoire constante, la période n'est pas plafonnée."""
+    plafonnee = False
+
+
+class PresenceFilter(django_filters.FilterSet):
+    """
+    Filtres des listes et exports de présences. Chaque combinaison s'appuie
+    sur un index :
+    - employe + dates        → contrainte unique (employe, date)
+    - statut + dates         → presence_statut_date_idx
+    - poste + dates          → employe_poste_idx puis (employe, date)
+
+    Pas de Meta.model : les mêmes filtres s'appliquent à Presence et à la vue
+    PresenceHistorique (voir api/services/archive.py).
+    """
+    date_after = django_filters.DateFilter(field_name="date", lookup_expr="gte")
+    date_before = django_filters.DateFilter(field_name="date", lookup_expr="lte")
+    statut = django_filters.ChoiceFilter(choices=Presence.STATUT_CHOICES)
+    employe = django_filters.NumberFilter(field_name="employe_id", min_value=1)
+    poste = django_filters.CharFilter(field_name="employe__poste")
 
-class TonModeleFilter(django_filters.FilterSet):
     class Meta:
-        model = TonModele
-        fields = ['champ1', 'champ2']  # Remplace par les champs que tu veux filtrer
\ No newline at end of file
+        form = PresenceFilterForm
+
+
+class PresenceExportFilter(PresenceFilter):
+    class Meta(PresenceFilter.Meta):
+        form = PresenceExportFilterForm
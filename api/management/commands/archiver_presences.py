@@ -0,0 +1,37 @@
+# api/management/commands/archiver_presences.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.services.archive import BATCH_SIZE, archiver_presences, horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les présences antérieures à l'horizon (PRESENCE_HORIZON_MOIS) "
+        "vers la table d'archive. À planifier chaque mois, par exemple via cron : "
+        "30 1 1 * * python manage.py archiver_presences"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--avant', help="Archiver avant ce jour (AAAA-MM-JJ), plafonné à l'horizon"
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Présences déplacées par lot')
+
+    def handle(self, *args, **options):
+        avant = None
+        if options['avant']:
+            avant = parse_date(options['avant'])
+            if avant is None:
+                raise CommandError("--avant : date invalide, format attendu AAAA-MM-JJ.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size doit être positif.")
+
+        t0 = time.perf_counter()
+        deplacees = archiver_presences(avant, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{deplacees} présences archivées (avant le {min(avant or horizon(), horizon())}) "
+            f"en {time.perf_counter() - t0:.2f}s."
+        ))
@@ -0,0 +1,76 @@
+# api/management/commands/bench_presences.py
+import time
+from datetime import date, time as heure, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.contrib.auth import get_user_model
+
+from api.models import Employe, Presence
+from api.serializers import PresenceSerializer, PresenceListSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare PresenceSerializer et PresenceListSerializer sur N présences (données jetables)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Nombre de présences à sérialiser')
+        parser.add_argument('--employes', type=int, default=1000, help="Nombre d'employés générés")
+
+    def handle(self, *args, **options):
+        rows, nb_employes = options['rows'], options['employes']
+        try:
+            with transaction.atomic():
+                self.generer(rows, nb_employes)
+                self.mesurer()
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Données de test annulées (rollback).")
+
+    def generer(self, rows, nb_employes):
+        self.stdout.write(f"Génération de {rows} présences pour {nb_employes} employés...")
+        users = User.objects.bulk_create([
+            User(username=f"bench-{i}", email=f"bench-{i}@example.com") for i in range(nb_employes)
+        ])
+        employes = Employe.objects.bulk_create([
+            Employe(user=user, nom=f"Employé {i}", poste="Bench") for i, user in enumerate(users)
+        ])
+        jours = -(-rows // nb_employes)
+        presences = []
+        for j in range(jours):
+            for i, employe in enumerate(employes):
+                if len(presences) == rows:
+                    break
+                presences.append(Presence(
+                    employe=employe,
+                    date=date(2020, 1, 1) + timedelta(days=j),
+                    heure_arrivee=heure(8, i % 60),
+                    heure_sortie=heure(17, j % 60) if i % 5 else None,
+                    statut='parti' if i % 5 else 'arrive',
+                ))
+        Presence.objects.bulk_create(presences, batch_size=5000)
+        self.ids = [e.id for e in employes]
+
+    def mesurer(self):
+        qs = Presence.objects.filter(employe_id__in=self.ids).select_related('employe__user')
+
+        debut = time.perf_counter()
+        lent = PresenceSerializer(qs, many=True).data
+        duree_lent = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        rapide = PresenceListSerializer(PresenceListSerializer.projeter(qs)).data
+        duree_rapide = time.perf_counter() - debut
+
+        identiques = [dict(row) for row in lent] == rapide
+        self.stdout.write(f"PresenceSerializer     : {duree_lent:.2f} s")
+        self.stdout.write(f"PresenceListSerializer : {duree_rapide:.2f} s")
+        self.stdout.write(f"Accélération           : x{duree_lent / duree_rapide:.1f}")
+        style = self.style.SUCCESS if identiques else self.style.ERROR
+        self.stdout.write(style(f"Sorties identiques     : {identiques}"))
@@ -0,0 +1,38 @@
+# api/management/commands/cloturer_presences.py
+from datetime import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.services.cloture import POLITIQUES, cloturer_journee
+
+
+class Command(BaseCommand):
+    help = (
+        "Clôt les présences restées ouvertes (arrivée sans sortie) d'une journée. "
+        "À planifier en fin de journée, par exemple via cron : "
+        "30 23 * * * python manage.py cloturer_presences"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Jour à clôturer (AAAA-MM-JJ), aujourd'hui par défaut")
+        parser.add_argument('--politique', choices=POLITIQUES, help='Remplace settings.CLOTURE_POLITIQUE')
+        parser.add_argument('--heure', help='Heure de sortie par défaut (HH:MM), remplace settings.CLOTURE_HEURE_DEFAUT')
+
+    def handle(self, *args, **options):
+        jour = heure = None
+        if options['date']:
+            jour = parse_date(options['date'])
+            if jour is None:
+                raise CommandError("--date : date invalide, format attendu AAAA-MM-JJ.")
+        if options['heure']:
+            try:
+                heure = time.fromisoformat(options['heure'])
+            except ValueError:
+                raise CommandError("--heure : heure invalide, format attendu HH:MM.")
+
+        try:
+            nb = cloturer_journee(jour, politique=options['politique'], heure=heure)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"{nb} présences clôturées et marquées à vérifier."))
@@ -0,0 +1,34 @@
+# api/management/commands/generer_absences.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.services.absences import BATCH_SIZE, generer_absences
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée les présences 'absent' du jour pour tous les employés actifs. "
+        "À planifier chaque nuit, par exemple via cron : "
+        "5 0 * * * python manage.py generer_absences"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Jour à générer (AAAA-MM-JJ), aujourd'hui par défaut")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Employés traités par lot')
+
+    def handle(self, *args, **options):
+        jour = None
+        if options['date']:
+            jour = parse_date(options['date'])
+            if jour is None:
+                raise CommandError("--date : date invalide, format attendu AAAA-MM-JJ.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size doit être positif.")
+
+        t0 = time.perf_counter()
+        crees = generer_absences(jour, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{crees} absences créées en {time.perf_counter() - t0:.2f}s."
+        ))
@@ -0,0 +1,36 @@
+# api/management/commands/reconstruire_cumuls.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api.services.cumuls import reconstruire_cumuls
+
+
+class Command(BaseCommand):
+    help = "Reconstruit en masse les cumuls journaliers et mensuels de présence"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depuis', help='Premier jour à reconstruire (AAAA-MM-JJ), ramené au 1er du mois')
+        parser.add_argument('--jusqu-a', dest='jusqu_a', help='Dernier jour à reconstruire (AAAA-MM-JJ), étendu à la fin du mois')
+
+    def _date(self, valeur, option):
+        if valeur is None:
+            return None
+        jour = parse_date(valeur)
+        if jour is None:
+            raise CommandError(f"{option} : date invalide, format attendu AAAA-MM-JJ.")
+        return jour
+
+    def handle(self, *args, **options):
+        debut = self._date(options['depuis'], '--depuis')
+        fin = self._date(options['jusqu_a'], '--jusqu-a')
+        if debut and fin and fin < debut:
+            raise CommandError("--jusqu-a doit être postérieur à --depuis.")
+
+        t0 = time.perf_counter()
+        nb_jours, nb_mois = reconstruire_cumuls(debut, fin)
+        self.stdout.write(self.style.SUCCESS(
+            f"{nb_jours} cumuls journaliers et {nb_mois} cumuls mensuels reconstruits "
+            f"en {time.perf_counter() - t0:.2f}s."
+        ))
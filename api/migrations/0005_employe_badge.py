@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_alter_employe_options_alter_presence_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employe',
+            name='badge',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
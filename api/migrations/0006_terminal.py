@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_employe_badge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Terminal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifiant', models.CharField(max_length=100, unique=True)),
+                ('dernier_sequence', models.BigIntegerField(default=0)),
+                ('derniere_synchro', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Terminal',
+                'verbose_name_plural': 'Terminaux',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_terminal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employe',
+            index=models.Index(fields=['-created_at', 'id'], name='employe_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(fields=['-date', '-created_at', 'id'], name='presence_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rapport',
+            index=models.Index(fields=['-created_at', 'id'], name='rapport_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rapport',
+            index=models.Index(fields=['employe', '-created_at', 'id'], name='rapport_employe_keyset_idx'),
+        ),
+    ]
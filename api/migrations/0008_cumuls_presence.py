@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresenceJournaliere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('statut', models.CharField(default='absent', max_length=20)),
+                ('minutes_travaillees', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cumuls_journaliers', to='api.employe')),
+            ],
+            options={
+                'verbose_name': 'Cumul journalier',
+                'verbose_name_plural': 'Cumuls journaliers',
+                'unique_together': {('employe', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PresenceMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField()),
+                ('jours_presents', models.PositiveIntegerField(default=0)),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('minutes_travaillees', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cumuls_mensuels', to='api.employe')),
+            ],
+            options={
+                'verbose_name': 'Cumul mensuel',
+                'verbose_name_plural': 'Cumuls mensuels',
+                'unique_together': {('employe', 'mois')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_cumuls_presence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presence',
+            name='duree_secondes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        # Rattrapage des présences existantes (même règle que calculer_duree_secondes :
+        # secondes entières, sortie avant l'arrivée comptée sur le jour suivant).
+        migrations.RunSQL(
+            """
+            UPDATE api_presence
+            SET duree_secondes = MOD(FLOOR(EXTRACT(EPOCH FROM (heure_sortie - heure_arrivee)))::integer + 86400, 86400)
+            WHERE heure_arrivee IS NOT NULL AND heure_sortie IS NOT NULL
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
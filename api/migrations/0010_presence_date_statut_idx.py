@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_presence_duree_secondes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(fields=['statut', 'date'], name='presence_statut_date_idx'),
+        ),
+    ]
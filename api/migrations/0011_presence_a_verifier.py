@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_presence_date_statut_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presence',
+            name='a_verifier',
+            field=models.BooleanField(db_default=False, default=False),
+        ),
+    ]
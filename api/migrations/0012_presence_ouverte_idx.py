@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_presence_a_verifier'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(condition=models.Q(('heure_arrivee__isnull', False), ('heure_sortie__isnull', True), ('statut', 'arrive')), fields=['date', 'heure_arrivee'], name='presence_ouverte_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:31
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_presence_ouverte_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Suppression',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modele', models.CharField(choices=[('presence', 'Présence'), ('employe', 'Employé'), ('rapport', 'Rapport')], max_length=20)),
+                ('objet_id', models.BigIntegerField()),
+                ('employe_id', models.BigIntegerField(blank=True, null=True)),
+                ('supprime_le', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Suppression',
+                'verbose_name_plural': 'Suppressions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employe',
+            index=models.Index(fields=['updated_at', 'id'], name='employe_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='presence',
+            index=models.Index(fields=['updated_at', 'id'], name='presence_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rapport',
+            index=models.Index(fields=['updated_at', 'id'], name='rapport_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suppression',
+            index=models.Index(fields=['supprime_le', 'id'], name='suppression_curseur_idx'),
+        ),
+    ]
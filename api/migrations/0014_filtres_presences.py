@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_synchro_differentielle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employe',
+            index=models.Index(fields=['poste', 'id'], name='employe_poste_idx'),
+        ),
+    ]
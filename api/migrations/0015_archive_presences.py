@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLONNES = (
+    "id, employe_id, date, heure_arrivee, heure_sortie, statut, note, "
+    "duree_secondes, a_verifier, created_at, updated_at"
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_filtres_presences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PresenceHistorique',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('heure_arrivee', models.TimeField(blank=True, null=True)),
+                ('heure_sortie', models.TimeField(blank=True, null=True)),
+                ('statut', models.CharField(choices=[('absent', 'Absent'), ('arrive', 'Arrivé'), ('parti', 'Parti')], max_length=20)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('duree_secondes', models.PositiveIntegerField(blank=True, null=True)),
+                ('a_verifier', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'api_presence_historique',
+                'ordering': ['-date', '-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PresenceArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('heure_arrivee', models.TimeField(blank=True, null=True)),
+                ('heure_sortie', models.TimeField(blank=True, null=True)),
+                ('statut', models.CharField(choices=[('absent', 'Absent'), ('arrive', 'Arrivé'), ('parti', 'Parti')], max_length=20)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('duree_secondes', models.PositiveIntegerField(blank=True, null=True)),
+                ('a_verifier', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('employe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presences_archivees', to='api.employe')),
+            ],
+            options={
+                'verbose_name': 'Présence archivée',
+                'verbose_name_plural': 'Présences archivées',
+                'ordering': ['-date', '-created_at'],
+                'indexes': [models.Index(fields=['-date', '-created_at', 'id'], name='archive_keyset_idx'), models.Index(fields=['employe', 'date'], name='archive_employe_date_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            f"CREATE VIEW api_presence_historique AS "
+            f"SELECT {COLONNES} FROM api_presence "
+            f"UNION ALL SELECT {COLONNES} FROM api_presencearchive",
+            "DROP VIEW IF EXISTS api_presence_historique",
+        ),
+    ]
@@ -1,5 +1,9 @@
 from .employe import Employe
 from .presence import Presence
 from .rapport import Rapport
+from .terminal import Terminal
+from .cumul import PresenceJournaliere, PresenceMensuelle
+from .suppression import Suppression
+from .archive import PresenceArchive, PresenceHistorique
 
 
@@ -0,0 +1,64 @@
+# api/models/archive.py
+"""
+Archivage des présences.
+
+- PresenceArchive : présences des périodes closes, déplacées hors de la
+  table chaude par la commande `archiver_presences` (même id qu'à l'origine).
+- PresenceHistorique : vue SQL (non gérée par Django) api_presence UNION ALL
+  api_presencearchive, pour les lectures qui remontent avant l'horizon.
+"""
+from django.db import models
+
+from .employe import Employe
+from .presence import Presence
+
+
+class PresenceArchive(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    employe = models.ForeignKey(Employe, on_delete=models.CASCADE, related_name='presences_archivees')
+    date = models.DateField()
+    heure_arrivee = models.TimeField(null=True, blank=True)
+    heure_sortie = models.TimeField(null=True, blank=True)
+    statut = models.CharField(max_length=20, choices=Presence.STATUT_CHOICES)
+    note = models.TextField(blank=True, null=True)
+    duree_secondes = models.PositiveIntegerField(null=True, blank=True)
+    a_verifier = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Présence archivée"
+        verbose_name_plural = "Présences archivées"
+        ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['-date', '-created_at', 'id'], name='archive_keyset_idx'),
+            models.Index(fields=['employe', 'date'], name='archive_employe_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Présence archivée de {self.employe_id} le {self.date}"
+
+
+class PresenceHistorique(models.Model):
+    """Lecture seule : présences chaudes et archivées réunies."""
+    id = models.BigIntegerField(primary_key=True)
+    employe = models.ForeignKey(
+        Employe, on_delete=models.DO_NOTHING, related_name='presences_historiques', db_constraint=False
+    )
+    date = models.DateField()
+    heure_arrivee = models.TimeField(null=True, blank=True)
+    heure_sortie = models.TimeField(null=True, blank=True)
+    statut = models.CharField(max_length=20, choices=Presence.STATUT_CHOICES)
+    note = models.TextField(blank=True, null=True)
+    duree_secondes = models.PositiveIntegerField(null=True, blank=True)
+    a_verifier = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'api_presence_historique'
+        ordering = ['-date', '-created_at']
+
+    def get_duree_travail(self):
+        return Presence.get_duree_travail(self)
@@ -0,0 +1,37 @@
+from django.db import models
+from .employe import Employe
+
+
+class PresenceJournaliere(models.Model):
+    """Cumul par employé et par jour, tenu à jour à chaque modification de présence."""
+    employe = models.ForeignKey(Employe, on_delete=models.CASCADE, related_name='cumuls_journaliers')
+    date = models.DateField()
+    statut = models.CharField(max_length=20, default='absent')
+    minutes_travaillees = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cumul journalier"
+        verbose_name_plural = "Cumuls journaliers"
+        unique_together = ['employe', 'date']
+
+    def __str__(self):
+        return f"{self.employe_id} le {self.date} : {self.minutes_travaillees} min"
+
+
+class PresenceMensuelle(models.Model):
+    """Cumul par employé et par mois (`mois` = premier jour du mois)."""
+    employe = models.ForeignKey(Employe, on_delete=models.CASCADE, related_name='cumuls_mensuels')
+    mois = models.DateField()
+    jours_presents = models.PositiveIntegerField(default=0)
+    absences = models.PositiveIntegerField(default=0)
+    minutes_travaillees = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cumul mensuel"
+        verbose_name_plural = "Cumuls mensuels"
+        unique_together = ['employe', 'mois']
+
+    def __str__(self):
+        return f"{self.employe_id} {self.mois:%m/%Y} : {self.jours_presents} jour(s)"
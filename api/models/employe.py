@@ -12,12 +12,21 @@ class Employe(models.Model):
     poste = models.CharField(max_length=100)
     telephone = models.CharField(max_length=20, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
+    badge = models.CharField(max_length=64, unique=True, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Employé"
         verbose_name_plural = "Employés"
+        indexes = [
+            # Synchronisation différentielle (sync/) : lignes modifiées après un curseur
+            models.Index(fields=['updated_at', 'id'], name='employe_sync_idx'),
+            # Filtre des présences par poste (api.filters)
+            models.Index(fields=['poste', 'id'], name='employe_poste_idx'),
+            # Pagination keyset de la liste des employés (-created_at, id)
+            models.Index(fields=['-created_at', 'id'], name='employe_keyset_idx'),
+        ]
         permissions = [
             ("can_manage_employee", "Peut gérer les employés"),
             ("can_view_all_employees", "Peut voir tous les employés"),
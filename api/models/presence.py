@@ -1,9 +1,25 @@
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from .employe import Employe
 from django.core.exceptions import ValidationError
 
 
+def calculer_duree_secondes(heure_arrivee, heure_sortie):
+    """
+    Durée travaillée en secondes entre deux heures d'une même présence.
+    Une sortie antérieure à l'arrivée est comptée sur le jour suivant
+    (même règle que timedelta.seconds dans get_duree_travail).
+    """
+    if heure_arrivee is None or heure_sortie is None:
+        return None
+
+    def microsecondes(t):
+        return ((t.hour * 60 + t.minute) * 60 + t.second) * 1_000_000 + t.microsecond
+
+    return ((microsecondes(heure_sortie) - microsecondes(heure_arrivee)) // 1_000_000) % 86400
+
+
 class Presence(models.Model):
     STATUT_CHOICES = [
         ('absent', 'Absent'),
@@ -16,6 +32,11 @@ class Presence(models.Model):
     heure_arrivee = models.TimeField(null=True, blank=True)
     heure_sortie = models.TimeField(null=True, blank=True)
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='absent')
+    # Durée travaillée stockée (calculer_duree_secondes), tenue à jour à chaque
+    # écriture des heures : permet SUM/AVG/filtres directement en SQL.
+    duree_secondes = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Posé par la clôture automatique de fin de journée, levé par les RH après contrôle.
+    a_verifier = models.BooleanField(default=False, db_default=False)
     note = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -25,6 +46,21 @@ class Presence(models.Model):
         verbose_name_plural = "Présences"
         unique_together = ['employe', 'date']
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Synchronisation différentielle (sync/) : lignes modifiées après un curseur
+            models.Index(fields=['updated_at', 'id'], name='presence_sync_idx'),
+            # Pagination keyset (core.pagination) sur l'ordre complet -date, -created_at, id
+            models.Index(fields=['-date', '-created_at', 'id'], name='presence_keyset_idx'),
+            # Filtre statut + période (api.filters) et absences du jour (generer_absences)
+            models.Index(fields=['statut', 'date'], name='presence_statut_date_idx'),
+            # Présents sur site : index partiel limité aux présences ouvertes,
+            # sa taille ne dépend pas de l'historique.
+            models.Index(
+                fields=['date', 'heure_arrivee'],
+                condition=Q(statut='arrive', heure_arrivee__isnull=False, heure_sortie__isnull=True),
+                name='presence_ouverte_idx',
+            ),
+        ]
         permissions = [
             ("can_manage_presence", "Peut gérer les présences"),
             ("can_view_all_reports", "Peut voir tous les rapports"),
@@ -35,40 +71,43 @@ class Presence(models.Model):
             if self.heure_sortie <= self.heure_arrivee:
                 raise ValidationError("L'heure de sortie doit être après l'heure d'arrivée.")
 
+    def save(self, *args, **kwargs):
+        self.duree_secondes = calculer_duree_secondes(self.heure_arrivee, self.heure_sortie)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'heure_arrivee', 'heure_sortie'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'duree_secondes'}
+        super().save(*args, **kwargs)
+
     def enregistrer_arrivee(self):
         """Enregistre l'heure d'arrivée avec l'heure exacte actuelle."""
-        if self.heure_arrivee:
-            raise ValueError("L'arrivée a déjà été enregistrée pour aujourd'hui.")
-        
-        now = timezone.localtime()
-        self.heure_arrivee = now.time()
-        self.statut = 'arrive'
-        self.save(update_fields=['heure_arrivee', 'statut', 'updated_at'])
-        return f"Arrivée enregistrée à {self.heure_arrivee.strftime('%H:%M:%S')}"
+        from api.services import pointage
+
+        presence, message = pointage.enregistrer_arrivee(presence_id=self.pk)
+        self.heure_arrivee = presence.heure_arrivee
+        self.duree_secondes = presence.duree_secondes
+        self.statut = presence.statut
+        self.updated_at = presence.updated_at
+        return message
 
     def enregistrer_sortie(self):
         """Enregistre l'heure de sortie avec l'heure exacte actuelle."""
-        if not self.heure_arrivee:
-            raise ValueError("Vous devez d'abord enregistrer votre arrivée.")
-        
-        if self.heure_sortie:
-            raise ValueError("La sortie a déjà été enregistrée pour aujourd'hui.")
-        
-        now = timezone.localtime()
-        self.heure_sortie = now.time()
-        self.statut = 'parti'
-        self.save(update_fields=['heure_sortie', 'statut', 'updated_at'])
-        return f"Sortie enregistrée à {self.heure_sortie.strftime('%H:%M:%S')}"
+        from api.services import pointage
+
+        presence, message = pointage.enregistrer_sortie(presence_id=self.pk)
+        self.heure_sortie = presence.heure_sortie
+        self.duree_secondes = presence.duree_secondes
+        self.statut = presence.statut
+        self.updated_at = presence.updated_at
+        return message
 
     def get_duree_travail(self):
         """Calcule la durée de travail en heures et minutes."""
         if self.heure_arrivee and self.heure_sortie:
-            from datetime import datetime, timedelta
-            arrivee = datetime.combine(self.date, self.heure_arrivee)
-            sortie = datetime.combine(self.date, self.heure_sortie)
-            duree = sortie - arrivee
-            heures = duree.seconds // 3600
-            minutes = (duree.seconds % 3600) // 60
+            secondes = self.duree_secondes
+            if secondes is None:
+                secondes = calculer_duree_secondes(self.heure_arrivee, self.heure_sortie)
+            heures = secondes // 3600
+            minutes = (secondes % 3600) // 60
             return f"{heures}h {minutes}min"
         return "En cours" if self.heure_arrivee else "Non calculable"
 
@@ -25,6 +25,13 @@ class Rapport(models.Model):
         verbose_name = "Rapport"
         verbose_name_plural = "Rapports"
         ordering = ['-created_at']
+        indexes = [
+            # Synchronisation différentielle (sync/) : lignes modifiées après un curseur
+            models.Index(fields=['updated_at', 'id'], name='rapport_sync_idx'),
+            # Pagination keyset : liste complète et liste restreinte à un employé
+            models.Index(fields=['-created_at', 'id'], name='rapport_keyset_idx'),
+            models.Index(fields=['employe', '-created_at', 'id'], name='rapport_employe_keyset_idx'),
+        ]
         permissions = [
             ("can_generate_reports", "Peut générer des rapports"),
         ]
@@ -0,0 +1,32 @@
+# api/models/suppression.py
+from django.db import models
+from django.utils import timezone
+
+
+class Suppression(models.Model):
+    """
+    Pierre tombale d'un enregistrement supprimé, pour la synchronisation
+    différentielle (sync/) : le client apprend les suppressions sans
+    recharger les collections. Écrite par api.signals sur post_delete.
+    """
+    MODELE_CHOICES = [
+        ('presence', 'Présence'),
+        ('employe', 'Employé'),
+        ('rapport', 'Rapport'),
+    ]
+
+    modele = models.CharField(max_length=20, choices=MODELE_CHOICES)
+    objet_id = models.BigIntegerField()
+    # Employé propriétaire (lui-même pour un employé) : périmètre des non-admins.
+    employe_id = models.BigIntegerField(null=True, blank=True)
+    supprime_le = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Suppression"
+        verbose_name_plural = "Suppressions"
+        indexes = [
+            models.Index(fields=['supprime_le', 'id'], name='suppression_curseur_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modele} #{self.objet_id} supprimé le {self.supprime_le}"
@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class Terminal(models.Model):
+    """Terminal de badgeage et position de sa dernière synchronisation."""
+    identifiant = models.CharField(max_length=100, unique=True)
+    dernier_sequence = models.BigIntegerField(default=0)
+    derniere_synchro = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Terminal"
+        verbose_name_plural = "Terminaux"
+
+    def __str__(self):
+        return f"Terminal {self.identifiant} (séquence {self.dernier_sequence})"
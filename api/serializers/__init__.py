@@ -1,3 +1,9 @@
 from .employe import EmployeSerializer
-from .presence import PresenceSerializer
-from .rapport import RapportSerializer
\ No newline at end of file
+from .presence import PresenceSerializer, PresenceListSerializer
+from .rapport import RapportSerializer
+from .pointage import (
+    PointageEvenementSerializer,
+    PointageLotSerializer,
+    PointageSyncEvenementSerializer,
+    PointageSyncSerializer,
+)
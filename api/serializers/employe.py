@@ -19,7 +19,7 @@ class EmployeSerializer(serializers.ModelSerializer):
         model = Employe
         fields = [
             'id', 'user', 'user_id', 'nom', 'poste',
-            'telephone', 'email', 'created_at', 'updated_at'
+            'telephone', 'email', 'badge', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
@@ -0,0 +1,43 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class PointageEvenementSerializer(serializers.Serializer):
+    """Un badgeage : employé (id ou badge), horodatage et sens."""
+    SENS_CHOICES = [
+        ('arrivee', 'Arrivée'),
+        ('sortie', 'Sortie'),
+    ]
+
+    employe = serializers.IntegerField(required=False, min_value=1)
+    badge = serializers.CharField(required=False, max_length=64)
+    horodatage = serializers.DateTimeField()
+    sens = serializers.ChoiceField(choices=SENS_CHOICES)
+
+    def validate(self, attrs):
+        if ('employe' in attrs) == ('badge' in attrs):
+            raise serializers.ValidationError("Indiquez soit 'employe', soit 'badge'.")
+        return attrs
+
+
+class PointageLotSerializer(serializers.Serializer):
+    """Lot de badgeages envoyé par un terminal."""
+    evenements = PointageEvenementSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, 'POINTAGE_LOT_MAX', 500),
+    )
+
+
+class PointageSyncEvenementSerializer(PointageEvenementSerializer):
+    """Badgeage capturé hors ligne, numéroté par le terminal."""
+    sequence = serializers.IntegerField(min_value=1)
+
+
+class PointageSyncSerializer(serializers.Serializer):
+    """Journal d'un terminal à rejouer après une coupure réseau."""
+    evenements = PointageSyncEvenementSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, 'POINTAGE_SYNC_MAX', 20000),
+    )
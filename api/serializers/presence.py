@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from api.models import Presence
+from api.models.presence import calculer_duree_secondes
+from django.db.models import F
 from django.utils import timezone
 from api.models import Employe
 from .employe import EmployeSerializer
@@ -16,7 +18,7 @@ class PresenceSerializer(serializers.ModelSerializer):
         model = Presence
         fields = [
             "id", "employe", "employe_nom", "employe_username", "date",
-            "heure_arrivee", "heure_sortie", "statut", "note",
+            "heure_arrivee", "heure_sortie", "statut", "note", "a_verifier",
             "duree_travail", "peut_arriver", "peut_partir",
             "created_at", "updated_at"
         ]
@@ -29,7 +31,7 @@ class PresenceSerializer(serializers.ModelSerializer):
         return obj.heure_arrivee is None
 
     def get_peut_partir(self, obj):
-        return obj.heure_arrivee is not None and obj.heure_sortie is None
+        return obj.statut == 'arrive' and obj.heure_arrivee is not None and obj.heure_sortie is None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,6 +42,7 @@ class PresenceSerializer(serializers.ModelSerializer):
                 self.fields['heure_arrivee'].read_only = True
                 self.fields['heure_sortie'].read_only = True
                 self.fields['statut'].read_only = True
+                self.fields['a_verifier'].read_only = True
                 
                 if not self.instance:
                     self.fields['employe'].read_only = True
@@ -56,4 +59,80 @@ class PresenceSerializer(serializers.ModelSerializer):
             except Employe.DoesNotExist:
                 raise serializers.ValidationError("Votre compte n'est pas associé à un employé.")
         
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+def formater_duree_travail(arrivee, sortie, duree_secondes):
+    """Équivalent de Presence.get_duree_travail() à partir de la durée stockée."""
+    if arrivee is not None and sortie is not None:
+        secondes = duree_secondes
+        if secondes is None:
+            secondes = calculer_duree_secondes(arrivee, sortie)
+        return f"{secondes // 3600}h {(secondes % 3600) // 60}min"
+    return "En cours" if arrivee else "Non calculable"
+
+
+class PresenceListSerializer:
+    """
+    Mode lecture optimisé des listes de présences.
+
+    Produit exactement le même JSON que PresenceSerializer(many=True), mais à
+    partir d'une projection values() (employe_nom / employe_username joints en
+    SQL) et sans instancier de modèle ni de champ DRF par ligne.
+
+    Usage :
+        rows = PresenceListSerializer.projeter(queryset)
+        PresenceListSerializer(rows).data
+    """
+
+    champs_modele = (
+        "id", "employe", "date", "heure_arrivee", "heure_sortie",
+        "statut", "note", "a_verifier", "duree_secondes", "created_at", "updated_at",
+    )
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def projeter(cls, queryset):
+        return queryset.values(
+            *cls.champs_modele,
+            employe_nom=F("employe__nom"),
+            employe_username=F("employe__user__username"),
+        )
+
+    @staticmethod
+    def _datetime(value, tz):
+        # Même rendu que serializers.DateTimeField (ISO 8601, "Z" pour UTC).
+        if value is None:
+            return None
+        if timezone.is_aware(value):
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    @property
+    def data(self):
+        tz = timezone.get_current_timezone()
+        datetime_iso = self._datetime
+        data = []
+        for row in self.rows:
+            arrivee = row["heure_arrivee"]
+            sortie = row["heure_sortie"]
+            data.append({
+                "id": row["id"],
+                "employe": row["employe"],
+                "employe_nom": row["employe_nom"],
+                "employe_username": row["employe_username"],
+                "date": row["date"].isoformat() if row["date"] else None,
+                "heure_arrivee": arrivee.isoformat() if arrivee else None,
+                "heure_sortie": sortie.isoformat() if sortie else None,
+                "statut": row["statut"],
+                "note": row["note"],
+                "a_verifier": row["a_verifier"],
+                "duree_travail": formater_duree_travail(arrivee, sortie, row["duree_secondes"]),
+                "peut_arriver": arrivee is None,
+                "peut_partir": row["statut"] == 'arrive' and arrivee is not None and sortie is None,
+                "created_at": datetime_iso(row["created_at"], tz),
+                "updated_at": datetime_iso(row["updated_at"], tz),
+            })
+        return data
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from api.models import Rapport,Employe
+from api.services.rapports import generer_contenu
 
 
 class RapportSerializer(serializers.ModelSerializer):
@@ -20,6 +21,8 @@ class RapportSerializer(serializers.ModelSerializer):
             "created_at", "updated_at"
         ]
         read_only_fields = ["created_at", "updated_at", "employe_nom", "employe_poste"]
+        # Sans contenu fourni, le rapport est généré depuis les cumuls de présence
+        extra_kwargs = {"contenu": {"required": False, "allow_blank": True}}
 
     def validate(self, attrs):
         # PROBLÈME 5: Validation des dates ne vérifie pas si les champs existent
@@ -74,5 +77,12 @@ class RapportSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError({
                         'employe': 'Votre compte n\'est pas associé à un employé.'
                     })
+
+        if not validated_data.get('contenu'):
+            validated_data['contenu'] = generer_contenu(
+                validated_data['employe'].id,
+                validated_data['date_debut'],
+                validated_data['date_fin'],
+            )
         
         return super().create(validated_data)
\ No newline at end of file
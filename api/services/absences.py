@@ -0,0 +1,55 @@
+# api/services/absences.py
+"""
+Génération nocturne des lignes "absent" du jour.
+
+Chaque employé actif reçoit une présence statut='absent' pour la date
+donnée ; les lignes déjà présentes (arrivée pointée, absence déjà générée)
+sont laissées intactes grâce à la contrainte unique (employe, date) et à
+`bulk_create(ignore_conflicts=True)`. "Qui n'est pas venu" devient alors un
+simple filtre indexé : Presence.objects.filter(date=jour, statut='absent').
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Employe, Presence
+from api.services.cumuls import actualiser_cumuls
+
+BATCH_SIZE = 5000
+
+
+def _par_lots(iterable, taille):
+    lot = []
+    for element in iterable:
+        lot.append(element)
+        if len(lot) >= taille:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+def generer_absences(jour=None, batch_size=BATCH_SIZE):
+    """
+    Crée les absences de `jour` (aujourd'hui par défaut) pour tous les
+    employés actifs, par lots de `batch_size`, une transaction par lot
+    (cumuls compris). Retourne le nombre de lignes créées.
+    """
+    jour = jour or timezone.localdate()
+    avant = Presence.objects.filter(date=jour).count()
+
+    employe_ids = (
+        Employe.objects.filter(user__is_active=True)
+        .order_by('id')
+        .values_list('id', flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+    for lot in _par_lots(employe_ids, batch_size):
+        with transaction.atomic():
+            Presence.objects.bulk_create(
+                [Presence(employe_id=employe_id, date=jour, statut='absent') for employe_id in lot],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+            actualiser_cumuls((employe_id, jour) for employe_id in lot)
+
+    return Presence.objects.filter(date=jour).count() - avant
@@ -0,0 +1,76 @@
+# api/services/archive.py
+"""
+Archivage des présences des périodes closes.
+
+La table chaude api_presence ne garde que les PRESENCE_HORIZON_MOIS derniers
+mois : c'est elle que lisent les pointages, le roster, la liste du mois en
+cours et les cumuls. `archiver_presences()` déplace le reste vers
+api_presencearchive par lots (DELETE ... RETURNING puis INSERT, une
+transaction par lot : la ligne n'existe jamais en double ni nulle part).
+
+Les lectures historiques passent par la vue api_presence_historique
+(PresenceHistorique), réunion des deux tables : `modele_presences(date)`
+ne choisit la table chaude que si la borne basse de la période est connue
+et dans l'horizon. Les jours archivés sont clos : aucun pointage n'y crée
+de ligne chaude (elle apparaîtrait en double dans la vue).
+Les cumuls journaliers et mensuels ne sont pas touchés par l'archivage, et
+`reconstruire_cumuls` relit la vue historique pour les mois archivés.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Presence, PresenceArchive, PresenceHistorique
+
+BATCH_SIZE = 5000
+COLONNES = (
+    "id", "employe_id", "date", "heure_arrivee", "heure_sortie", "statut", "note",
+    "duree_secondes", "a_verifier", "created_at", "updated_at",
+)
+
+
+def horizon(aujourd_hui=None):
+    """Premier jour conservé dans la table chaude."""
+    aujourd_hui = aujourd_hui or timezone.localdate()
+    mois = aujourd_hui.year * 12 + aujourd_hui.month - 1 - settings.PRESENCE_HORIZON_MOIS
+    return aujourd_hui.replace(year=mois // 12, month=mois % 12 + 1, day=1)
+
+
+def modele_presences(date_after=None):
+    """
+    Presence si la période commence dans l'horizon, sinon la vue historique
+    (y compris sans borne basse : la période remonte alors aux archives).
+    """
+    if date_after is None or date_after < horizon():
+        return PresenceHistorique
+    return Presence
+
+
+def archiver_presences(avant=None, batch_size=BATCH_SIZE):
+    """
+    Déplace vers PresenceArchive les présences antérieures à `avant`
+    (l'horizon par défaut, jamais au-delà). Retourne le nombre de lignes
+    déplacées.
+    """
+    limite = horizon()
+    avant = min(avant, limite) if avant else limite
+
+    qn = connection.ops.quote_name
+    colonnes = ", ".join(COLONNES)
+    sql = (
+        f"WITH deplacees AS ("
+        f"DELETE FROM {qn(Presence._meta.db_table)} WHERE id IN ("
+        f"SELECT id FROM {qn(Presence._meta.db_table)} WHERE date < %s ORDER BY id LIMIT %s"
+        f") RETURNING {colonnes}) "
+        f"INSERT INTO {qn(PresenceArchive._meta.db_table)} ({colonnes}) "
+        f"SELECT {colonnes} FROM deplacees"
+    )
+
+    total = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [avant, batch_size])
+            deplacees = cursor.rowcount
+        total += deplacees
+        if deplacees < batch_size:
+            return total
@@ -0,0 +1,62 @@
+# api/services/cloture.py
+"""
+Clôture de fin de journée des présences restées ouvertes.
+
+Un employé qui oublie de badger sa sortie laisse une présence
+"arrive" sans heure_sortie. `cloturer_journee` les clôt toutes en un seul
+UPDATE selon la politique configurée (settings.CLOTURE_POLITIQUE) :
+- "heure_defaut" : sortie posée à CLOTURE_HEURE_DEFAUT (jamais avant l'arrivée),
+  durée calculée comme à un badgeage normal ;
+- "revue"        : statut 'parti' sans heure de sortie, durée laissée vide ;
+  la sortie ne peut plus être badgée (elle exige statut 'arrive'), les RH
+  la saisissent après contrôle.
+Les présences clôturées sont marquées a_verifier pour les RH, et les cumuls
+sont mis à jour dans la même transaction.
+"""
+from datetime import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Presence
+from api.services.cumuls import actualiser_cumuls
+from api.services.pointage import DUREE_SQL
+
+POLITIQUES = ("heure_defaut", "revue")
+
+
+def cloturer_journee(jour=None, politique=None, heure=None):
+    """
+    Clôt les présences ouvertes de `jour` (aujourd'hui par défaut).
+    Retourne le nombre de présences clôturées.
+    """
+    jour = jour or timezone.localdate()
+    politique = politique or settings.CLOTURE_POLITIQUE
+    if politique not in POLITIQUES:
+        raise ValueError(f"Politique de clôture inconnue : {politique}.")
+
+    table = connection.ops.quote_name(Presence._meta.db_table)
+    if politique == "heure_defaut":
+        heure = heure or time.fromisoformat(settings.CLOTURE_HEURE_DEFAUT)
+        sortie = "GREATEST(%s, heure_arrivee)"
+        assignations = (
+            f"heure_sortie = {sortie}, "
+            f"duree_secondes = {DUREE_SQL.format(sortie=sortie, arrivee='heure_arrivee')}, "
+        )
+        params = [heure, heure]
+    else:
+        assignations = ""
+        params = []
+
+    sql = (
+        f"UPDATE {table} SET {assignations}statut = 'parti', a_verifier = TRUE, updated_at = %s "
+        f"WHERE date = %s AND statut = 'arrive' AND heure_arrivee IS NOT NULL AND heure_sortie IS NULL "
+        f"RETURNING employe_id, date"
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, timezone.now(), jour])
+            cloturees = cursor.fetchall()
+        actualiser_cumuls(cloturees)
+    return len(cloturees)
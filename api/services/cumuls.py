@@ -0,0 +1,227 @@
+# api/services/cumuls.py
+"""
+Cumuls de présence (tables PresenceJournaliere / PresenceMensuelle).
+
+- `actualiser_cumuls(paires)` recalcule uniquement les jours (employe, date)
+  touchés et les mois qui les contiennent : appelé à chaque écriture de présence.
+- `reconstruire_cumuls(debut, fin)` reconstruit tout une période en masse
+  (commande `reconstruire_cumuls`), archives comprises.
+- `resumer_periode(employe_id, debut, fin)` lit les cumuls : les mois complets
+  depuis PresenceMensuelle, les bords depuis PresenceJournaliere.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from api.models import Presence, PresenceJournaliere, PresenceMensuelle
+from api.services.archive import modele_presences
+
+BATCH_SIZE = 5000
+CHAMPS_PRESENCE = ('employe_id', 'date', 'duree_secondes', 'statut')
+
+
+def premier_du_mois(jour):
+    return jour.replace(day=1)
+
+
+def fin_du_mois(jour):
+    return (jour.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def _journaliere(employe_id, date, duree_secondes, statut):
+    return PresenceJournaliere(
+        employe_id=employe_id, date=date, statut=statut, minutes_travaillees=(duree_secondes or 0) // 60
+    )
+
+
+def _agregats_mensuels(queryset):
+    return (
+        queryset.annotate(mois=TruncMonth('date'))
+        .values('employe_id', 'mois')
+        .annotate(
+            jours_presents=Count('id', filter=~Q(statut='absent')),
+            absences=Count('id', filter=Q(statut='absent')),
+            minutes=Sum('minutes_travaillees'),
+        )
+        .order_by()
+    )
+
+
+def _mensuelle(row):
+    return PresenceMensuelle(
+        employe_id=row['employe_id'], mois=row['mois'],
+        jours_presents=row['jours_presents'], absences=row['absences'],
+        minutes_travaillees=row['minutes'] or 0,
+    )
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return (
+        qn(Presence._meta.db_table),
+        qn(PresenceJournaliere._meta.db_table),
+        qn(PresenceMensuelle._meta.db_table),
+    )
+
+
+# Couples (employe_id, date) touchés, passés en deux tableaux parallèles.
+PAIRES_SQL = "UNNEST(%s::bigint[], %s::date[]) AS c(employe_id, date)"
+MOIS_SQL = f"(SELECT DISTINCT employe_id, date_trunc('month', date)::date AS mois FROM {PAIRES_SQL}) AS c"
+
+
+def actualiser_cumuls(paires):
+    """
+    Recalcule les cumuls des couples (employe_id, date) donnés et de leurs mois.
+
+    Cinq requêtes ensemblistes quel que soit le nombre de couples : upsert
+    puis purge des lignes journalières ; pour les mois, création ou verrouillage
+    des lignes, recalcul, puis purge.
+
+    Le recalcul mensuel est une requête distincte, exécutée une fois les lignes
+    du mois verrouillées : deux transactions concurrentes sur le même mois sont
+    sérialisées, et la seconde agrège les jours validés par la première au lieu
+    d'écraser son cumul.
+    """
+    paires = set(paires)
+    if not paires:
+        return
+
+    presence, journaliere, mensuelle = _tables()
+    employe_ids, dates = zip(*paires)
+    params = [list(employe_ids), list(dates)]
+    now = timezone.now()
+
+    # Pas de savepoint : l'appelant est presque toujours déjà dans sa transaction
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {journaliere} (employe_id, date, statut, minutes_travaillees, updated_at) "
+            f"SELECT p.employe_id, p.date, p.statut, COALESCE(p.duree_secondes, 0) / 60, %s "
+            f"FROM {presence} p JOIN {PAIRES_SQL} ON p.employe_id = c.employe_id AND p.date = c.date "
+            f"ON CONFLICT (employe_id, date) DO UPDATE SET statut = EXCLUDED.statut, "
+            f"minutes_travaillees = EXCLUDED.minutes_travaillees, updated_at = EXCLUDED.updated_at",
+            [now, *params],
+        )
+        cursor.execute(
+            f"DELETE FROM {journaliere} j USING {PAIRES_SQL} "
+            f"WHERE j.employe_id = c.employe_id AND j.date = c.date AND NOT EXISTS "
+            f"(SELECT 1 FROM {presence} p WHERE p.employe_id = j.employe_id AND p.date = j.date)",
+            params,
+        )
+        # Crée ou verrouille les lignes des mois, dans un ordre stable (pas d'interblocage).
+        cursor.execute(
+            f"INSERT INTO {mensuelle} (employe_id, mois, jours_presents, absences, minutes_travaillees, updated_at) "
+            f"SELECT c.employe_id, c.mois, 0, 0, 0, %s FROM {MOIS_SQL} ORDER BY c.employe_id, c.mois "
+            f"ON CONFLICT (employe_id, mois) DO UPDATE SET updated_at = EXCLUDED.updated_at",
+            [now, *params],
+        )
+        cursor.execute(
+            f"UPDATE {mensuelle} m SET jours_presents = a.jours_presents, absences = a.absences, "
+            f"minutes_travaillees = a.minutes_travaillees "
+            f"FROM (SELECT c.employe_id, c.mois, COUNT(*) FILTER (WHERE j.statut <> 'absent') AS jours_presents, "
+            f"COUNT(*) FILTER (WHERE j.statut = 'absent') AS absences, "
+            f"COALESCE(SUM(j.minutes_travaillees), 0) AS minutes_travaillees "
+            f"FROM {MOIS_SQL} JOIN {journaliere} j ON j.employe_id = c.employe_id "
+            f"AND j.date >= c.mois AND j.date < c.mois + interval '1 month' "
+            f"GROUP BY c.employe_id, c.mois) a "
+            f"WHERE m.employe_id = a.employe_id AND m.mois = a.mois",
+            params,
+        )
+        cursor.execute(
+            f"DELETE FROM {mensuelle} m USING {MOIS_SQL} "
+            f"WHERE m.employe_id = c.employe_id AND m.mois = c.mois AND NOT EXISTS "
+            f"(SELECT 1 FROM {journaliere} j WHERE j.employe_id = m.employe_id "
+            f"AND j.date >= m.mois AND j.date < m.mois + interval '1 month')",
+            params,
+        )
+
+
+def reconstruire_cumuls(debut=None, fin=None):
+    """
+    Reconstruit en masse les cumuls entre `debut` et `fin` (mois complets ;
+    toute la table si aucune borne). Retourne (nb_jours, nb_mois).
+
+    Les présences sont relues depuis la vue historique dès que la période
+    remonte avant l'horizon : les mois archivés gardent leurs cumuls.
+    """
+    presences = modele_presences(debut and premier_du_mois(debut)).objects.order_by()
+    journalieres = PresenceJournaliere.objects.all()
+    mensuelles = PresenceMensuelle.objects.all()
+    if debut:
+        debut = premier_du_mois(debut)
+        presences = presences.filter(date__gte=debut)
+        journalieres = journalieres.filter(date__gte=debut)
+        mensuelles = mensuelles.filter(mois__gte=debut)
+    if fin:
+        fin = fin_du_mois(fin)
+        presences = presences.filter(date__lte=fin)
+        journalieres = journalieres.filter(date__lte=fin)
+        mensuelles = mensuelles.filter(mois__lte=fin)
+
+    nb_jours = nb_mois = 0
+    with transaction.atomic():
+        journalieres.delete()
+        mensuelles.delete()
+
+        lot = []
+        for row in presences.values_list(*CHAMPS_PRESENCE).iterator(chunk_size=BATCH_SIZE):
+            lot.append(_journaliere(*row))
+            if len(lot) >= BATCH_SIZE:
+                PresenceJournaliere.objects.bulk_create(lot)
+                nb_jours += len(lot)
+                lot = []
+        PresenceJournaliere.objects.bulk_create(lot)
+        nb_jours += len(lot)
+
+        lot = []
+        for row in _agregats_mensuels(journalieres).iterator(chunk_size=BATCH_SIZE):
+            lot.append(_mensuelle(row))
+            if len(lot) >= BATCH_SIZE:
+                PresenceMensuelle.objects.bulk_create(lot)
+                nb_mois += len(lot)
+                lot = []
+        PresenceMensuelle.objects.bulk_create(lot)
+        nb_mois += len(lot)
+
+    return nb_jours, nb_mois
+
+
+def resumer_periode(employe_id, debut, fin):
+    """
+    Jours présents, absences et minutes travaillées entre `debut` et `fin`.
+    Lit une ligne par mois complet et au plus une ligne par jour des mois partiels.
+    """
+    resume = {'jours_presents': 0, 'absences': 0, 'minutes_travaillees': 0}
+
+    # [premier_complet, apres_dernier[ : mois entièrement couverts par la période
+    premier_complet = debut if debut.day == 1 else fin_du_mois(debut) + timedelta(days=1)
+    apres_dernier = fin + timedelta(days=1) if fin == fin_du_mois(fin) else premier_du_mois(fin)
+
+    if premier_complet < apres_dernier:
+        mensuel = PresenceMensuelle.objects.filter(
+            employe_id=employe_id, mois__gte=premier_complet, mois__lt=apres_dernier
+        ).aggregate(
+            jours_presents=Sum('jours_presents'),
+            absences=Sum('absences'),
+            minutes_travaillees=Sum('minutes_travaillees'),
+        )
+        bords = Q(date__gte=debut, date__lt=premier_complet) | Q(date__gte=apres_dernier, date__lte=fin)
+        a_lire_par_jour = debut < premier_complet or apres_dernier <= fin
+    else:
+        mensuel = {}
+        bords = Q(date__gte=debut, date__lte=fin)
+        a_lire_par_jour = True
+
+    journalier = {}
+    if a_lire_par_jour:
+        journalier = PresenceJournaliere.objects.filter(bords, employe_id=employe_id).aggregate(
+            jours_presents=Count('id', filter=~Q(statut='absent')),
+            absences=Count('id', filter=Q(statut='absent')),
+            minutes_travaillees=Sum('minutes_travaillees'),
+        )
+
+    for cle in resume:
+        resume[cle] = (mensuel.get(cle) or 0) + (journalier.get(cle) or 0)
+    return resume
@@ -0,0 +1,421 @@
+# api/services/pointage.py
+"""
+Moteur de pointage (arrivée / sortie).
+
+Chaque pointage est une seule requête SQL conditionnelle :
+- arrivée  → INSERT ... ON CONFLICT (employe_id, date) DO UPDATE ... WHERE heure_arrivee IS NULL
+- sortie   → UPDATE ... WHERE statut = 'arrive' AND heure_arrivee IS NOT NULL AND heure_sortie IS NULL
+
+La base tranche les doubles badgeages concurrents : "déjà enregistré" est
+déduit du nombre de lignes retournées, jamais d'une lecture préalable en Python.
+
+Chaque pointage validé est diffusé sur le canal "presences" (core.broadcast)
+après le commit, pour les flux temps réel.
+
+Les lots de badgeages (terminaux) passent par `appliquer_pointages`, qui
+applique N événements en une transaction, un insert conditionnel et un
+upsert groupé ; les journaux
+hors ligne passent par `synchroniser_terminal`, qui y ajoute la déduplication
+par numéro de séquence.
+"""
+import json
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import Employe, Presence, Terminal
+from api.models.presence import calculer_duree_secondes
+from api.services.archive import horizon
+from api.services.cumuls import actualiser_cumuls
+from core.broadcast import publier
+
+CANAL_PRESENCES = "presences"
+
+
+# Même règle que calculer_duree_secondes, évaluée par la base au moment de l'écriture.
+DUREE_SQL = "MOD(FLOOR(EXTRACT(EPOCH FROM ({sortie} - {arrivee})))::integer + 86400, 86400)"
+
+
+class PointageError(ValueError):
+    """Erreur métier de pointage (réponse 400 par défaut)."""
+    status_code = 400
+
+
+class PresenceIntrouvable(PointageError):
+    """La présence visée n'existe pas."""
+    status_code = 404
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return qn(Presence._meta.db_table), qn(Employe._meta.db_table)
+
+
+def _executer(sql, params):
+    """Exécute l'écriture conditionnelle et met à jour les cumuls de la ligne touchée."""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        pk, employe_id, date = row
+        actualiser_cumuls([(employe_id, date)])
+    return pk
+
+
+def _charger(presence_id):
+    return Presence.objects.select_related('employe__user').get(pk=presence_id)
+
+
+def _heure(valeur):
+    return valeur.isoformat() if valeur else None
+
+
+def _publier(presences):
+    """Diffuse l'état des présences pointées une fois la transaction validée."""
+    messages = [
+        {
+            "event": "arrivee" if p.statut == 'arrive' else "sortie",
+            "data": json.dumps({
+                "presence": p.pk,
+                "employe": p.employe_id,
+                "date": p.date.isoformat(),
+                "heure_arrivee": _heure(p.heure_arrivee),
+                "heure_sortie": _heure(p.heure_sortie),
+                "statut": p.statut,
+            }),
+        }
+        for p in presences
+    ]
+
+    def diffuser():
+        for message in messages:
+            publier(CANAL_PRESENCES, message)
+
+    transaction.on_commit(diffuser)
+
+
+def enregistrer_arrivee(*, user_id=None, presence_id=None, moment=None):
+    """
+    Enregistre l'arrivée soit pour l'employé lié à `user_id` (pointage personnel,
+    la présence du jour est créée si besoin), soit pour la présence `presence_id`.
+    Retourne (presence, message).
+    """
+    moment = timezone.localtime(moment)
+    heure = moment.time()
+    now = timezone.now()
+    presence_table, employe_table = _tables()
+
+    if presence_id is None:
+        sql = (
+            f"INSERT INTO {presence_table} "
+            f"(employe_id, date, heure_arrivee, statut, created_at, updated_at) "
+            f"SELECT e.id, %s, %s, 'arrive', %s, %s FROM {employe_table} e WHERE e.user_id = %s "
+            f"ON CONFLICT (employe_id, date) DO UPDATE SET "
+            f"heure_arrivee = EXCLUDED.heure_arrivee, statut = EXCLUDED.statut, "
+            f"duree_secondes = {DUREE_SQL.format(sortie=f'{presence_table}.heure_sortie', arrivee='EXCLUDED.heure_arrivee')}, "
+            f"updated_at = EXCLUDED.updated_at "
+            f"WHERE {presence_table}.heure_arrivee IS NULL "
+            f"RETURNING id, employe_id, date"
+        )
+        pk = _executer(sql, [moment.date(), heure, now, now, user_id])
+        if pk is None:
+            if not Employe.objects.filter(user_id=user_id).exists():
+                raise PointageError("Votre compte n'est pas lié à un employé.")
+            raise PointageError("L'arrivée a déjà été enregistrée pour aujourd'hui.")
+    else:
+        sql = (
+            f"UPDATE {presence_table} SET heure_arrivee = %s, statut = 'arrive', "
+            f"duree_secondes = {DUREE_SQL.format(sortie='heure_sortie', arrivee='%s::time')}, updated_at = %s "
+            f"WHERE id = %s AND heure_arrivee IS NULL "
+            f"RETURNING id, employe_id, date"
+        )
+        pk = _executer(sql, [heure, heure, now, presence_id])
+        if pk is None:
+            if not Presence.objects.filter(pk=presence_id).exists():
+                raise PresenceIntrouvable("Présence introuvable.")
+            raise PointageError("L'arrivée a déjà été enregistrée pour aujourd'hui.")
+
+    presence = _charger(pk)
+    _publier([presence])
+    return presence, f"Arrivée enregistrée à {heure.strftime('%H:%M:%S')}"
+
+
+def enregistrer_sortie(*, user_id=None, presence_id=None, moment=None):
+    """
+    Enregistre la sortie pour la présence du jour de `user_id` ou pour la
+    présence `presence_id`. Retourne (presence, message).
+    """
+    moment = timezone.localtime(moment)
+    heure = moment.time()
+    now = timezone.now()
+    presence_table, employe_table = _tables()
+
+    sql = (
+        f"UPDATE {presence_table} SET heure_sortie = %s, statut = 'parti', "
+        f"duree_secondes = {DUREE_SQL.format(sortie='%s::time', arrivee='heure_arrivee')}, updated_at = %s "
+        f"WHERE statut = 'arrive' AND heure_arrivee IS NOT NULL AND heure_sortie IS NULL AND "
+    )
+    if presence_id is None:
+        sql += f"date = %s AND employe_id = (SELECT id FROM {employe_table} WHERE user_id = %s) RETURNING id, employe_id, date"
+        pk = _executer(sql, [heure, heure, now, moment.date(), user_id])
+        lookup = {"employe__user_id": user_id, "date": moment.date()}
+    else:
+        sql += "id = %s RETURNING id, employe_id, date"
+        pk = _executer(sql, [heure, heure, now, presence_id])
+        lookup = {"pk": presence_id}
+
+    if pk is None:
+        # Chemin froid : on lit la ligne uniquement pour expliquer le refus.
+        etat = Presence.objects.filter(**lookup).values('heure_arrivee', 'statut').first()
+        if etat is None:
+            if presence_id is not None:
+                raise PresenceIntrouvable("Présence introuvable.")
+            if not Employe.objects.filter(user_id=user_id).exists():
+                raise PointageError("Votre compte n'est pas lié à un employé.")
+            raise PresenceIntrouvable("Aucune présence trouvée. Pointez d'abord votre arrivée.")
+        if etat['heure_arrivee'] is None:
+            raise PointageError("Vous devez d'abord enregistrer votre arrivée.")
+        if etat['statut'] == 'absent':
+            raise PointageError("Cette présence est marquée absente : la sortie ne peut pas être enregistrée.")
+        raise PointageError("La sortie a déjà été enregistrée pour aujourd'hui.")
+
+    presence = _charger(pk)
+    _publier([presence])
+    return presence, f"Sortie enregistrée à {heure.strftime('%H:%M:%S')}"
+
+
+CHAMPS_POINTAGE = ['heure_arrivee', 'heure_sortie', 'duree_secondes', 'statut', 'updated_at']
+
+
+def _resoudre_employes(evenements):
+    """Résout identifiants et badges en une seule requête : {('employe'|'badge', valeur): employe_id}."""
+    ids = {e['employe'] for e in evenements if e.get('employe') is not None}
+    badges = {e['badge'] for e in evenements if e.get('badge')}
+    if not ids and not badges:
+        return {}
+
+    index = {}
+    for employe_id, badge in Employe.objects.filter(Q(id__in=ids) | Q(badge__in=badges)).values_list('id', 'badge'):
+        index[('employe', employe_id)] = employe_id
+        if badge:
+            index[('badge', badge)] = employe_id
+    return index
+
+
+def _cle_employe(evenement):
+    if evenement.get('employe') is not None:
+        return ('employe', evenement['employe'])
+    return ('badge', evenement.get('badge'))
+
+
+def _verrouiller(employe_ids, dates):
+    """Verrouille les présences existantes des employés sur la période : {(employe_id, date): Presence}."""
+    return {
+        (p.employe_id, p.date): p
+        for p in Presence.objects.select_for_update().filter(
+            employe_id__in=employe_ids, date__range=(min(dates), max(dates))
+        ).order_by()
+    }
+
+
+def _rejouer(a_appliquer, etat, resultats):
+    """
+    Rejoue les événements triés sur l'état `etat` (modifié en place) et
+    renseigne leurs résultats. Retourne les présences modifiées par (employe_id, date).
+    """
+    modifiees = {}
+    for moment, i, employe_id, sens in a_appliquer:
+        cle = (employe_id, moment.date())
+        presence = modifiees.get(cle) or etat.get(cle)
+        if presence is None:
+            presence = Presence(employe_id=employe_id, date=moment.date(), statut='absent')
+        heure = moment.time()
+
+        if sens == 'arrivee':
+            if presence.heure_arrivee:
+                resultats[i]["message"] = "L'arrivée a déjà été enregistrée pour ce jour."
+                continue
+            presence.heure_arrivee = heure
+            presence.statut = 'arrive'
+            resultats[i]["message"] = f"Arrivée enregistrée à {heure.strftime('%H:%M:%S')}"
+        else:
+            if not presence.heure_arrivee:
+                resultats[i]["message"] = "Vous devez d'abord enregistrer votre arrivée."
+                continue
+            if presence.statut == 'absent':
+                resultats[i]["message"] = "Cette présence est marquée absente : la sortie ne peut pas être enregistrée."
+                continue
+            # Une présence clôturée en revue est 'parti' sans heure de sortie
+            if presence.heure_sortie or presence.statut != 'arrive':
+                resultats[i]["message"] = "La sortie a déjà été enregistrée pour ce jour."
+                continue
+            if heure <= presence.heure_arrivee:
+                resultats[i]["message"] = "L'heure de sortie doit être après l'heure d'arrivée."
+                continue
+            presence.heure_sortie = heure
+            presence.statut = 'parti'
+            resultats[i]["message"] = f"Sortie enregistrée à {heure.strftime('%H:%M:%S')}"
+
+        resultats[i]["success"] = True
+        modifiees[cle] = presence
+    return modifiees
+
+
+def _inserer_nouvelles(presences):
+    """
+    Insère les présences absentes au verrouillage, sans jamais écraser une
+    ligne créée entre-temps par un pointage concurrent (ON CONFLICT DO NOTHING).
+    Retourne {(employe_id, date): id} des lignes réellement insérées.
+    """
+    if not presences:
+        return {}
+    presence_table, _ = _tables()
+    now = timezone.now()
+    sql = (
+        f"INSERT INTO {presence_table} "
+        f"(employe_id, date, heure_arrivee, heure_sortie, statut, duree_secondes, created_at, updated_at) "
+        f"SELECT n.*, %s, %s FROM UNNEST(%s::bigint[], %s::date[], %s::time[], %s::time[], "
+        f"%s::varchar[], %s::integer[]) AS n "
+        f"ON CONFLICT (employe_id, date) DO NOTHING "
+        f"RETURNING id, employe_id, date"
+    )
+    colonnes = [
+        [p.employe_id for p in presences],
+        [p.date for p in presences],
+        [p.heure_arrivee for p in presences],
+        [p.heure_sortie for p in presences],
+        [p.statut for p in presences],
+        [calculer_duree_secondes(p.heure_arrivee, p.heure_sortie) for p in presences],
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [now, now, *colonnes])
+        inserees = {(employe_id, date): pk for pk, employe_id, date in cursor.fetchall()}
+    for p in presences:
+        p.pk = inserees.get((p.employe_id, p.date))
+        p.created_at = p.updated_at = now
+    return inserees
+
+
+def appliquer_pointages(evenements, batch_size=1000):
+    """
+    Applique un lot d'événements de badgeage.
+
+    Chaque événement est un dict {employe | badge, horodatage, sens} où `sens`
+    vaut 'arrivee' ou 'sortie'. Les événements d'un jour archivé (avant
+    l'horizon) sont refusés. Les autres sont rejoués dans l'ordre
+    chronologique sur l'état verrouillé des présences concernées. Les lignes
+    qui n'existaient pas sont insérées sans écraser un pointage concurrent :
+    en cas de conflit, leurs événements sont rejoués sur la ligne gagnante,
+    verrouillée à son tour. Les lignes verrouillées sont ensuite écrites par
+    un seul upsert sur (employe, date).
+
+    Retourne une liste de résultats dans l'ordre d'entrée :
+    {"index", "success", "presence", "message"}.
+    """
+    resultats = [
+        {"index": i, "success": False, "presence": None, "message": ""}
+        for i in range(len(evenements))
+    ]
+    employes = _resoudre_employes(evenements)
+    limite = horizon()
+
+    a_appliquer = []
+    for i, evenement in enumerate(evenements):
+        employe_id = employes.get(_cle_employe(evenement))
+        if employe_id is None:
+            resultats[i]["message"] = "Employé introuvable."
+            continue
+        moment = timezone.localtime(evenement['horodatage'])
+        if moment.date() < limite:
+            # Jour archivé : une ligne chaude le doublerait dans la vue historique
+            resultats[i]["message"] = "Ce jour est archivé : pointage refusé."
+            continue
+        a_appliquer.append((moment, i, employe_id, evenement['sens']))
+
+    if not a_appliquer:
+        return resultats
+    a_appliquer.sort(key=lambda item: (item[0], item[1]))
+
+    with transaction.atomic():
+        # Une lecture verrouillée pour toutes les lignes touchées par le lot.
+        existantes = _verrouiller({item[2] for item in a_appliquer}, [item[0].date() for item in a_appliquer])
+        modifiees = _rejouer(a_appliquer, existantes, resultats)
+
+        nouvelles = [p for cle, p in modifiees.items() if cle not in existantes]
+        ids = _inserer_nouvelles(nouvelles)
+        perdues = {(p.employe_id, p.date) for p in nouvelles if p.pk is None}
+        if perdues:
+            # Lignes insérées par un pointage concurrent : on les verrouille et on rejoue.
+            a_rejouer = [item for item in a_appliquer if (item[2], item[0].date()) in perdues]
+            for _, i, _, _ in a_rejouer:
+                resultats[i].update(success=False, message="")
+            for cle in perdues:
+                del modifiees[cle]
+            existantes.update(_verrouiller({e for e, _ in perdues}, [d for _, d in perdues]))
+            modifiees.update(_rejouer(a_rejouer, existantes, resultats))
+
+        if modifiees:
+            # Objets neufs (sans pk) : l'upsert résout les conflits sur (employe, date)
+            # et created_at des lignes existantes est préservé. Elles sont toutes verrouillées.
+            lignes = [
+                Presence(
+                    employe_id=p.employe_id, date=p.date, statut=p.statut,
+                    heure_arrivee=p.heure_arrivee, heure_sortie=p.heure_sortie,
+                    duree_secondes=calculer_duree_secondes(p.heure_arrivee, p.heure_sortie),
+                )
+                for cle, p in modifiees.items() if cle in existantes
+            ]
+            Presence.objects.bulk_create(
+                lignes,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['employe', 'date'],
+                update_fields=CHAMPS_POINTAGE,
+            )
+            ids.update({(p.employe_id, p.date): p.pk for p in lignes})
+            actualiser_cumuls(modifiees.keys())
+            _publier([*lignes, *(p for p in nouvelles if p.pk is not None)])
+            for moment, i, employe_id, sens in a_appliquer:
+                if resultats[i]["success"]:
+                    resultats[i]["presence"] = ids[(employe_id, moment.date())]
+
+    return resultats
+
+
+def synchroniser_terminal(identifiant, evenements):
+    """
+    Rejoue le journal d'un terminal resté hors ligne.
+
+    Les séquences déjà appliquées (<= dernier_sequence du terminal, ou en
+    double dans le journal) sont ignorées ; les autres sont appliquées par
+    `appliquer_pointages` dans l'ordre chronologique. Le verrou sur la ligne
+    du terminal sérialise deux synchronisations concurrentes du même terminal.
+
+    Retourne (terminal, doublons, resultats) où `resultats` suit l'ordre des
+    événements nouveaux, chacun complété de sa `sequence`.
+    """
+    with transaction.atomic():
+        terminal, _ = Terminal.objects.select_for_update().get_or_create(identifiant=identifiant)
+
+        vus = set()
+        nouveaux = []
+        for evenement in evenements:
+            sequence = evenement['sequence']
+            if sequence <= terminal.dernier_sequence or sequence in vus:
+                continue
+            vus.add(sequence)
+            nouveaux.append(evenement)
+
+        resultats = appliquer_pointages(nouveaux)
+        for evenement, resultat in zip(nouveaux, resultats):
+            resultat["sequence"] = evenement['sequence']
+
+        if vus:
+            terminal.dernier_sequence = max(vus)
+        terminal.derniere_synchro = timezone.now()
+        terminal.save(update_fields=['dernier_sequence', 'derniere_synchro', 'updated_at'])
+
+    return terminal, len(evenements) - len(nouveaux), resultats
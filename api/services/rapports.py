@@ -0,0 +1,15 @@
+# api/services/rapports.py
+"""Génération du contenu des rapports à partir des cumuls de présence."""
+from api.services.cumuls import resumer_periode
+
+
+def generer_contenu(employe_id, date_debut, date_fin):
+    """Texte du rapport : jours présents, absences et heures travaillées sur la période."""
+    resume = resumer_periode(employe_id, date_debut, date_fin)
+    heures, minutes = divmod(resume['minutes_travaillees'], 60)
+    return (
+        f"Période du {date_debut:%d/%m/%Y} au {date_fin:%d/%m/%Y}\n"
+        f"Jours présents : {resume['jours_presents']}\n"
+        f"Absences : {resume['absences']}\n"
+        f"Temps travaillé : {heures}h {minutes:02d}min"
+    )
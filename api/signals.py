@@ -0,0 +1,19 @@
+# api/signals.py
+"""Pierres tombales (Suppression) des présences, employés et rapports supprimés."""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from api.models import Employe, Presence, Rapport, Suppression
+
+
+@receiver(post_delete, sender=Presence, dispatch_uid="suppression_presence")
+@receiver(post_delete, sender=Rapport, dispatch_uid="suppression_rapport")
+def enregistrer_suppression(sender, instance, **kwargs):
+    Suppression.objects.create(
+        modele=sender._meta.model_name, objet_id=instance.pk, employe_id=instance.employe_id
+    )
+
+
+@receiver(post_delete, sender=Employe, dispatch_uid="suppression_employe")
+def enregistrer_suppression_employe(sender, instance, **kwargs):
+    Suppression.objects.create(modele='employe', objet_id=instance.pk, employe_id=instance.pk)
@@ -1,3 +1,1247 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import warnings
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Employe, Presence, PresenceArchive, PresenceJournaliere, PresenceMensuelle, Rapport
+from api.models.presence import calculer_duree_secondes
+from api.serializers import PresenceSerializer, PresenceListSerializer
+from core.broadcast import MemoryBackend, publier
+from core.pagination import KeysetPagination
+from core.idempotency import CacheIdempotencyStore, MemoryIdempotencyStore, get_idempotency_store
+from api.services import pointage
+from api.services.pointage import CANAL_PRESENCES, PointageError
+from api.services.cumuls import actualiser_cumuls, reconstruire_cumuls, resumer_periode
+from api.services.absences import generer_absences
+from api.services.cloture import cloturer_journee
+from api.services.archive import archiver_presences, horizon
+from api.analytics.occupation import charger_intervalles, occupation
+from api.analytics.ponctualite import distributions
+import numpy as np
+
+User = get_user_model()
+
+
+class PointageTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_arrivee_puis_sortie(self):
+        response = self.client.post("/api/ma-presence/arrivee/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["presence"]["statut"], "arrive")
+
+        response = self.client.post("/api/ma-presence/sortie/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["presence"]["statut"], "parti")
+
+    def test_double_arrivee_refusee(self):
+        self.client.post("/api/ma-presence/arrivee/")
+        response = self.client.post("/api/ma-presence/arrivee/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Presence.objects.count(), 1)
+
+    def test_arrivee_sur_presence_absente_existante(self):
+        presence = Presence.objects.create(employe=self.employe)
+        response = self.client.post("/api/ma-presence/arrivee/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["presence"]["id"], presence.id)
+
+    def test_sortie_sans_presence(self):
+        response = self.client.post("/api/ma-presence/sortie/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_sortie_sans_arrivee(self):
+        Presence.objects.create(employe=self.employe)
+        with self.assertRaisesMessage(PointageError, "Vous devez d'abord enregistrer votre arrivée."):
+            pointage.enregistrer_sortie(user_id=self.staff.id)
+
+    def test_sortie_sur_presence_absente_avec_arrivee(self):
+        Presence.objects.create(employe=self.employe, heure_arrivee=time(8), statut="absent")
+        with self.assertRaisesMessage(PointageError, "Cette présence est marquée absente"):
+            pointage.enregistrer_sortie(user_id=self.staff.id)
+
+    def test_admin_pointe_par_identifiant(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True)
+        presence = Presence.objects.create(employe=self.employe)
+        self.client.force_authenticate(admin)
+
+        response = self.client.post(f"/api/presences/{presence.id}/arrivee/")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f"/api/presences/{presence.id}/arrivee/")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/presences/999999/arrivee/")
+        self.assertEqual(response.status_code, 404)
+
+
+class PointageLotTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True)
+        self.employes = [
+            Employe.objects.create(
+                user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"),
+                nom=f"Employe {i}", poste="Atelier", badge=f"B{i}",
+            )
+            for i in range(3)
+        ]
+        self.jour = timezone.localdate() - timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def horodatage(self, heure, minute=0):
+        return timezone.make_aware(datetime.combine(self.jour, time(heure, minute))).isoformat()
+
+    def test_lot_arrivees_et_sorties(self):
+        e0, e1, e2 = self.employes
+        evenements = [
+            {"badge": "B0", "horodatage": self.horodatage(17), "sens": "sortie"},
+            {"employe": e0.id, "horodatage": self.horodatage(8), "sens": "arrivee"},
+            {"badge": "B1", "horodatage": self.horodatage(8, 5), "sens": "arrivee"},
+            {"badge": "B1", "horodatage": self.horodatage(8, 6), "sens": "arrivee"},
+            {"employe": e2.id, "horodatage": self.horodatage(9), "sens": "sortie"},
+            {"badge": "INCONNU", "horodatage": self.horodatage(9), "sens": "arrivee"},
+        ]
+
+        # employés, savepoint, verrou, insert conditionnel, 5 requêtes de cumuls, release
+        with self.assertNumQueries(10):
+            response = self.client.post("/api/presences/pointages/", {"evenements": evenements}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        succes = [r["success"] for r in response.data["resultats"]]
+        self.assertEqual(succes, [True, True, True, False, False, False])
+        self.assertEqual(response.data["appliques"], 3)
+
+        presence = Presence.objects.get(employe=e0)
+        self.assertEqual((presence.heure_arrivee, presence.heure_sortie, presence.statut), (time(8), time(17), "parti"))
+        self.assertEqual(Presence.objects.get(employe=e1).heure_arrivee, time(8, 5))
+        self.assertFalse(Presence.objects.filter(employe=e2).exists())
+
+    def test_lot_sur_presence_existante(self):
+        e0 = self.employes[0]
+        presence = Presence.objects.create(employe=e0, date=self.jour, heure_arrivee=time(7, 55), statut="arrive")
+        response = self.client.post("/api/presences/pointages/", {"evenements": [
+            {"employe": e0.id, "horodatage": self.horodatage(8), "sens": "arrivee"},
+            {"employe": e0.id, "horodatage": self.horodatage(16), "sens": "sortie"},
+        ]}, format="json")
+
+        self.assertEqual([r["success"] for r in response.data["resultats"]], [False, True])
+        self.assertEqual(response.data["resultats"][1]["presence"], presence.id)
+        presence.refresh_from_db()
+        self.assertEqual((presence.heure_arrivee, presence.heure_sortie), (time(7, 55), time(16)))
+
+    def test_lot_sortie_sur_presence_absente(self):
+        e0 = self.employes[0]
+        Presence.objects.create(employe=e0, date=self.jour, heure_arrivee=time(8), statut="absent")
+        response = self.client.post("/api/presences/pointages/", {"evenements": [
+            {"employe": e0.id, "horodatage": self.horodatage(16), "sens": "sortie"},
+        ]}, format="json")
+        self.assertFalse(response.data["resultats"][0]["success"])
+        self.assertIn("marquée absente", response.data["resultats"][0]["message"])
+
+    def test_lot_reserve_aux_gestionnaires(self):
+        self.client.force_authenticate(self.employes[0].user)
+        response = self.client.post("/api/presences/pointages/", {"evenements": [
+            {"badge": "B0", "horodatage": self.horodatage(8), "sens": "arrivee"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class TerminalSyncTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True)
+        self.employes = [
+            Employe.objects.create(
+                user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"),
+                nom=f"Employe {i}", poste="Atelier", badge=f"B{i}",
+            )
+            for i in range(50)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def journal(self, debut=1):
+        evenements = []
+        sequence = debut
+        for jours in (2, 1):
+            jour = timezone.localdate() - timedelta(days=jours)
+            for i in range(len(self.employes)):
+                for heure, sens in ((8, "arrivee"), (17, "sortie")):
+                    evenements.append({
+                        "sequence": sequence,
+                        "badge": f"B{i}",
+                        "horodatage": timezone.make_aware(datetime.combine(jour, time(heure, i % 60))).isoformat(),
+                        "sens": sens,
+                    })
+                    sequence += 1
+        # Le journal arrive dans le désordre : le serveur le rejoue par horodatage.
+        return list(reversed(evenements))
+
+    def test_synchro_puis_rejeu(self):
+        evenements = self.journal()
+        response = self.client.post("/api/terminaux/T1/synchro/", {"evenements": evenements}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["high_water_mark"], 200)
+        self.assertEqual(response.data["appliques"], 200)
+        self.assertEqual(response.data["rejets"], [])
+        self.assertEqual(Presence.objects.filter(statut="parti").count(), 100)
+
+        # Le terminal n'a pas reçu l'acquittement et renvoie tout son journal.
+        with self.assertNumQueries(4):  # savepoint, verrou terminal, mise à jour terminal, release
+            response = self.client.post("/api/terminaux/T1/synchro/", {"evenements": evenements}, format="json")
+        self.assertEqual(response.data["doublons"], 200)
+        self.assertEqual(response.data["appliques"], 0)
+        self.assertEqual(response.data["high_water_mark"], 200)
+
+    def test_synchro_partielle(self):
+        evenements = self.journal()
+        anciens = [e for e in evenements if e["sequence"] <= 100]
+        self.client.post("/api/terminaux/T1/synchro/", {"evenements": anciens}, format="json")
+
+        response = self.client.post("/api/terminaux/T1/synchro/", {"evenements": evenements}, format="json")
+        self.assertEqual(response.data["doublons"], 100)
+        self.assertEqual(response.data["appliques"], 100)
+        self.assertEqual(Presence.objects.count(), 100)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True)
+        employes = [
+            Employe.objects.create(user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"), nom=f"Employe {i}", poste="Atelier")
+            for i in range(3)
+        ]
+        # Plusieurs présences par date : l'ordre se départage sur created_at puis id.
+        for jour in range(4):
+            for employe in employes:
+                Presence.objects.create(employe=employe, date=date(2025, 3, 1) + timedelta(days=jour))
+        self.attendu = list(Presence.objects.order_by('-date', '-created_at', 'id').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_parcours_avant_et_arriere(self):
+        pages = []
+        url = "/api/presences/?page_size=5"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([p["id"] for p in response.data["results"]])
+            url = response.data["next"]
+        self.assertEqual([pk for page in pages for pk in page], self.attendu)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+
+        retour = self.client.get(response.data["previous"])
+        self.assertEqual([p["id"] for p in retour.data["results"]], pages[1])
+
+    def test_taille_de_page_plafonnee(self):
+        with mock.patch.object(KeysetPagination, "max_page_size", 5):
+            response = self.client.get("/api/presences/?page_size=100000")
+        self.assertEqual([p["id"] for p in response.data["results"]], self.attendu[:5])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_curseur_invalide(self):
+        response = self.client.get("/api/presences/?cursor=pas-un-curseur")
+        self.assertEqual(response.status_code, 404)
+
+
+class PresenceListSerializerTest(TestCase):
+    def setUp(self):
+        employe = Employe.objects.create(user=User.objects.create(username="e", email="e@example.com"), nom="Employé", poste="Atelier")
+        autre = Employe.objects.create(user=User.objects.create(username="f", email="f@example.com"), nom="Autre", poste="Atelier")
+        Presence.objects.create(employe=employe, date=date(2025, 3, 1))
+        Presence.objects.create(employe=employe, date=date(2025, 3, 2), heure_arrivee=time(8, 1, 2, 345), statut="arrive", note="Retard")
+        Presence.objects.create(employe=employe, date=date(2025, 3, 3), heure_arrivee=time(8, 30), heure_sortie=time(17, 45, 59, 999999), statut="parti")
+        Presence.objects.create(employe=autre, date=date(2025, 3, 3), heure_arrivee=time(22), heure_sortie=time(6, 15), statut="parti")
+
+    def test_meme_json_que_presence_serializer(self):
+        qs = Presence.objects.select_related('employe__user')
+        attendu = json.dumps(PresenceSerializer(qs, many=True).data)
+        obtenu = json.dumps(PresenceListSerializer(PresenceListSerializer.projeter(qs)).data)
+        self.assertEqual(obtenu, attendu)
+
+    def test_liste_en_une_requete(self):
+        admin = User.objects.create_user(username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        with self.assertNumQueries(2):  # validateur ETag, puis la page en une requête
+            response = self.client.get("/api/presences/")
+        self.assertEqual(len(response.data["results"]), 4)
+
+
+class PresenceFiltreTest(TestCase):
+    def setUp(self):
+        self.rh = User.objects.create_user(username="rh", email="rh@example.com", password="password", role="rh")
+        self.accueil = Employe.objects.create(user=User.objects.create(username="a", email="a@example.com"), nom="A", poste="Accueil")
+        self.atelier = Employe.objects.create(user=User.objects.create(username="b", email="b@example.com"), nom="B", poste="Atelier")
+        for jour in range(1, 11):
+            for employe in (self.accueil, self.atelier):
+                Presence.objects.create(
+                    employe=employe, date=date(2025, 3, jour),
+                    statut="absent" if jour % 5 == 0 else "parti",
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(self.rh)
+
+    def ids(self, **params):
+        response = self.client.get("/api/presences/", {"page_size": 200, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["results"]
+
+    def test_filtres_combines(self):
+        semaine = {"date_after": "2025-03-03", "date_before": "2025-03-09"}
+        self.assertEqual(len(self.ids(**semaine)), 14)
+        lignes = self.ids(poste="Atelier", **semaine)
+        self.assertEqual({l["employe"] for l in lignes}, {self.atelier.id})
+        self.assertEqual(len(lignes), 7)
+        self.assertEqual(len(self.ids(statut="absent", employe=self.accueil.id)), 2)
+
+    def test_validation_des_bornes(self):
+        for params in (
+            {"date_after": "hier"},
+            {"statut": "en_vacances"},
+            {"date_after": "2025-03-09", "date_before": "2025-03-01"},
+            {"date_after": "2020-01-01", "date_before": "2025-01-01"},
+            {"date_after": "2020-01-01"},
+            {"date_before": "2025-03-09"},
+        ):
+            self.assertEqual(self.client.get("/api/presences/", params).status_code, 400, params)
+        recent = (timezone.localdate() - timedelta(days=30)).isoformat()
+        self.assertEqual(self.client.get("/api/presences/", {"date_after": recent}).status_code, 200)
+
+    def test_export_reutilise_les_filtres(self):
+        response = self.client.get("/api/presences/export/", {"type": "ndjson", "poste": "Accueil", "statut": "absent"})
+        lignes = [json.loads(l) for l in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([l["date"] for l in lignes], ["2025-03-10", "2025-03-05"])
+        # Pas de plafond sur l'export
+        response = self.client.get("/api/presences/export/", {"type": "ndjson", "date_after": "2020-01-01"})
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 20)
+
+
+@override_settings(PRESENCE_HORIZON_MOIS=2)
+class ArchivagePresencesTest(TestCase):
+    def setUp(self):
+        self.rh = User.objects.create_user(username="rh", email="rh@example.com", password="password", role="rh")
+        self.employe = Employe.objects.create(user=User.objects.create(username="a", email="a@example.com"), nom="A", poste="Accueil")
+        self.limite = horizon()
+        self.anciennes = [
+            Presence.objects.create(
+                employe=self.employe, date=self.limite - timedelta(days=j),
+                heure_arrivee=time(8), heure_sortie=time(12), statut="parti",
+            )
+            for j in range(1, 6)
+        ]
+        self.recente = Presence.objects.create(employe=self.employe, date=self.limite, statut="absent")
+        self.client = APIClient()
+        self.client.force_authenticate(self.rh)
+
+    def liste(self, **params):
+        response = self.client.get("/api/presences/", {"page_size": 200, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data["results"]
+
+    def test_deplacement_par_lots(self):
+        self.assertEqual(archiver_presences(batch_size=2), 5)
+        self.assertEqual(list(Presence.objects.values_list("id", flat=True)), [self.recente.id])
+        archive = PresenceArchive.objects.get(id=self.anciennes[0].id)
+        self.assertEqual((archive.date, archive.duree_secondes), (self.anciennes[0].date, 4 * 3600))
+        # Jamais au-delà de l'horizon, et idempotent
+        self.assertEqual(archiver_presences(avant=self.limite + timedelta(days=30)), 0)
+
+    def test_lectures_historiques_transparentes(self):
+        archiver_presences()
+        debut = (self.limite - timedelta(days=10)).isoformat()
+        lignes = self.liste(date_after=debut)
+        self.assertEqual(len(lignes), 6)
+        self.assertEqual(lignes[-1]["id"], self.anciennes[-1].id)
+        self.assertEqual(lignes[-1]["duree_travail"], "4h 0min")
+        # Période récente : table chaude seule
+        self.assertEqual([l["id"] for l in self.liste(date_after=self.limite.isoformat())], [self.recente.id])
+        with CaptureQueriesContext(connection) as requetes:
+            self.liste(date_after=self.limite.isoformat())
+        self.assertFalse([q for q in requetes if "api_presence_historique" in q["sql"]])
+
+    def test_lectures_sans_borne_basse_et_detail(self):
+        archiver_presences()
+        self.assertEqual(len(self.liste()), 6)
+        self.assertEqual(len(self.liste(employe=self.employe.id)), 6)
+        ancienne = self.anciennes[0]
+        response = self.client.get(f"/api/presences/{ancienne.id}/")
+        self.assertEqual((response.status_code, response.data["date"]), (200, ancienne.date.isoformat()))
+        # Lecture seule : les écritures ne visent que la table chaude
+        response = self.client.patch(f"/api/presences/{ancienne.id}/", {"note": "x"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_pointage_d_un_jour_archive_refuse(self):
+        archiver_presences()
+        moment = timezone.make_aware(datetime.combine(self.anciennes[0].date, time(9)))
+        resultat, = pointage.appliquer_pointages([{"employe": self.employe.id, "horodatage": moment, "sens": "arrivee"}])
+        self.assertEqual((resultat["success"], resultat["message"]), (False, "Ce jour est archivé : pointage refusé."))
+        self.assertEqual(list(Presence.objects.values_list("id", flat=True)), [self.recente.id])
+
+    def test_reconstruction_des_cumuls_archives(self):
+        actualiser_cumuls([(self.employe.id, p.date) for p in [*self.anciennes, self.recente]])
+
+        def photo():
+            return (
+                list(PresenceJournaliere.objects.order_by("date").values_list("date", "minutes_travaillees")),
+                list(PresenceMensuelle.objects.order_by("mois").values_list("mois", "jours_presents", "minutes_travaillees")),
+            )
+
+        avant = photo()
+        archiver_presences()
+        reconstruire_cumuls()
+        self.assertEqual(photo(), avant)
+        self.assertEqual(len(avant[0]), 6)
+
+
+class OccupationTest(TestCase):
+    def setUp(self):
+        self.rh = User.objects.create_user(username="rh", email="rh@example.com", password="password", role="rh")
+        self.employes = [
+            Employe.objects.create(user=User.objects.create(username=f"o{i}", email=f"o{i}@example.com"), nom=f"O{i}", poste=poste)
+            for i, poste in enumerate(["Accueil", "Accueil", "Atelier"])
+        ]
+        self.lundi = date(2025, 3, 3)
+        horaires = [(time(8), time(12)), (time(8, 10), time(8, 20)), (time(22), time(1))]
+        for employe, (arrivee, sortie) in zip(self.employes, horaires):
+            Presence.objects.create(employe=employe, date=self.lundi, heure_arrivee=arrivee, heure_sortie=sortie, statut="parti")
+        Presence.objects.create(employe=self.employes[0], date=self.lundi + timedelta(days=1), heure_arrivee=time(9), heure_sortie=time(10), statut="parti")
+        Presence.objects.create(employe=self.employes[1], date=self.lundi + timedelta(days=1), statut="absent")
+        self.client = APIClient()
+        self.client.force_authenticate(self.rh)
+
+    def test_comptage_vectorise(self):
+        # [08:00, 08:30[ et [08:20, 08:35[ sur un jour, créneaux de 15 minutes
+        matrice = occupation(np.array([480, 500]), np.array([1800, 900]), nb_jours=1)
+        self.assertEqual(matrice.shape, (1, 96))
+        self.assertEqual(matrice[0, 31:36].tolist(), [0, 1, 2, 1, 0])
+
+    def test_minutes_tronquees(self):
+        jour = self.lundi + timedelta(days=2)
+        Presence.objects.create(employe=self.employes[2], date=jour, heure_arrivee=time(8, 14, 59, 600000), heure_sortie=time(9), statut="parti")
+        arrivees, durees = charger_intervalles(jour, jour)
+        self.assertEqual((arrivees.tolist(), durees.tolist()), ([494], [2700]))
+        self.assertEqual(charger_intervalles(jour + timedelta(days=1), jour + timedelta(days=1))[0].shape, (0,))
+
+    def test_courbes_par_jour_et_par_semaine(self):
+        params = {"debut": "2025-03-03", "fin": "2025-03-04"}
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/presences/occupation/", params)
+        self.assertEqual(response.status_code, 200, response.data)
+        lundi, mardi = response.data["courbes"]
+        self.assertEqual((lundi["pic"], lundi["heure_pic"]), (2, "08:00"))
+        self.assertEqual(lundi["occupation"][32:35], [2, 2, 1])
+        self.assertEqual(lundi["occupation"][95], 1)
+        # Sortie après minuit : déborde sur le mardi
+        self.assertEqual(mardi["occupation"][:5], [1, 1, 1, 1, 0])
+        self.assertEqual(mardi["occupation"][36:40], [1, 1, 1, 1])
+
+        semaine = self.client.get("/api/presences/occupation/", {**params, "granularite": "semaine", "pas": 60}).data
+        self.assertEqual(len(semaine["courbes"]), 1)
+        self.assertEqual(semaine["courbes"][0]["periode"], "2025-03-03")
+        self.assertEqual(semaine["courbes"][0]["occupation"][:10], [1, 0, 0, 0, 0, 0, 0, 0, 2, 1])
+
+        atelier = self.client.get("/api/presences/occupation/", {**params, "poste": "Atelier"}).data
+        self.assertEqual([c["pic"] for c in atelier["courbes"]], [1, 1])
+
+    def test_acces_et_parametres(self):
+        self.assertEqual(self.client.get("/api/presences/occupation/", {"pas": 7}).status_code, 400)
+        self.assertEqual(self.client.get("/api/presences/occupation/", {"granularite": "mois"}).status_code, 400)
+        self.client.force_authenticate(self.employes[0].user)
+        self.assertEqual(self.client.get("/api/presences/occupation/").status_code, 403)
+
+
+class PonctualiteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rh = User.objects.create_user(username="rh", email="rh@example.com", password="password", role="rh")
+        self.a = Employe.objects.create(user=User.objects.create(username="a", email="a@example.com"), nom="A", poste="Accueil")
+        self.b = Employe.objects.create(user=User.objects.create(username="b", email="b@example.com"), nom="B", poste="Accueil")
+        self.c = Employe.objects.create(user=User.objects.create(username="c", email="c@example.com"), nom="C", poste="Atelier")
+        arrivees = {
+            self.a: [time(8, 50), time(9), time(9, 4), time(9, 20)],
+            self.b: [time(9, 45), time(10, 30)],
+            self.c: [time(8, 30)],
+        }
+        for employe, heures in arrivees.items():
+            for j, heure in enumerate(heures):
+                Presence.objects.create(employe=employe, date=date(2025, 3, 3 + j), heure_arrivee=heure, statut="arrive")
+        Presence.objects.create(employe=self.c, date=date(2025, 3, 4), statut="absent")
+        self.params = {"debut": "2025-03-01", "fin": "2025-03-31"}
+        self.client = APIClient()
+        self.client.force_authenticate(self.rh)
+
+    def test_percentiles_identiques_a_numpy(self):
+        rng = np.random.default_rng(0)
+        groupes = rng.integers(0, 7, 5000)
+        secondes = rng.integers(7 * 3600, 11 * 3600, 5000)
+        stats = distributions(groupes, secondes, 8, 9 * 3600)
+        for g in range(7):
+            valeurs = secondes[groupes == g]
+            self.assertAlmostEqual(stats["mediane"][g], np.percentile(valeurs, 50))
+            self.assertAlmostEqual(stats["p90"][g], np.percentile(valeurs, 90))
+            self.assertEqual(stats["retards"][g], (valeurs > 9 * 3600).sum())
+            self.assertEqual(stats["histogramme"][g].sum(), len(valeurs))
+        self.assertEqual(stats["jours"][7], 0)
+
+    @override_settings(PONCTUALITE_HEURE_DEBUT="09:00", PONCTUALITE_TOLERANCE_MINUTES=0)
+    def test_par_employe_et_par_poste(self):
+        with self.assertNumQueries(2):
+            data = self.client.get("/api/presences/ponctualite/", self.params).data
+        a, b, c = data["groupes"]
+        self.assertEqual((a["employe"], a["jours"], a["jours_en_retard"]), (self.a.id, 4, 2))
+        self.assertEqual((a["arrivee_mediane"], a["arrivee_p90"]), ("09:02", "09:15"))
+        self.assertEqual(a["retard_moyen_minutes"], 12.0)
+        self.assertEqual(a["histogramme"], [2, 1, 0, 1, 0, 0])
+        self.assertEqual(b["histogramme"], [0, 0, 0, 0, 1, 1])
+        self.assertEqual(c["taux_retard"], 0.0)
+        self.assertEqual(data["ensemble"]["jours"], 7)
+
+        postes = self.client.get("/api/presences/ponctualite/", {**self.params, "par": "poste"}).data["groupes"]
+        self.assertEqual([(p["poste"], p["jours"], p["jours_en_retard"]) for p in postes], [("Accueil", 6, 4), ("Atelier", 1, 0)])
+
+        # Résultat en cache pour ce périmètre et cette fenêtre
+        with self.assertNumQueries(0):
+            self.client.get("/api/presences/ponctualite/", self.params)
+
+    @override_settings(PONCTUALITE_HEURE_DEBUT="09:00", PONCTUALITE_TOLERANCE_MINUTES=5)
+    def test_tolerance_dans_l_histogramme(self):
+        a = self.client.get("/api/presences/ponctualite/", self.params).data["groupes"][0]
+        self.assertEqual(a["jours_en_retard"], 1)
+        self.assertEqual(a["histogramme"], [3, 0, 0, 1, 0, 0])
+
+    def test_perimetre_comme_la_liste(self):
+        self.client.force_authenticate(self.b.user)
+        data = self.client.get("/api/presences/ponctualite/", self.params).data
+        self.assertEqual([g["employe"] for g in data["groupes"]], [self.b.id])
+        self.assertEqual(self.client.get("/api/presences/ponctualite/", {"par": "equipe"}).status_code, 400)
+
+
+class PresenceExportTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        autre = Employe.objects.create(user=User.objects.create(username="autre", email="autre@example.com"), nom="Autre", poste="Atelier")
+        Presence.objects.create(employe=employe, date=date(2025, 3, 1), heure_arrivee=time(8), heure_sortie=time(16, 30), statut="parti")
+        Presence.objects.create(employe=employe, date=date(2025, 3, 2))
+        Presence.objects.create(employe=autre, date=date(2025, 3, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def contenu(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_csv_restreint_a_ses_presences(self):
+        response = self.client.get("/api/presences/export/")
+        self.assertEqual(response.status_code, 200)
+        lignes = self.contenu(response).splitlines()
+        self.assertEqual(lignes[0].split(",")[:3], ["id", "employe", "employe_nom"])
+        self.assertEqual(len(lignes), 3)
+        self.assertIn("8h 30min", lignes[2])
+
+    def test_export_ndjson_par_periode(self):
+        response = self.client.get("/api/presences/export/?type=ndjson&date_after=2025-03-02")
+        lignes = [json.loads(ligne) for ligne in self.contenu(response).splitlines()]
+        self.assertEqual([ligne["date"] for ligne in lignes], ["2025-03-02"])
+
+    def test_export_parametres_invalides(self):
+        self.assertEqual(self.client.get("/api/presences/export/?type=xml").status_code, 400)
+        self.assertEqual(self.client.get("/api/presences/export/?date_after=hier").status_code, 400)
+
+    def test_export_en_flux_sous_asgi(self):
+        jeton = jwt.encode(
+            {"id": self.staff.id, "type": "access", "exp": datetime.utcnow() + timedelta(minutes=5)},
+            settings.SECRET_KEY, algorithm="HS256",
+        )
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/api/presences/export/", "raw_path": b"/api/presences/export/", "query_string": b"type=csv",
+            "root_path": "", "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+            "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {jeton}".encode())],
+        }
+        envoyes = []
+
+        async def scenario():
+            corps_lu = asyncio.Event()
+
+            async def recevoir():
+                if corps_lu.is_set():
+                    await asyncio.Event().wait()  # pas de déconnexion du client
+                corps_lu.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def envoyer(message):
+                envoyes.append(message)
+
+            await ASGIHandler()(scope, recevoir, envoyer)
+
+        # Comme le client de test : la connexion de la transaction du test reste ouverte
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with warnings.catch_warnings(record=True) as alertes:
+                warnings.simplefilter("always")
+                async_to_sync(scenario)()
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+        # Itérateur asynchrone : jamais lu d'un bloc par sync_to_async(list)
+        self.assertFalse([a for a in alertes if "synchronous iterators" in str(a.message)])
+        self.assertEqual(envoyes[0]["status"], 200)
+        morceaux = [m["body"] for m in envoyes[1:] if m.get("body")]
+        self.assertEqual(len(morceaux), 3)
+        self.assertTrue(morceaux[0].startswith(b"id,employe,employe_nom"))
+        self.assertIn(b"8h 30min", morceaux[2])
+
+
+class IdempotenceTest(TestCase):
+    def setUp(self):
+        get_idempotency_store().clear()
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_rejeu_sans_toucher_la_base(self):
+        premiere = self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1")
+        self.assertEqual(premiere.status_code, 200)
+
+        with self.assertNumQueries(0):
+            rejeu = self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1")
+        self.assertEqual(rejeu.status_code, 200)
+        self.assertEqual(rejeu["Idempotent-Replayed"], "true")
+        self.assertEqual(rejeu.content, premiere.content)
+
+    def test_nouvelle_cle_rejoue_le_traitement(self):
+        self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1")
+        response = self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-2")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejeu_pendant_le_traitement(self):
+        # Le rejeu (Wi-Fi instable) arrive pendant que l'original s'exécute encore
+        rejeux = []
+        original = pointage.enregistrer_arrivee
+
+        def arrivee_lente(**kwargs):
+            rejeux.append(self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1"))
+            return original(**kwargs)
+
+        with mock.patch("api.services.pointage.enregistrer_arrivee", side_effect=arrivee_lente) as traitement:
+            premiere = self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1")
+        self.assertEqual(traitement.call_count, 1)
+        self.assertEqual((rejeux[0].status_code, rejeux[0]["Retry-After"]), (409, "1"))
+        self.assertEqual(premiere.status_code, 200)
+
+        # La réponse de l'original est mémorisée, pas écrasée par le rejeu
+        rejeu = self.client.post("/api/ma-presence/arrivee/", HTTP_IDEMPOTENCY_KEY="cle-1")
+        self.assertEqual((rejeu.status_code, rejeu.content), (200, premiere.content))
+
+    def test_premiere_reponse_conservee(self):
+        for store in (MemoryIdempotencyStore(ttl=60), CacheIdempotencyStore(ttl=60, prefix="test-idem")):
+            self.assertTrue(store.reserve("a"))
+            self.assertFalse(store.reserve("a"))
+            store.set("a", 1)
+            store.set("a", 2)
+            self.assertEqual(store.get("a"), 1)
+            self.assertTrue(store.reserve("b"))
+            store.release("b")
+            self.assertIsNone(store.get("b"))
+
+    def test_store_memoire_ttl_et_taille(self):
+        store = MemoryIdempotencyStore(ttl=60, max_entries=2)
+        store.set("a", 1)
+        store.set("b", 2)
+        store.set("c", 3)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual((store.get("b"), store.get("c")), (2, 3))
+
+        expire = MemoryIdempotencyStore(ttl=0)
+        expire.set("a", 1)
+        self.assertIsNone(expire.get("a"))
+
+    def test_store_cache_vide_seulement_ses_cles(self):
+        store = CacheIdempotencyStore(ttl=60)
+        store.set("a", 1)
+        cache.set("autre", 2)
+        store.clear()
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(cache.get("autre"), 2)
+        store.set("a", 3)
+        self.assertEqual(store.get("a"), 3)
+
+
+class CumulsTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True
+        )
+        self.employe = Employe.objects.create(user=self.admin, nom="Admin User", poste="Direction")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _presence(self, jour, arrivee=time(8, 0), sortie=time(16, 30), statut="parti"):
+        presence = Presence.objects.create(
+            employe=self.employe, date=jour, heure_arrivee=arrivee, heure_sortie=sortie, statut=statut
+        )
+        actualiser_cumuls([(self.employe.id, jour)])
+        return presence
+
+    def _mensuel(self, mois):
+        return PresenceMensuelle.objects.values("jours_presents", "absences", "minutes_travaillees").get(
+            employe=self.employe, mois=mois
+        )
+
+    def test_cumuls_suivent_pointages_modifications_et_suppressions(self):
+        pointage.enregistrer_arrivee(user_id=self.admin.id)
+        pointage.enregistrer_sortie(user_id=self.admin.id)
+        today = timezone.localdate()
+        self.assertEqual(PresenceJournaliere.objects.get(employe=self.employe, date=today).statut, "parti")
+        self.assertEqual(self._mensuel(today.replace(day=1))["jours_presents"], 1)
+
+        presence = self._presence(date(2024, 3, 4))
+        self.assertEqual(self._mensuel(date(2024, 3, 1))["minutes_travaillees"], 510)
+
+        response = self.client.patch(f"/api/presences/{presence.id}/", {"date": "2024-04-02"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PresenceMensuelle.objects.filter(employe=self.employe, mois=date(2024, 3, 1)).exists())
+        self.assertEqual(self._mensuel(date(2024, 4, 1))["minutes_travaillees"], 510)
+
+        self.client.delete(f"/api/presences/{presence.id}/")
+        self.assertFalse(PresenceJournaliere.objects.filter(employe=self.employe, date=date(2024, 4, 2)).exists())
+        self.assertFalse(PresenceMensuelle.objects.filter(employe=self.employe, mois=date(2024, 4, 1)).exists())
+
+    def test_reconstruction_identique_au_calcul_incremental(self):
+        for jour in range(1, 20):
+            self._presence(date(2024, 1, 25) + timedelta(days=jour))
+        self._presence(date(2024, 2, 20), arrivee=None, sortie=None, statut="absent")
+
+        def photo():
+            return (
+                list(PresenceJournaliere.objects.order_by("date").values_list("date", "statut", "minutes_travaillees")),
+                list(PresenceMensuelle.objects.order_by("mois").values_list("mois", "jours_presents", "absences", "minutes_travaillees")),
+            )
+
+        incremental = photo()
+        self.assertEqual(reconstruire_cumuls(), (20, 2))
+        self.assertEqual(photo(), incremental)
+
+    def test_resume_periode_mois_complets_et_bords(self):
+        for jour in (date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29), date(2024, 3, 1), date(2024, 3, 2)):
+            self._presence(jour)
+        self._presence(date(2024, 2, 15), arrivee=None, sortie=None, statut="absent")
+
+        with self.assertNumQueries(2):
+            resume = resumer_periode(self.employe.id, date(2024, 1, 31), date(2024, 3, 1))
+        self.assertEqual(resume, {"jours_presents": 4, "absences": 1, "minutes_travaillees": 4 * 510})
+        self.assertEqual(
+            resumer_periode(self.employe.id, date(2024, 2, 2), date(2024, 2, 29)),
+            {"jours_presents": 1, "absences": 1, "minutes_travaillees": 510},
+        )
+
+    def test_rapport_genere_depuis_les_cumuls(self):
+        self._presence(date(2024, 5, 6))
+        response = self.client.post("/api/rapports/", {
+            "employe": self.employe.id, "type": "mensuel",
+            "date_debut": "2024-05-01", "date_fin": "2024-05-31",
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("Jours présents : 1", response.data["contenu"])
+        self.assertIn("8h 30min", response.data["contenu"])
+
+
+class DureeTravailTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="password", role="admin", is_superuser=True
+        )
+        self.employe = Employe.objects.create(user=self.admin, nom="Admin User", poste="Direction", badge="B0")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_duree_stockee_a_la_sortie(self):
+        arrivee = timezone.make_aware(datetime(2025, 3, 10, 8, 0, 0, 500000))
+        pointage.enregistrer_arrivee(user_id=self.admin.id, moment=arrivee)
+        presence, _ = pointage.enregistrer_sortie(user_id=self.admin.id, moment=arrivee + timedelta(hours=8, minutes=15))
+        self.assertEqual(presence.duree_secondes, 8 * 3600 + 15 * 60)
+        self.assertEqual(presence.duree_secondes, calculer_duree_secondes(presence.heure_arrivee, presence.heure_sortie))
+
+    def test_duree_recalculee_a_la_modification(self):
+        presence = Presence.objects.create(employe=self.employe, date=date(2025, 3, 10), heure_arrivee=time(9), statut="arrive")
+        self.assertIsNone(presence.duree_secondes)
+
+        response = self.client.patch(f"/api/presences/{presence.id}/", {"heure_sortie": "12:30:00"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["duree_travail"], "3h 30min")
+        presence.refresh_from_db()
+        self.assertEqual(presence.duree_secondes, 3 * 3600 + 30 * 60)
+
+    def test_duree_par_lot_et_somme_sql(self):
+        hier = timezone.localdate() - timedelta(days=1)
+        jour = timezone.make_aware(datetime.combine(hier, time(8)))
+        pointage.appliquer_pointages([
+            {"badge": "B0", "horodatage": jour, "sens": "arrivee"},
+            {"badge": "B0", "horodatage": jour + timedelta(hours=7), "sens": "sortie"},
+        ])
+        Presence.objects.create(employe=self.employe, date=timezone.localdate(), heure_arrivee=time(8), heure_sortie=time(9), statut="parti")
+        total = Presence.objects.filter(employe=self.employe).aggregate(total=Sum("duree_secondes"))["total"]
+        self.assertEqual(total, 8 * 3600)
+
+
+class PresenceStatsTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        self.today = timezone.localdate()
+        Presence.objects.create(employe=self.employe, date=self.today, heure_arrivee=time(8), heure_sortie=time(12), statut="parti")
+        Presence.objects.create(employe=self.employe, date=date(2024, 1, 10), heure_arrivee=time(8), heure_sortie=time(10), statut="parti")
+        Presence.objects.create(employe=self.employe, date=date(2024, 1, 11), statut="absent")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_stats_en_une_requete(self):
+        with self.assertNumQueries(1):  # l'agrégat unique des stats, validateur ETag compris
+            response = self.client.get("/api/ma-presence/stats/")
+        self.assertEqual(response.status_code, 200)
+        stats = response.data["stats"]
+        self.assertEqual(stats["statut_actuel"], "parti")
+        self.assertEqual(stats["heures_travaillees_aujourd_hui"], "4h 0min")
+        self.assertEqual((stats["jours_travailles_semaine"], stats["total_jours_semaine"]), (1, 1))
+        self.assertEqual(stats["secondes_travaillees_semaine"], 4 * 3600)
+        self.assertEqual(stats["periode"]["type"], "semaine")
+
+    def test_periode_personnalisee(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/ma-presence/stats/?periode=personnalise&debut=2024-01-01&fin=2024-01-31")
+        periode = response.data["stats"]["periode"]
+        self.assertEqual((periode["jours_travailles"], periode["total_jours"]), (1, 2))
+        self.assertEqual(periode["secondes_travaillees"], 2 * 3600)
+        self.assertEqual(periode["moyenne_secondes"], 2 * 3600)
+
+    def test_periode_invalide(self):
+        self.assertEqual(self.client.get("/api/ma-presence/stats/?periode=siecle").status_code, 400)
+        response = self.client.get("/api/ma-presence/stats/?periode=personnalise&debut=2024-02-01&fin=2024-01-01")
+        self.assertEqual(response.status_code, 400)
+
+    def test_sans_employe(self):
+        self.client.force_authenticate(User.objects.create(username="seul", email="seul@example.com"))
+        self.assertEqual(self.client.get("/api/ma-presence/stats/").status_code, 400)
+
+
+class GenererAbsencesTest(TestCase):
+    def test_absences_des_employes_actifs_sans_doublon(self):
+        jour = date(2025, 3, 10)
+        employes = [
+            Employe.objects.create(user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"), nom=f"E{i}", poste="Atelier")
+            for i in range(5)
+        ]
+        inactif = employes[4].user
+        inactif.is_active = False
+        inactif.save()
+        Presence.objects.create(employe=employes[0], date=jour, heure_arrivee=time(8), statut="arrive")
+
+        self.assertEqual(generer_absences(jour, batch_size=2), 3)
+        self.assertEqual(generer_absences(jour, batch_size=2), 0)
+
+        absents = set(Presence.objects.filter(date=jour, statut="absent").values_list("employe_id", flat=True))
+        self.assertEqual(absents, {e.id for e in employes[1:4]})
+        self.assertEqual(Presence.objects.get(employe=employes[0], date=jour).statut, "arrive")
+        self.assertEqual(PresenceJournaliere.objects.filter(date=jour, statut="absent").count(), 3)
+
+
+class CloturePresencesTest(TestCase):
+    def setUp(self):
+        self.jour = date(2025, 3, 10)
+        self.employes = [
+            Employe.objects.create(user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"), nom=f"E{i}", poste="Atelier")
+            for i in range(3)
+        ]
+        self.ouverte = Presence.objects.create(employe=self.employes[0], date=self.jour, heure_arrivee=time(9), statut="arrive")
+        self.tardive = Presence.objects.create(employe=self.employes[1], date=self.jour, heure_arrivee=time(19), statut="arrive")
+        self.fermee = Presence.objects.create(
+            employe=self.employes[2], date=self.jour, heure_arrivee=time(8), heure_sortie=time(16), statut="parti"
+        )
+        actualiser_cumuls([(e.id, self.jour) for e in self.employes])
+
+    def test_heure_par_defaut(self):
+        with self.assertNumQueries(8):  # savepoint, UPDATE ... RETURNING, 5 requêtes de cumuls, release
+            self.assertEqual(cloturer_journee(self.jour, politique="heure_defaut", heure=time(18)), 2)
+
+        self.ouverte.refresh_from_db()
+        self.assertEqual((self.ouverte.heure_sortie, self.ouverte.statut), (time(18), "parti"))
+        self.assertEqual(self.ouverte.duree_secondes, 9 * 3600)
+        self.assertTrue(self.ouverte.a_verifier)
+        self.tardive.refresh_from_db()
+        self.assertEqual((self.tardive.heure_sortie, self.tardive.duree_secondes), (time(19), 0))
+        self.fermee.refresh_from_db()
+        self.assertFalse(self.fermee.a_verifier)
+        self.assertEqual(
+            PresenceJournaliere.objects.get(employe=self.employes[0], date=self.jour).minutes_travaillees, 9 * 60
+        )
+        self.assertEqual(cloturer_journee(self.jour, politique="heure_defaut"), 0)
+
+    def test_revue_sans_heure_de_sortie(self):
+        self.assertEqual(cloturer_journee(self.jour, politique="revue"), 2)
+        self.ouverte.refresh_from_db()
+        self.assertEqual((self.ouverte.heure_sortie, self.ouverte.statut, self.ouverte.a_verifier), (None, "parti", True))
+        self.assertEqual(PresenceJournaliere.objects.get(employe=self.employes[0], date=self.jour).statut, "parti")
+        # Journée close : plus de sortie badgée, ni en direct ni en lot
+        self.assertFalse(PresenceSerializer(self.ouverte).data["peut_partir"])
+        with self.assertRaises(PointageError):
+            pointage.enregistrer_sortie(presence_id=self.ouverte.id)
+        resultat, = pointage.appliquer_pointages([
+            {"employe": self.employes[0].id, "horodatage": timezone.make_aware(datetime(2025, 3, 10, 20)), "sens": "sortie"},
+        ])
+        self.assertFalse(resultat["success"])
+
+    def test_politique_inconnue(self):
+        with self.assertRaises(ValueError):
+            cloturer_journee(self.jour, politique="oubli")
+
+
+class PresenceSurSiteTest(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username="manager", email="manager@example.com", password="password", role="manager")
+        today = timezone.localdate()
+        for i, (poste, arrivee, sortie) in enumerate([
+            ("Accueil", time(8), None), ("Accueil", time(7, 30), None),
+            ("Atelier", time(9), None), ("Atelier", time(8), time(12)),
+        ]):
+            employe = Employe.objects.create(user=User.objects.create(username=f"e{i}", email=f"e{i}@example.com"), nom=f"E{i}", poste=poste)
+            Presence.objects.create(
+                employe=employe, date=today, heure_arrivee=arrivee, heure_sortie=sortie,
+                statut="parti" if sortie else "arrive",
+            )
+            # Présence oubliée d'un autre jour : hors du tableau du jour
+            Presence.objects.create(employe=employe, date=today - timedelta(days=3), heure_arrivee=time(8), statut="arrive")
+        self.client = APIClient()
+
+    def test_presents_et_comptes_par_poste(self):
+        self.client.force_authenticate(self.manager)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/presences/sur-site/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(response.data["par_poste"], {"Accueil": 2, "Atelier": 1})
+        self.assertEqual([p["heure_arrivee"] for p in response.data["presents"]], ["07:30:00", "08:00:00", "09:00:00"])
+
+    def test_reserve_aux_gestionnaires(self):
+        self.client.force_authenticate(User.objects.create(username="staff", email="staff@example.com", role="staff"))
+        self.assertEqual(self.client.get("/api/presences/sur-site/").status_code, 403)
+
+
+class DiffusionTest(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username="manager", email="manager@example.com", password="password", role="manager")
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+
+    def jeton(self, user):
+        return jwt.encode(
+            {"id": user.id, "type": "access", "exp": datetime.utcnow() + timedelta(minutes=5)},
+            settings.SECRET_KEY, algorithm="HS256",
+        )
+
+    def test_diffusion_vers_plusieurs_abonnes_depuis_un_thread(self):
+        backend = MemoryBackend(max_messages=2)
+
+        async def scenario():
+            abonnes = [backend.subscribe("canal") for _ in range(3)]
+            emetteur = threading.Thread(target=lambda: [backend.publish("canal", i) for i in range(3)])
+            emetteur.start()
+            emetteur.join()
+            recus = [[await a.recevoir(timeout=1), await a.recevoir(timeout=1)] for a in abonnes]
+            for abonnement in abonnes:
+                backend.unsubscribe(abonnement)
+            return recus
+
+        # File bornée à 2 : le plus ancien message est sacrifié
+        self.assertEqual(asyncio.run(scenario()), [[1, 2]] * 3)
+        self.assertEqual(backend.nb_abonnes("canal"), 0)
+
+    def test_pointage_publie_apres_commit(self):
+        with mock.patch("api.services.pointage.publier") as publier_mock:
+            with self.captureOnCommitCallbacks(execute=True):
+                pointage.enregistrer_arrivee(user_id=self.staff.id)
+                publier_mock.assert_not_called()
+        canal, message = publier_mock.call_args.args
+        self.assertEqual((canal, message["event"]), (CANAL_PRESENCES, "arrivee"))
+        self.assertEqual(json.loads(message["data"])["statut"], "arrive")
+
+    async def test_flux_sse(self):
+        response = await self.async_client.get(
+            "/api/presences/flux/", headers={"authorization": f"Bearer {self.jeton(self.manager)}"}
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        flux = aiter(response.streaming_content)
+        self.assertEqual(await anext(flux), b"retry: 5000\n\n")
+
+        publier(CANAL_PRESENCES, {"event": "sortie", "data": '{"presence": 1}'})
+        self.assertEqual(await anext(flux), b'event: sortie\ndata: {"presence": 1}\n\n')
+        await flux.aclose()
+
+    async def test_flux_reserve_aux_gestionnaires(self):
+        response = await self.async_client.get("/api/presences/flux/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            "/api/presences/flux/", headers={"authorization": f"Bearer {self.jeton(self.staff)}"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_flux_refuse_sous_wsgi(self):
+        response = self.client.get("/api/presences/flux/", headers={"authorization": f"Bearer {self.jeton(self.manager)}"})
+        self.assertEqual(response.status_code, 501)
+
+
+class GetConditionnelTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        self.presence = Presence.objects.create(employe=self.employe, date=timezone.localdate())
+        autre = Employe.objects.create(user=User.objects.create(username="autre", email="autre@example.com"), nom="Autre", poste="Atelier")
+        self.autre = Presence.objects.create(employe=autre, date=timezone.localdate())
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_304_sans_serialisation(self):
+        for url in ("/api/presences/", "/api/ma-presence/", "/api/ma-presence/stats/"):
+            premiere = self.client.get(url)
+            self.assertEqual(premiere.status_code, 200)
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=premiere["ETag"])
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b"")
+
+    def test_etag_change_avec_les_donnees_du_perimetre(self):
+        etag = self.client.get("/api/presences/")["ETag"]
+
+        # Hors du périmètre de l'utilisateur : toujours 304
+        self.autre.note = "modifiée"
+        self.autre.save()
+        self.assertEqual(self.client.get("/api/presences/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.presence.note = "modifiée"
+        self.presence.save()
+        response = self.client.get("/api/presences/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_change_avec_l_employe_et_l_utilisateur(self):
+        for url in ("/api/presences/", "/api/ma-presence/"):
+            etag = self.client.get(url)["ETag"]
+            self.employe.nom = f"Renommé {url}"
+            self.employe.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertContains(response, f"Renommé {url}")
+
+            etag = response["ETag"]
+            self.staff.username = f"staff-{len(url)}"
+            self.staff.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_etag_des_stats_suit_les_cumuls(self):
+        etag = self.client.get("/api/ma-presence/stats/")["ETag"]
+        self.assertEqual(self.client.get("/api/ma-presence/stats/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.assertEqual(self.client.post("/api/ma-presence/arrivee/").status_code, 200)
+        response = self.client.get("/api/ma-presence/stats/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(SYNC_MARGE_SECONDES=0)
+class SynchroDifferentielleTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+        self.presences = [Presence.objects.create(employe=self.employe, date=date(2025, 3, d)) for d in (1, 2, 3)]
+        self.rapport = Rapport.objects.create(
+            employe=self.employe, type="mensuel", date_debut=date(2025, 3, 1), date_fin=date(2025, 3, 31), contenu="-"
+        )
+        autre = Employe.objects.create(user=User.objects.create(username="autre", email="autre@example.com"), nom="Autre", poste="Atelier")
+        self.autre = Presence.objects.create(employe=autre, date=date(2025, 3, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_synchro_complete_puis_delta(self):
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/sync/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({p["id"] for p in response.data["presences"]["upserts"]}, {p.id for p in self.presences})
+        self.assertEqual([e["id"] for e in response.data["employes"]["upserts"]], [self.employe.id])
+        self.assertEqual([r["id"] for r in response.data["rapports"]["upserts"]], [self.rapport.id])
+        cursor = response.data["cursor"]
+
+        response = self.client.get("/api/sync/", {"cursor": cursor})
+        self.assertEqual(response.data["presences"]["upserts"], [])
+
+        self.presences[1].note = "modifiée"
+        self.presences[1].save()
+        supprimee, rapport_id = self.presences[2].id, self.rapport.id
+        self.autre.delete()
+        self.presences[2].delete()
+        self.rapport.delete()
+
+        response = self.client.get("/api/sync/", {"cursor": cursor})
+        self.assertEqual([p["id"] for p in response.data["presences"]["upserts"]], [self.presences[1].id])
+        self.assertEqual(response.data["presences"]["suppressions"], [supprimee])
+        self.assertEqual(response.data["rapports"]["suppressions"], [rapport_id])
+        self.assertFalse(response.data["encore"])
+
+    def test_pages_avec_limite(self):
+        vus, cursor, encore = [], None, True
+        while encore:
+            response = self.client.get("/api/sync/", {"cursor": cursor, "limit": 2} if cursor else {"limit": 2})
+            vus += [p["id"] for p in response.data["presences"]["upserts"]]
+            cursor, encore = response.data["cursor"], response.data["encore"]
+        self.assertEqual(sorted(vus), sorted(p.id for p in self.presences))
+
+    def test_curseur_invalide(self):
+        self.assertEqual(self.client.get("/api/sync/", {"cursor": "pas-un-curseur"}).status_code, 400)
+
+
+@override_settings(SYNC_MARGE_SECONDES=0)
+class PerimetreParRoleTest(TestCase):
+    """Lignes visibles par rôle sur les listes et la synchro (règles ABAC)."""
+
+    def setUp(self):
+        self.users = {}
+        for nom, role in (("admin", "admin"), ("manager", "manager"), ("rh", "rh"), ("staff", "staff"), ("sans", "staff")):
+            self.users[nom] = User.objects.create_user(username=nom, email=f"{nom}@example.com", password="password", role=role)
+        self.users["root"] = User.objects.create_superuser(username="root", email="root@example.com", password="password")
+        self.employes, self.presences, self.rapports = {}, {}, {}
+        for nom in ("admin", "manager", "rh", "staff", "root"):
+            employe = Employe.objects.create(user=self.users[nom], nom=nom.title(), poste="Accueil")
+            self.employes[nom] = employe.id
+            self.presences[nom] = Presence.objects.create(employe=employe, date=timezone.localdate()).id
+            self.rapports[nom] = Rapport.objects.create(
+                employe=employe, type="mensuel", date_debut=date(2025, 3, 1), date_fin=date(2025, 3, 31), contenu="-"
+            ).id
+        self.client = APIClient()
+
+    def ids(self, url, nom):
+        self.client.force_authenticate(self.users[nom])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, (url, nom))
+        return {ligne["id"] for ligne in response.data.get("results", response.data)}
+
+    def attendus(self, lignes, noms):
+        return {lignes[nom] for nom in noms}
+
+    def test_listes(self):
+        tous = ("admin", "manager", "rh", "staff", "root")
+        attendus = {
+            # Le périmètre ABAC passe avant les droits propres à la vue : sans
+            # can_view_all_employees, l'admin ne garde que sa fiche
+            "/api/employes/": {"admin": ("admin",), "root": tous, "manager": ("manager",), "rh": ("rh",), "staff": ("staff",), "sans": ()},
+            "/api/rapports/": {"admin": tous, "root": tous, "manager": ("manager",), "rh": ("rh",), "staff": ("staff",), "sans": ()},
+            "/api/presences/": {"admin": tous, "root": tous, "manager": tous, "rh": tous, "staff": ("staff",), "sans": ()},
+        }
+        lignes = {"/api/employes/": self.employes, "/api/rapports/": self.rapports, "/api/presences/": self.presences}
+        for url, par_role in attendus.items():
+            for nom, noms in par_role.items():
+                self.assertEqual(self.ids(url, nom), self.attendus(lignes[url], noms), (url, nom))
+
+    def test_synchro(self):
+        tous = ("admin", "manager", "rh", "staff", "root")
+        for nom, noms in {"admin": tous, "root": tous, "manager": ("manager",), "staff": ("staff",), "sans": ()}.items():
+            self.client.force_authenticate(self.users[nom])
+            data = self.client.get("/api/sync/").data
+            self.assertEqual({p["id"] for p in data["presences"]["upserts"]}, self.attendus(self.presences, noms), nom)
+            self.assertEqual({e["id"] for e in data["employes"]["upserts"]}, self.attendus(self.employes, noms), nom)
+            self.assertEqual({r["id"] for r in data["rapports"]["upserts"]}, self.attendus(self.rapports, noms), nom)
+
+
+class PointageConcurrenceTest(TransactionTestCase):
+    """Plusieurs badgeages simultanés du même employé : une seule arrivée gagne."""
+
+    nb_threads = 16
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", email="staff@example.com", password="password", role="staff")
+        self.employe = Employe.objects.create(user=self.staff, nom="Staff User", poste="Accueil")
+
+    def _marteler(self, fonction):
+        barriere = threading.Barrier(self.nb_threads)
+        resultats = []
+
+        def badger():
+            try:
+                barriere.wait()
+                fonction(user_id=self.staff.id)
+                resultats.append("ok")
+            except PointageError:
+                resultats.append("refus")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=badger) for _ in range(self.nb_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return resultats
+
+    def test_arrivees_concurrentes(self):
+        resultats = self._marteler(pointage.enregistrer_arrivee)
+
+        self.assertEqual(resultats.count("ok"), 1)
+        self.assertEqual(resultats.count("refus"), self.nb_threads - 1)
+        self.assertEqual(Presence.objects.filter(employe=self.employe).count(), 1)
+
+    def test_sorties_concurrentes(self):
+        pointage.enregistrer_arrivee(user_id=self.staff.id)
+        resultats = self._marteler(pointage.enregistrer_sortie)
+
+        self.assertEqual(resultats.count("ok"), 1)
+        self.assertEqual(resultats.count("refus"), self.nb_threads - 1)
+        presence = Presence.objects.get(employe=self.employe)
+        self.assertEqual(presence.statut, "parti")
+
+    def test_lots_concurrents(self):
+        def badger_en_lot(user_id):
+            resultat, = pointage.appliquer_pointages([
+                {"employe": self.employe.id, "horodatage": timezone.now(), "sens": "arrivee"},
+            ])
+            if not resultat["success"]:
+                raise PointageError(resultat["message"])
+
+        resultats = self._marteler(badger_en_lot)
+
+        self.assertEqual(resultats.count("ok"), 1)
+        self.assertEqual(resultats.count("refus"), self.nb_threads - 1)
+        self.assertEqual(Presence.objects.filter(employe=self.employe).count(), 1)
+
+    def test_cumuls_mensuels_concurrents(self):
+        jours = iter(range(1, self.nb_threads + 1))
+
+        def creer(user_id):
+            jour = date(2024, 3, next(jours))
+            with transaction.atomic():
+                Presence.objects.create(employe=self.employe, date=jour, statut="absent")
+                actualiser_cumuls([(self.employe.id, jour)])
+
+        self.assertEqual(self._marteler(creer), ["ok"] * self.nb_threads)
+        mensuel = PresenceMensuelle.objects.get(employe=self.employe, mois=date(2024, 3, 1))
+        self.assertEqual(mensuel.absences, self.nb_threads)
@@ -8,9 +8,16 @@ from .views.presence import (
     PresenceDetailAPIView, 
     PresenceArriveeAPIView, 
     PresenceSortieAPIView,
+    PresencePointageLotAPIView,
+    PresenceSurSiteAPIView,
     MaPresenceAPIView,
     PresenceStatsAPIView 
 )
+from .views.terminal import TerminalSyncAPIView
+from .views.export import PresenceExportAPIView
+from .views.flux import PresenceFluxView
+from .views.sync import SynchroAPIView
+from .views.analytique import OccupationAPIView, PonctualiteAPIView
 
 urlpatterns = [
     # Employe
@@ -26,6 +33,12 @@ urlpatterns = [
     path("presences/<int:pk>/", PresenceDetailAPIView.as_view(), name="presence-detail"),
     path("presences/<int:pk>/arrivee/", PresenceArriveeAPIView.as_view(), name="presence-arrivee"),
     path("presences/<int:pk>/sortie/", PresenceSortieAPIView.as_view(), name="presence-sortie"),
+    path("presences/pointages/", PresencePointageLotAPIView.as_view(), name="presence-pointages"),
+    path("presences/export/", PresenceExportAPIView.as_view(), name="presence-export"),
+    path("presences/sur-site/", PresenceSurSiteAPIView.as_view(), name="presence-sur-site"),
+    path("presences/flux/", PresenceFluxView.as_view(), name="presence-flux"),
+    path("presences/occupation/", OccupationAPIView.as_view(), name="presence-occupation"),
+    path("presences/ponctualite/", PonctualiteAPIView.as_view(), name="presence-ponctualite"),
     
     path("ma-presence/", MaPresenceAPIView.as_view(), name="ma-presence"),
     path("ma-presence/arrivee/", PresenceArriveeAPIView.as_view(), name="mon-arrivee"),
@@ -33,4 +46,10 @@ urlpatterns = [
     
  
     path("ma-presence/stats/", PresenceStatsAPIView.as_view(), name="mes-stats-presence"),
+
+    # Terminaux de badgeage
+    path("terminaux/<str:identifiant>/synchro/", TerminalSyncAPIView.as_view(), name="terminal-synchro"),
+
+    # Synchronisation différentielle (application mobile)
+    path("sync/", SynchroAPIView.as_view(), name="sync"),
 ]
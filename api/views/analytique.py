@@ -0,0 +1,124 @@
+# views/analytique.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.analytics.occupation import PAS_MINUTES, courbes_occupation
+from api.analytics.ponctualite import REGROUPEMENTS, analyser_ponctualite, ponctualite_en_cache
+from api.services.archive import modele_presences
+from api.views.presence import PresenceScopeMixin
+from users.authentication import JWTAuthentication
+
+
+def lire_periode(request, jours_defaut):
+    """(debut, fin) depuis les paramètres debut/fin ; ValueError si invalide."""
+    today = timezone.localdate()
+    params = request.query_params
+    try:
+        debut = parse_date(params["debut"]) if "debut" in params else today - timedelta(days=jours_defaut - 1)
+        fin = parse_date(params["fin"]) if "fin" in params else today
+    except ValueError:
+        debut = fin = None
+    if debut is None or fin is None:
+        raise ValueError("debut et fin doivent être au format AAAA-MM-JJ.")
+    if fin < debut:
+        raise ValueError("La date de fin doit être après la date de début.")
+    if (fin - debut).days > settings.PRESENCE_FILTRE_MAX_JOURS:
+        raise ValueError(f"La période ne peut pas dépasser {settings.PRESENCE_FILTRE_MAX_JOURS} jours.")
+    return debut, fin
+
+
+class OccupationAPIView(APIView):
+    """
+    Nombre de personnes sur site par créneau, pour dimensionner cantine et parking.
+
+    Paramètres : debut, fin (AAAA-MM-JJ, 7 derniers jours par défaut),
+    granularite=jour|semaine (semaine : maximum de chaque créneau sur la
+    semaine), pas=5|10|15|30|60 minutes (15 par défaut), poste.
+
+    Chaque courbe est un tableau de 24 * 60 / pas entiers, le premier
+    créneau commençant à 00:00. Calcul dans api.analytics.occupation.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    granularites = ("jour", "semaine")
+    pas_autorises = (5, 10, 15, 30, 60)
+
+    def get(self, request):
+        user = request.user
+        if not (user.is_admin or user.is_manager or user.is_rh):
+            raise PermissionDenied("Réservé aux administrateurs, managers et RH.")
+
+        granularite = request.query_params.get("granularite", "jour")
+        try:
+            debut, fin = lire_periode(request, 7)
+            if granularite not in self.granularites:
+                raise ValueError("Granularité inconnue : jour ou semaine.")
+            pas = int(request.query_params.get("pas", PAS_MINUTES))
+            if pas not in self.pas_autorises:
+                raise ValueError("pas doit valoir 5, 10, 15, 30 ou 60 minutes.")
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "success": True,
+            "debut": debut.isoformat(),
+            "fin": fin.isoformat(),
+            "granularite": granularite,
+            "pas_minutes": pas,
+            "courbes": courbes_occupation(
+                debut, fin, granularite, pas, poste=request.query_params.get("poste") or None
+            ),
+        })
+
+
+class PonctualiteAPIView(PresenceScopeMixin, APIView):
+    """
+    Distribution des heures d'arrivée par employé ou par poste : médiane, p90,
+    jours en retard et histogramme des retards, par rapport à
+    settings.PONCTUALITE_HEURE_DEBUT.
+
+    Paramètres : debut, fin (AAAA-MM-JJ, 30 derniers jours par défaut),
+    par=employe|poste. Même périmètre que la liste des présences : admin,
+    manager et RH voient tout le monde, les autres leurs propres arrivées.
+    Calcul dans api.analytics.ponctualite, mis en cache par périmètre et fenêtre.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_modele(self):
+        return modele_presences(self.debut)
+
+    def get_perimetre(self):
+        user = self.request.user
+        if user.is_admin or user.is_manager or user.is_rh:
+            return "tout"
+        return f"user:{user.pk}"
+
+    def get(self, request):
+        par = request.query_params.get("par", "employe")
+        try:
+            self.debut, fin = lire_periode(request, 30)
+            if par not in REGROUPEMENTS:
+                raise ValueError("Regroupement inconnu : employe ou poste.")
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        resultat = ponctualite_en_cache(
+            self.get_perimetre(), self.debut, fin, par,
+            lambda: analyser_ponctualite(self.get_queryset().filter(date__range=(self.debut, fin)), par),
+        )
+        return Response({
+            "success": True,
+            "debut": self.debut.isoformat(),
+            "fin": fin.isoformat(),
+            "par": par,
+            **resultat,
+        })
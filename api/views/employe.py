@@ -21,6 +21,7 @@ class EmployeListCreateAPIView(PermissionMixin, generics.ListCreateAPIView):
     serializer_class = EmployeSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    ordering = ['-created_at', 'id']  # clé de pagination (index employe_keyset_idx)
 
     def get_queryset(self):
         user = self.request.user
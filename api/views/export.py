@@ -0,0 +1,106 @@
+# views/export.py
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+
+from api.filters import PresenceExportFilter
+from api.serializers.presence import formater_duree_travail
+from api.views.presence import PresenceScopeMixin
+from users.authentication import JWTAuthentication
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer écrit une ligne, on la renvoie telle quelle."""
+
+    def write(self, value):
+        return value
+
+
+class PresenceExportAPIView(PresenceScopeMixin, generics.GenericAPIView):
+    """
+    Export en flux des présences (jointes à l'employé), en CSV ou NDJSON.
+    Paramètres : type=csv|ndjson, plus les filtres de la liste, sans plafond
+    sur la période (api.filters.PresenceExportFilter).
+
+    Les lignes sont lues par un curseur serveur et écrites au fil de l'eau :
+    la mémoire reste constante quel que soit le volume exporté. Sous ASGI
+    (core/asgi.py, requis par le flux SSE), le contenu est un itérateur
+    asynchrone qui lit le curseur par lots : Django lirait sinon l'itérateur
+    synchrone d'un bloc, via sync_to_async(list), avant d'envoyer le premier
+    octet. Sous WSGI, il reste un itérateur synchrone sur iterator().
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PresenceExportFilter
+    chunk_size = 2000
+
+    colonnes = [
+        "id", "employe", "employe_nom", "employe_username", "employe_poste", "date",
+        "heure_arrivee", "heure_sortie", "statut", "duree_travail", "duree_secondes", "note",
+    ]
+    champs = [
+        "id", "employe_id", "employe__nom", "employe__user__username", "employe__poste", "date",
+        "heure_arrivee", "heure_sortie", "statut", "duree_secondes", "note",
+    ]
+
+    def get_export_queryset(self):
+        return self.filter_queryset(self.get_queryset()).values_list(*self.champs)
+
+    @staticmethod
+    def ligne(pk, employe, nom, username, poste, jour, arrivee, sortie, statut, secondes, note):
+        return [
+            pk, employe, nom, username, poste,
+            jour.isoformat(),
+            arrivee.isoformat() if arrivee else None,
+            sortie.isoformat() if sortie else None,
+            statut, formater_duree_travail(arrivee, sortie, secondes), secondes, note,
+        ]
+
+    def formateurs(self, type_export):
+        """(en-tête ou None, fonction ligne -> texte) du format demandé."""
+        if type_export == "csv":
+            writer = csv.writer(_Echo())
+            return writer.writerow(self.colonnes), writer.writerow
+        colonnes = self.colonnes
+        return None, lambda ligne: json.dumps(dict(zip(colonnes, ligne)), ensure_ascii=False) + "\n"
+
+    def stream(self, queryset, type_export):
+        entete, formater = self.formateurs(type_export)
+        if entete is not None:
+            yield entete
+        for row in queryset.iterator(chunk_size=self.chunk_size):
+            yield formater(self.ligne(*row))
+
+    async def astream(self, queryset, type_export):
+        # Le générateur synchrone avance par lots de chunk_size lignes dans le
+        # thread de la base (QuerySet.aiterator exécute la requête d'une
+        # projection values_list dans la boucle d'événements).
+        lignes = self.stream(queryset, type_export)
+        lot = sync_to_async(lambda: list(islice(lignes, self.chunk_size)))
+        while morceaux := await lot():
+            for morceau in morceaux:
+                yield morceau
+
+    def get(self, request):
+        type_export = request.query_params.get("type", "csv")
+        if type_export not in ("csv", "ndjson"):
+            raise ValidationError("Type d'export inconnu : 'csv' ou 'ndjson'.")
+
+        queryset = self.get_export_queryset()
+        flux = self.astream if isinstance(request._request, ASGIRequest) else self.stream
+        content_type = "text/csv; charset=utf-8" if type_export == "csv" else "application/x-ndjson"
+        response = StreamingHttpResponse(flux(queryset, type_export), content_type=content_type)
+
+        nom_fichier = f"presences-{timezone.localdate().isoformat()}.{type_export}"
+        response["Content-Disposition"] = f'attachment; filename="{nom_fichier}"'
+        return response
@@ -0,0 +1,58 @@
+# views/flux.py
+"""
+Flux Server-Sent Events des pointages (arrivées / sorties) en temps réel.
+
+Vue asynchrone : servie par le point d'entrée ASGI (core/asgi.py, par ex.
+`uvicorn core.asgi:application`), chaque client connecté n'occupe qu'une
+coroutine. Sous WSGI, Django lirait le générateur en entier avant de
+répondre et bloquerait le worker : la vue répond alors 501. Les événements proviennent de core.broadcast, alimenté par le
+service de pointage : une écriture en base est diffusée à N écrans sans N requêtes.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.services.pointage import CANAL_PRESENCES
+from core.broadcast import abonner
+from users.authentication import JWTAuthentication
+
+
+class PresenceFluxView(View):
+    """Flux text/event-stream réservé aux administrateurs, managers et RH."""
+
+    http_method_names = ["get"]
+    # Commentaire SSE envoyé sans événement pendant ce délai (secondes),
+    # pour garder la connexion ouverte à travers les proxys.
+    heartbeat = 15
+    retry_ms = 5000
+
+    async def evenements(self):
+        async with abonner(CANAL_PRESENCES) as abonnement:
+            yield f"retry: {self.retry_ms}\n\n"
+            while True:
+                message = await abonnement.recevoir(timeout=self.heartbeat)
+                if message is None:
+                    yield ": ping\n\n"
+                else:
+                    yield f"event: {message['event']}\ndata: {message['data']}\n\n"
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({"detail": "Flux disponible uniquement via ASGI (core.asgi)."}, status=501)
+        try:
+            resultat = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+        if resultat is None:
+            return JsonResponse({"detail": "Informations d'authentification non fournies."}, status=401)
+
+        user = resultat[0]
+        if not (user.is_admin or user.is_manager or user.is_rh):
+            return JsonResponse({"detail": "Réservé aux administrateurs, managers et RH."}, status=403)
+
+        response = StreamingHttpResponse(self.evenements(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -1,37 +1,83 @@
 # views/presence.py - Version finale avec support complet pour les staff
+from collections import Counter
+from datetime import timedelta
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.exceptions import PermissionDenied, NotFound, ValidationError
-from django.utils import timezone
 from django.db import transaction
-
-from api.models import Presence, Employe
-from api.serializers import PresenceSerializer
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django_filters.rest_framework import DjangoFilterBackend
+
+from api.filters import PresenceFilter
+from api.models import Presence, Employe, PresenceHistorique, PresenceMensuelle
+from api.serializers import PresenceSerializer, PresenceListSerializer, PointageLotSerializer
+from api.serializers.presence import formater_duree_travail
+from api.services import pointage
+from api.services.pointage import PointageError, PresenceIntrouvable
+from api.services.archive import modele_presences
+from api.services.cumuls import actualiser_cumuls
 from users.authentication import JWTAuthentication
+from core.conditional import ConditionalGetMixin
+from core.permissions import filtrer_abac
+from core.idempotency import IdempotencyMixin
 
 
-# VUES EXISTANTES : Liste et Détail des présences
-class PresenceListCreateAPIView(generics.ListCreateAPIView):
-    """Liste et création de toutes les présences."""
-    queryset = Presence.objects.all()
-    serializer_class = PresenceSerializer
-    authentication_classes = [JWTAuthentication]
-    permission_classes = [IsAuthenticated]
+class PresenceScopeMixin:
+    """
+    Présences visibles par l'utilisateur connecté.
+    Partagé par la liste, le détail et l'export pour garder un seul périmètre.
+
+    Sans filtre date_after, ou avec un date_after antérieur à l'horizon
+    d'archivage, la lecture passe par la vue historique (table chaude +
+    archive) ; sinon seule la table chaude est lue.
+    """
+
+    def get_modele(self):
+        try:
+            date_after = parse_date(self.request.query_params.get('date_after', ''))
+        except ValueError:
+            date_after = None
+        return modele_presences(date_after)
 
     def get_queryset(self):
         user = self.request.user
-        qs = super().get_queryset().select_related('employe__user')
+        qs = self.get_modele().objects.select_related('employe__user')
 
         # Seuls admin, manager, RH voient tout
         if user.is_admin or user.is_manager or user.is_rh:
             return qs
         # Sinon : uniquement sa propre présence
-        try:
-            return qs.filter(employe__user=user)
-        except:
-            return qs.none()
+        return filtrer_abac(qs, user)
+
+
+# VUES EXISTANTES : Liste et Détail des présences
+class PresenceListCreateAPIView(PresenceScopeMixin, ConditionalGetMixin, generics.ListCreateAPIView):
+    """Liste et création de toutes les présences."""
+    queryset = Presence.objects.all()
+    serializer_class = PresenceSerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PresenceFilter
+    # Le rendu inclut employe_nom et employe_username
+    etag_champs = ("updated_at", "employe__updated_at", "employe__user__updated_at")
+
+    def get_etag_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        # Lecture optimisée : projection values() + PresenceListSerializer
+        rows = PresenceListSerializer.projeter(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(PresenceListSerializer(page).data)
+        return Response(PresenceListSerializer(rows).data)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -45,23 +91,24 @@ class PresenceListCreateAPIView(generics.ListCreateAPIView):
             today = timezone.localdate()
             if Presence.objects.filter(employe=employe, date=today).exists():
                 raise ValidationError("Vous avez déjà une présence pour aujourd'hui.")
-            serializer.save(employe=employe)
+            with transaction.atomic():
+                presence = serializer.save(employe=employe)
+                actualiser_cumuls([(presence.employe_id, presence.date)])
         except Employe.DoesNotExist:
             raise ValidationError("Votre compte n'est pas associé à un employé.")
 
 
-class PresenceDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class PresenceDetailAPIView(PresenceScopeMixin, generics.RetrieveUpdateDestroyAPIView):
     """Détail, modification, suppression d'une présence."""
     serializer_class = PresenceSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        user = self.request.user
-        qs = Presence.objects.select_related('employe__user')
-        if user.is_admin or user.is_manager or user.is_rh:
-            return qs
-        return qs.filter(employe__user=user)
+    def get_modele(self):
+        # Les présences archivées se consultent, mais sont en lecture seule
+        if self.request.method in SAFE_METHODS:
+            return PresenceHistorique
+        return Presence
 
     def perform_update(self, serializer):
         user = self.request.user
@@ -70,17 +117,31 @@ class PresenceDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         if not user.has_perm("api.can_manage_presence"):
             if presence.employe.user != user or presence.date != timezone.localdate():
                 raise PermissionDenied("Vous ne pouvez modifier que votre présence du jour.")
-        serializer.save()
+        cle_initiale = (presence.employe_id, presence.date)
+        with transaction.atomic():
+            presence = serializer.save()
+            # L'ancien jour et le nouveau, si la date ou l'employé ont changé
+            actualiser_cumuls({cle_initiale, (presence.employe_id, presence.date)})
 
     def perform_destroy(self, instance):
         user = self.request.user
         if not user.is_admin:
             raise PermissionDenied("Seul l'administrateur peut supprimer une présence.")
-        instance.delete()
+        cle = (instance.employe_id, instance.date)
+        with transaction.atomic():
+            instance.delete()
+            actualiser_cumuls([cle])
 
 
 # POINTAGE POUR LES EMPLOYÉS (STAFF) - CORRIGÉ
-class PresenceArriveeAPIView(APIView):
+def _erreur_pointage(exc, pk):
+    """Traduit une PointageError en réponse HTTP."""
+    if pk is not None and isinstance(exc, PresenceIntrouvable):
+        raise NotFound(str(exc))
+    return Response({"success": False, "message": str(exc)}, status=exc.status_code)
+
+
+class PresenceArriveeAPIView(IdempotencyMixin, APIView):
     """Marquer son arrivée – accessible aux staff sans permission globale."""
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -95,36 +156,18 @@ class PresenceArriveeAPIView(APIView):
                     "success": False,
                     "message": "Accès refusé : réservé aux employés."
                 }, status=status.HTTP_403_FORBIDDEN)
-
-            try:
-                employe = user.employe
-                today = timezone.localdate()
-                presence, created = Presence.objects.get_or_create(
-                    employe=employe,
-                    date=today,
-                    defaults={'statut': 'absent'}
-                )
-            except Employe.DoesNotExist:
-                return Response({
-                    "success": False,
-                    "message": "Votre compte n'est pas lié à un employé."
-                }, status=status.HTTP_400_BAD_REQUEST)
-
+            cible = {"user_id": user.id}
         else:
             # Mode admin : gestion d'autrui
             if not user.has_perm("api.can_manage_presence"):
                 raise PermissionDenied("Permission requise pour gérer les présences.")
-            try:
-                presence = Presence.objects.select_related('employe__user').get(pk=pk)
-            except Presence.DoesNotExist:
-                raise NotFound("Présence introuvable.")
+            cible = {"presence_id": pk}
 
-        # Enregistrer l'arrivée
+        # Enregistrer l'arrivée (une seule requête conditionnelle)
         try:
-            with transaction.atomic():
-                message = presence.enregistrer_arrivee()
-        except ValueError as e:
-            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            presence, message = pointage.enregistrer_arrivee(**cible)
+        except PointageError as e:
+            return _erreur_pointage(e, pk)
 
         serializer = PresenceSerializer(presence, context={"request": request})
         return Response({
@@ -134,7 +177,7 @@ class PresenceArriveeAPIView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class PresenceSortieAPIView(APIView):
+class PresenceSortieAPIView(IdempotencyMixin, APIView):
     """Marquer sa sortie – accessible aux staff."""
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
@@ -149,37 +192,18 @@ class PresenceSortieAPIView(APIView):
                     "success": False,
                     "message": "Accès refusé."
                 }, status=status.HTTP_403_FORBIDDEN)
-
-            try:
-                employe = user.employe
-                today = timezone.localdate()
-                presence = Presence.objects.get(employe=employe, date=today)
-            except Employe.DoesNotExist:
-                return Response({
-                    "success": False,
-                    "message": "Votre compte n'est pas lié à un employé."
-                }, status=status.HTTP_400_BAD_REQUEST)
-            except Presence.DoesNotExist:
-                return Response({
-                    "success": False,
-                    "message": "Aucune présence trouvée. Pointez d'abord votre arrivée."
-                }, status=status.HTTP_404_NOT_FOUND)
-
+            cible = {"user_id": user.id}
         else:
             # Gestion par admin
             if not user.has_perm("api.can_manage_presence"):
                 raise PermissionDenied("Permission requise.")
-            try:
-                presence = Presence.objects.get(pk=pk)
-            except Presence.DoesNotExist:
-                raise NotFound("Présence introuvable.")
+            cible = {"presence_id": pk}
 
-        # Enregistrer la sortie
+        # Enregistrer la sortie (une seule requête conditionnelle)
         try:
-            with transaction.atomic():
-                message = presence.enregistrer_sortie()
-        except ValueError as e:
-            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            presence, message = pointage.enregistrer_sortie(**cible)
+        except PointageError as e:
+            return _erreur_pointage(e, pk)
 
         serializer = PresenceSerializer(presence, context={"request": request})
         return Response({
@@ -189,11 +213,82 @@ class PresenceSortieAPIView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class PresencePointageLotAPIView(IdempotencyMixin, APIView):
+    """Ingestion groupée des badgeages d'un terminal (une transaction par lot)."""
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.has_perm("api.can_manage_presence"):
+            raise PermissionDenied("Permission requise pour gérer les présences.")
+
+        serializer = PointageLotSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        resultats = pointage.appliquer_pointages(serializer.validated_data['evenements'])
+        appliques = sum(1 for r in resultats if r["success"])
+        return Response({
+            "success": True,
+            "appliques": appliques,
+            "rejetes": len(resultats) - appliques,
+            "resultats": resultats
+        }, status=status.HTTP_200_OK)
+
+
+class PresenceSurSiteAPIView(APIView):
+    """
+    Qui est sur site maintenant : présences du jour ouvertes (arrivée sans
+    sortie), avec l'heure d'arrivée et le nombre de présents par poste.
+    Lit uniquement l'index partiel presence_ouverte_idx.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not (user.is_admin or user.is_manager or user.is_rh):
+            raise PermissionDenied("Réservé aux administrateurs, managers et RH.")
+
+        today = timezone.localdate()
+        presents = list(
+            Presence.objects.filter(
+                date=today, statut='arrive', heure_arrivee__isnull=False, heure_sortie__isnull=True
+            )
+            .order_by('heure_arrivee')
+            .values('id', 'employe_id', 'heure_arrivee', employe_nom=F('employe__nom'), poste=F('employe__poste'))
+        )
+
+        par_poste = Counter(p['poste'] for p in presents)
+        return Response({
+            "success": True,
+            "date": today.isoformat(),
+            "total": len(presents),
+            "par_poste": dict(sorted(par_poste.items())),
+            "presents": [
+                {
+                    "presence": p['id'],
+                    "employe": p['employe_id'],
+                    "employe_nom": p['employe_nom'],
+                    "poste": p['poste'],
+                    "heure_arrivee": p['heure_arrivee'].isoformat(),
+                }
+                for p in presents
+            ],
+        })
+
+
 # GESTION DE LA PRÉSENCE PERSONNELLE
-class MaPresenceAPIView(APIView):
+class MaPresenceAPIView(IdempotencyMixin, ConditionalGetMixin, APIView):
     """Créer ou récupérer sa propre présence."""
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    etag_champs = ("updated_at", "employe__updated_at", "employe__user__updated_at")
+
+    def get_etag_queryset(self):
+        return Presence.objects.filter(employe__user_id=self.request.user.id, date=timezone.localdate())
+
+    def get_etag_extra(self):
+        return timezone.localdate()
 
     def get(self, request):
         user = request.user
@@ -236,7 +331,9 @@ class MaPresenceAPIView(APIView):
                     "message": "Présence déjà créée."
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            presence = Presence.objects.create(employe=employe, date=today)
+            with transaction.atomic():
+                presence = Presence.objects.create(employe=employe, date=today)
+                actualiser_cumuls([(presence.employe_id, presence.date)])
             serializer = PresenceSerializer(presence, context={"request": request})
             return Response({
                 "success": True,
@@ -252,42 +349,132 @@ class MaPresenceAPIView(APIView):
 
 
 # STATS OPTIONNELLES
-class PresenceStatsAPIView(APIView):
-    """Statistiques de présence pour l'utilisateur connecté."""
+class PresenceStatsAPIView(ConditionalGetMixin, APIView):
+    """
+    Statistiques de présence pour l'utilisateur connecté, en une seule requête
+    SQL (agrégats conditionnels sur ses présences).
+
+    Paramètres : periode=semaine|mois|annee|personnalise (semaine par défaut),
+    debut et fin (AAAA-MM-JJ) pour une période personnalisée.
+    """
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    periodes = ("semaine", "mois", "annee", "personnalise")
+    # Validateur lu par la requête des stats elle-même (voir get)
+    etag_dans_la_reponse = True
+
+    def get_etag_queryset(self):
+        # Chaque écriture de présence passe par actualiser_cumuls, qui touche la
+        # ligne mensuelle du jour (updated_at) : une ligne par mois au lieu de
+        # tout l'historique des présences.
+        return PresenceMensuelle.objects.filter(employe__user_id=self.request.user.id)
+
+    def get_etag_extra(self):
+        return timezone.localdate()
+
+    def _fenetre(self, request, today):
+        periode = request.query_params.get("periode", "semaine")
+        if periode not in self.periodes:
+            raise ValueError("Période inconnue : semaine, mois, annee ou personnalise.")
+        if periode == "semaine":
+            return periode, today - timedelta(days=today.weekday()), today
+        if periode == "mois":
+            return periode, today.replace(day=1), today
+        if periode == "annee":
+            return periode, today.replace(month=1, day=1), today
 
-    def get(self, request):
-        user = request.user
         try:
-            employe = user.employe
-            today = timezone.localdate()
-            debut_semaine = today - timezone.timedelta(days=today.weekday())
-            presences_semaine = Presence.objects.filter(
-                employe=employe,
-                date__gte=debut_semaine,
-                date__lte=today
-            )
-
-            stats = {
-                "jours_travailles_semaine": presences_semaine.exclude(heure_arrivee=None).count(),
-                "total_jours_semaine": presences_semaine.count(),
-                "heures_travaillees_aujourd_hui": None,
-                "statut_actuel": "absent"
-            }
+            debut = parse_date(request.query_params.get("debut", ""))
+            fin = parse_date(request.query_params.get("fin", ""))
+        except ValueError:
+            debut = fin = None
+        if debut is None or fin is None:
+            raise ValueError("Période personnalisée : debut et fin requis au format AAAA-MM-JJ.")
+        if fin < debut:
+            raise ValueError("La date de fin doit être après la date de début.")
+        return periode, debut, fin
+
+    @staticmethod
+    def _relation(debut):
+        # Une seule relation par requête : deux jointures multiplieraient les lignes
+        if modele_presences(debut) is Presence:
+            return "presences"
+        return "presences_historiques"
+
+    @staticmethod
+    def _agregats(relation, prefixe, debut, fin):
+        dans_periode = Q(**{f"{relation}__date__gte": debut, f"{relation}__date__lte": fin})
+        return {
+            f"{prefixe}_total_jours": Count(relation, filter=dans_periode),
+            f"{prefixe}_jours_travailles": Count(
+                relation, filter=dans_periode & Q(**{f"{relation}__heure_arrivee__isnull": False})
+            ),
+            f"{prefixe}_secondes": Coalesce(Sum(f"{relation}__duree_secondes", filter=dans_periode), 0),
+            f"{prefixe}_moyenne": Avg(f"{relation}__duree_secondes", filter=dans_periode),
+        }
 
-            try:
-                presence_jour = Presence.objects.get(employe=employe, date=today)
-                stats["statut_actuel"] = presence_jour.statut
-                if presence_jour.heure_arrivee and presence_jour.heure_sortie:
-                    stats["heures_travaillees_aujourd_hui"] = presence_jour.get_duree_travail()
-            except Presence.DoesNotExist:
-                pass
-
-            return Response({"success": True, "stats": stats})
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            periode, debut, fin = self._fenetre(request, today)
+        except ValueError as e:
+            return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        except Employe.DoesNotExist:
+        relation = self._relation(debut)
+        aujourd_hui = Q(**{f"{relation}__date": today})
+        mois_en_cours = PresenceMensuelle.objects.filter(employe=OuterRef("pk"), mois=today.replace(day=1))
+        mensuels = PresenceMensuelle.objects.filter(employe=OuterRef("pk")).order_by().values("employe")
+        ligne = (
+            Employe.objects.filter(user_id=request.user.id)
+            .values("id")
+            .annotate(
+                **self._agregats(relation, "semaine", today - timedelta(days=today.weekday()), today),
+                **self._agregats(relation, "periode", debut, fin),
+                statut_jour=Max(f"{relation}__statut", filter=aujourd_hui),
+                arrivee_jour=Max(f"{relation}__heure_arrivee", filter=aujourd_hui),
+                sortie_jour=Max(f"{relation}__heure_sortie", filter=aujourd_hui),
+                secondes_jour=Max(f"{relation}__duree_secondes", filter=aujourd_hui),
+                mois_jours_presents=Subquery(mois_en_cours.values("jours_presents")[:1]),
+                mois_absences=Subquery(mois_en_cours.values("absences")[:1]),
+                mois_minutes=Subquery(mois_en_cours.values("minutes_travaillees")[:1]),
+                etag_dernier=Subquery(mensuels.annotate(dernier=Max("updated_at")).values("dernier")[:1]),
+                etag_nombre=Subquery(mensuels.annotate(nombre=Count("pk")).values("nombre")[:1]),
+            )
+            .first()
+        )
+        if ligne is None:
             return Response({
                 "success": False,
                 "message": "Votre compte n'est pas associé à un employé."
-            }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            }, status=status.HTTP_400_BAD_REQUEST)
+        self.etag_watermark = (ligne["etag_dernier"], ligne["etag_nombre"] or 0)
+
+        heures_aujourd_hui = None
+        if ligne["arrivee_jour"] and ligne["sortie_jour"]:
+            heures_aujourd_hui = formater_duree_travail(
+                ligne["arrivee_jour"], ligne["sortie_jour"], ligne["secondes_jour"]
+            )
+        moyenne = ligne["periode_moyenne"]
+
+        stats = {
+            "jours_travailles_semaine": ligne["semaine_jours_travailles"],
+            "total_jours_semaine": ligne["semaine_total_jours"],
+            "secondes_travaillees_semaine": ligne["semaine_secondes"],
+            "heures_travaillees_aujourd_hui": heures_aujourd_hui,
+            "statut_actuel": ligne["statut_jour"] or "absent",
+            "mois_en_cours": {
+                "jours_presents": ligne["mois_jours_presents"] or 0,
+                "absences": ligne["mois_absences"] or 0,
+                "minutes_travaillees": ligne["mois_minutes"] or 0,
+            },
+            "periode": {
+                "type": periode,
+                "debut": debut.isoformat(),
+                "fin": fin.isoformat(),
+                "jours_travailles": ligne["periode_jours_travailles"],
+                "total_jours": ligne["periode_total_jours"],
+                "secondes_travaillees": ligne["periode_secondes"],
+                "moyenne_secondes": round(moyenne) if moyenne is not None else None,
+            },
+        }
+        return Response({"success": True, "stats": stats})
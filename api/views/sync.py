@@ -0,0 +1,142 @@
+# views/sync.py
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.models import Employe, Presence, Rapport, Suppression
+from api.serializers import EmployeSerializer, PresenceListSerializer, RapportSerializer
+from core.permissions import filtrer_abac
+from users.authentication import JWTAuthentication
+
+
+def _valeur(row, champ):
+    return row[champ] if isinstance(row, dict) else getattr(row, champ)
+
+
+class SynchroAPIView(APIView):
+    """
+    Synchronisation différentielle : présences, employés et rapports créés,
+    modifiés ou supprimés depuis le curseur opaque `cursor` (absent = tout).
+
+    Chaque collection est lue par l'index (updated_at, id) après sa propre
+    position ; les suppressions viennent de la table Suppression. Le périmètre
+    est celui de PermissionMixin (filtrer_abac). Si `encore` vaut true, rappeler
+    immédiatement avec le nouveau curseur.
+
+    Les lignes modifiées dans les SYNC_MARGE_SECONDES dernières secondes sont
+    renvoyées à l'appel suivant : une transaction encore ouverte au moment de
+    la lecture ne peut pas passer sous le curseur.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    limite_defaut = 500
+    limite_max = 2000
+    invalid_cursor_message = "Curseur invalide."
+    positions = ("presence", "employe", "rapport", "suppression")
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return {}
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            curseur = {}
+            for cle, (horodatage, pk) in data.items():
+                if cle not in self.positions:
+                    raise ValueError(cle)
+                moment = parse_datetime(horodatage)
+                if moment is None:
+                    raise ValueError(horodatage)
+                curseur[cle] = (moment, int(pk))
+        except (ValueError, TypeError, AttributeError, binascii.Error, UnicodeError):
+            raise ValidationError({"cursor": self.invalid_cursor_message})
+        return curseur
+
+    def encode_cursor(self, curseur):
+        data = {cle: [moment.isoformat(), pk] for cle, (moment, pk) in curseur.items()}
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode("ascii")
+
+    def get_limite(self, request):
+        try:
+            limite = int(request.query_params.get("limit", self.limite_defaut))
+        except ValueError:
+            return self.limite_defaut
+        return max(1, min(limite, self.limite_max))
+
+    @staticmethod
+    def changements(queryset, champ, position, borne, limite):
+        """Lignes après `position` dans l'ordre (champ, id), jusqu'à `borne` ; limite + 1 pour détecter la suite."""
+        queryset = queryset.filter(**{f"{champ}__lte": borne}).order_by(champ, "id")
+        if position is not None:
+            moment, pk = position
+            queryset = queryset.filter(Q(**{f"{champ}__gt": moment}) | Q(**{champ: moment, "id__gt": pk}))
+        return list(queryset[:limite + 1])
+
+    def suppressions(self, user):
+        qs = Suppression.objects.all()
+        if user.is_superuser or user.is_admin:
+            return qs
+        return qs.filter(employe_id__in=Employe.objects.filter(user=user).values("id"))
+
+    def get(self, request):
+        user = request.user
+        curseur = self.decode_cursor(request.query_params.get("cursor"))
+        limite = self.get_limite(request)
+        borne = timezone.now() - timedelta(seconds=getattr(settings, "SYNC_MARGE_SECONDES", 2))
+
+        sources = {
+            "presence": (
+                "updated_at",
+                PresenceListSerializer.projeter(filtrer_abac(Presence.objects.all(), user)),
+            ),
+            "employe": (
+                "updated_at",
+                filtrer_abac(Employe.objects.select_related("user"), user),
+            ),
+            "rapport": (
+                "updated_at",
+                filtrer_abac(Rapport.objects.select_related("employe"), user),
+            ),
+            "suppression": ("supprime_le", self.suppressions(user)),
+        }
+
+        lignes = {}
+        encore = False
+        for cle, (champ, queryset) in sources.items():
+            rows = self.changements(queryset, champ, curseur.get(cle), borne, limite)
+            if len(rows) > limite:
+                encore = True
+                rows = rows[:limite]
+            if rows:
+                curseur[cle] = (_valeur(rows[-1], champ), _valeur(rows[-1], "id"))
+            lignes[cle] = rows
+
+        supprimes = {modele: [] for modele, _ in Suppression.MODELE_CHOICES}
+        for suppression in lignes["suppression"]:
+            supprimes[suppression.modele].append(suppression.objet_id)
+
+        return Response({
+            "cursor": self.encode_cursor(curseur),
+            "encore": encore,
+            "presences": {
+                "upserts": PresenceListSerializer(lignes["presence"]).data,
+                "suppressions": supprimes["presence"],
+            },
+            "employes": {
+                "upserts": EmployeSerializer(lignes["employe"], many=True).data,
+                "suppressions": supprimes["employe"],
+            },
+            "rapports": {
+                "upserts": RapportSerializer(lignes["rapport"], many=True).data,
+                "suppressions": supprimes["rapport"],
+            },
+        })
@@ -0,0 +1,45 @@
+# views/terminal.py
+from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.serializers import PointageSyncSerializer
+from api.services import pointage
+from core.idempotency import IdempotencyMixin
+from users.authentication import JWTAuthentication
+
+
+class TerminalSyncAPIView(IdempotencyMixin, APIView):
+    """
+    Synchronisation d'un terminal après une coupure réseau.
+    Le terminal envoie son journal numéroté ; la réponse donne la nouvelle
+    séquence acquittée (high_water_mark) et les seuls événements rejetés.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, identifiant):
+        if not request.user.has_perm("api.can_manage_presence"):
+            raise PermissionDenied("Permission requise pour gérer les présences.")
+
+        serializer = PointageSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        terminal, doublons, resultats = pointage.synchroniser_terminal(
+            identifiant, serializer.validated_data['evenements']
+        )
+        rejets = [
+            {"sequence": r["sequence"], "message": r["message"]}
+            for r in resultats if not r["success"]
+        ]
+        return Response({
+            "success": True,
+            "terminal": terminal.identifiant,
+            "high_water_mark": terminal.dernier_sequence,
+            "recus": len(serializer.validated_data['evenements']),
+            "doublons": doublons,
+            "appliques": len(resultats) - len(rejets),
+            "rejets": rejets
+        }, status=status.HTTP_200_OK)
@@ -3,6 +3,14 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The whole project is served through this entry point, e.g.:
+    uvicorn core.asgi:application
+
+The SSE stream (api/views/flux.py) never ends, so it is refused under WSGI
+(core/wsgi.py), where Django would buffer it and block the worker. The
+streaming export (api/views/export.py) switches to an async iterator here,
+so that it keeps streaming.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
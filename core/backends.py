@@ -0,0 +1,27 @@
+# core/backends.py
+from django.contrib.auth.backends import ModelBackend
+
+from core.permissions import permissions_utilisateur
+
+
+class CompiledPermissionBackend(ModelBackend):
+    """
+    ModelBackend dont user.has_perm() lit le frozenset compilé de
+    core.permissions (une requête par utilisateur, puis cache) au lieu de
+    charger permissions directes et de groupe à chaque instance.
+    Mêmes réponses que ModelBackend : permissions "app.codename" uniquement,
+    tout pour un superutilisateur actif, rien pour un compte inactif.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_all_permissions(user_obj, obj)
+        return {perm for perm in permissions_utilisateur(user_obj) if "." in perm and not perm.startswith("*.")}
+
+    def has_perm(self, user_obj, perm, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return False
+        permissions = permissions_utilisateur(user_obj)
+        return "*" in permissions or ("." in perm and not perm.startswith("*.") and perm in permissions)
@@ -0,0 +1,115 @@
+# core/broadcast.py
+"""
+Diffusion d'événements vers des abonnés asynchrones (flux SSE).
+
+L'émetteur publie une fois, depuis n'importe quel thread (vue WSGI,
+commande, callback on_commit) ; chaque abonné reçoit le message dans sa
+propre file asyncio, sans requête supplémentaire.
+
+Le backend est configurable (settings.BROADCAST_BACKEND) :
+- MemoryBackend : abonnés du processus courant uniquement ;
+- un backend partagé (Redis pub/sub...) n'a qu'à fournir publish/subscribe/
+  unsubscribe avec la même signature pour servir plusieurs workers.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Abonnement:
+    """File d'un abonné, rattachée à sa boucle asyncio."""
+
+    def __init__(self, canal, max_messages=100):
+        self.canal = canal
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_messages)
+
+    def _deposer(self, message):
+        # Abonné trop lent : on sacrifie le plus ancien message plutôt que l'émetteur.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def pousser(self, message):
+        """Appelable depuis n'importe quel thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._deposer, message)
+        except RuntimeError:
+            # Boucle fermée : l'abonné est parti, il sera retiré à sa sortie.
+            pass
+
+    async def recevoir(self, timeout=None):
+        """Prochain message, ou None si rien n'arrive avant `timeout` secondes."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBackend:
+    """Abonnés en mémoire, par canal ; publish est thread-safe."""
+
+    def __init__(self, max_messages=100):
+        self.max_messages = max_messages
+        self._abonnes = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, canal, message):
+        with self._lock:
+            abonnes = list(self._abonnes.get(canal, ()))
+        for abonnement in abonnes:
+            abonnement.pousser(message)
+
+    def subscribe(self, canal):
+        abonnement = Abonnement(canal, self.max_messages)
+        with self._lock:
+            self._abonnes[canal].add(abonnement)
+        return abonnement
+
+    def unsubscribe(self, abonnement):
+        with self._lock:
+            abonnes = self._abonnes.get(abonnement.canal)
+            if abonnes is not None:
+                abonnes.discard(abonnement)
+                if not abonnes:
+                    del self._abonnes[abonnement.canal]
+
+    def nb_abonnes(self, canal):
+        with self._lock:
+            return len(self._abonnes.get(canal, ()))
+
+
+_backend = None
+
+
+def get_broadcaster():
+    """Instance unique du backend configuré."""
+    global _backend
+    if _backend is None:
+        backend_class = import_string(
+            getattr(settings, "BROADCAST_BACKEND", "core.broadcast.MemoryBackend")
+        )
+        _backend = backend_class(**getattr(settings, "BROADCAST_BACKEND_OPTIONS", {}))
+    return _backend
+
+
+def publier(canal, message):
+    get_broadcaster().publish(canal, message)
+
+
+@asynccontextmanager
+async def abonner(canal):
+    """
+    async with abonner("presences") as abonnement:
+        message = await abonnement.recevoir(timeout=15)
+    """
+    backend = get_broadcaster()
+    abonnement = backend.subscribe(canal)
+    try:
+        yield abonnement
+    finally:
+        backend.unsubscribe(abonnement)
@@ -0,0 +1,26 @@
+# core/cache.py
+"""
+Caches partagés entre workers.
+
+Les caches d'autorisation (principal, permissions, groupes) ne sont sûrs que
+si leur invalidation atteint tous les processus : un backend propre au
+processus (LocMemCache, le défaut sans CACHES) garderait un compte désactivé
+ou une permission retirée actifs sur les autres workers. `cache_partage()`
+ne renvoie donc le cache que s'il est partagé (Redis, Memcached, base de
+données, fichiers) ; sinon l'appelant se passe de cache.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+BACKENDS_LOCAUX = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_partage(alias):
+    """Le cache `alias` s'il est partagé entre processus, sinon None."""
+    configuration = settings.CACHES.get(alias)
+    if configuration is None or configuration.get("BACKEND") in BACKENDS_LOCAUX:
+        return None
+    return caches[alias]
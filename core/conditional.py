@@ -0,0 +1,90 @@
+# core/conditional.py
+"""
+GET conditionnel (ETag / If-None-Match) pour les vues DRF interrogées en boucle.
+
+Le validateur est calculé par une seule requête d'agrégat sur le queryset
+de la vue (donc après le filtrage par rôle de get_queryset) :
+    max(champ) pour chaque champ de etag_champs + nombre de lignes
+complétés par l'utilisateur et l'URL (filtres, curseur). Si le client
+présente le même ETag, la vue répond 304 sans exécuter le handler ni
+construire de serializer.
+
+Une vue dont la requête principale peut calculer le même agrégat
+(etag_dans_la_reponse) ne lance la requête du validateur qu'en présence de
+If-None-Match : sinon le handler renseigne self.etag_watermark et la
+réponse 200 coûte une seule requête.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class NonModifie(Exception):
+    """La ressource n'a pas changé depuis l'ETag présenté par le client."""
+
+
+class ConditionalGetMixin:
+    """
+    Mixin pour APIView. La vue fournit :
+    - get_etag_queryset() : les lignes dont dépend la réponse ;
+    - get_etag_extra() (optionnel) : tout autre élément du rendu (date du jour...).
+    """
+
+    conditional_methods = ("GET", "HEAD")
+    # Champs dont le maximum entre dans le validateur (jointures comprises)
+    etag_champs = ("updated_at",)
+    etag_dans_la_reponse = False
+
+    def get_etag_queryset(self):
+        raise NotImplementedError
+
+    def get_etag_extra(self):
+        return ""
+
+    def get_etag_watermark(self):
+        """(max de chaque champ de etag_champs..., nombre de lignes) en une requête."""
+        agregats = {f"max_{i}": Max(champ) for i, champ in enumerate(self.etag_champs)}
+        watermark = self.get_etag_queryset().order_by().aggregate(**agregats, nombre=Count("pk"))
+        return (*(watermark[f"max_{i}"] for i in range(len(self.etag_champs))), watermark["nombre"])
+
+    def calculer_etag(self, request, watermark=None):
+        if watermark is None:
+            watermark = self.get_etag_watermark()
+        brut = "\n".join([
+            str(request.user.pk),
+            request.get_full_path(),
+            str(self.get_etag_extra()),
+            *("" if valeur is None else valeur.isoformat() if hasattr(valeur, "isoformat") else str(valeur)
+              for valeur in watermark),
+        ])
+        return f'W/"{hashlib.sha1(brut.encode()).hexdigest()}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        self.etag_watermark = None
+        if request.method in self.conditional_methods:
+            etags = parse_etags(request.headers.get("If-None-Match", ""))
+            if etags or not self.etag_dans_la_reponse:
+                self.etag = self.calculer_etag(request)
+            if self.etag in etags or "*" in etags:
+                raise NonModifie
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NonModifie):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "etag", None) is None and getattr(self, "etag_watermark", None) is not None:
+            # Agrégat lu par la requête du handler, dans le même instantané que la réponse
+            self.etag = self.calculer_etag(request, self.etag_watermark)
+        if getattr(self, "etag", None) and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
@@ -0,0 +1,214 @@
+# core/idempotency.py
+"""
+Support de l'en-tête `Idempotency-Key` pour les vues DRF.
+
+Un client qui rejoue une requête mutante avec la même clé reçoit la réponse
+mémorisée, sans repasser par l'authentification, les permissions ni la base.
+
+Le stockage est configurable (settings.IDEMPOTENCY_STORE) :
+- MemoryIdempotencyStore : mémoire locale du processus, bornée, avec TTL ;
+- CacheIdempotencyStore  : cache Django, partagé entre workers.
+
+La clé est réservée atomiquement avant le traitement (`reserve`, marqueur
+EN_COURS de durée `lock_ttl`) : un rejeu qui arrive pendant que l'original
+s'exécute reçoit 409 avec Retry-After au lieu de refaire le traitement. La
+réponse finale remplace le marqueur, jamais une réponse déjà mémorisée.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.utils.module_loading import import_string
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+EN_COURS = "en-cours"
+
+
+class MemoryIdempotencyStore:
+    """
+    Dictionnaire ordonné par date d'insertion : comme le TTL est fixe, les
+    entrées expirent dans l'ordre d'insertion et l'éviction se fait en tête,
+    en O(1) amorti.
+    """
+
+    def __init__(self, ttl=86400, max_entries=10000, lock_ttl=60):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock_ttl = lock_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purger(self, now):
+        while self._data:
+            key, (expire_at, _) = next(iter(self._data.items()))
+            if expire_at > now and len(self._data) < self.max_entries:
+                break
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expire_at, value = entry
+            if expire_at <= now:
+                del self._data[key]
+                return None
+            return value
+
+    def _valeur(self, key, now):
+        entry = self._data.get(key)
+        return entry[1] if entry is not None and entry[0] > now else None
+
+    def reserve(self, key):
+        """Pose le marqueur EN_COURS si la clé est libre ; faux sinon."""
+        now = time.monotonic()
+        with self._lock:
+            if self._valeur(key, now) is not None:
+                return False
+            self._data.pop(key, None)
+            self._purger(now)
+            self._data[key] = (now + self.lock_ttl, EN_COURS)
+            return True
+
+    def set(self, key, value):
+        """Mémorise `value`, sauf si une réponse est déjà mémorisée (premier écrit gagnant)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._valeur(key, now) not in (None, EN_COURS):
+                return
+            self._data.pop(key, None)
+            self._purger(now)
+            self._data[key] = (now + self.ttl, value)
+
+    def release(self, key):
+        """Libère une réservation restée sans réponse."""
+        with self._lock:
+            if self._valeur(key, time.monotonic()) == EN_COURS:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheIdempotencyStore:
+    """
+    Stockage dans un cache Django (Redis, Memcached...), TTL géré par le cache.
+
+    Les clés portent un numéro de version : `clear()` change de version au
+    lieu de vider le cache, qui peut être partagé avec d'autres usages. Les
+    anciennes entrées expirent d'elles-mêmes.
+    """
+
+    def __init__(self, ttl=86400, alias="default", prefix="idempotency", lock_ttl=60):
+        self.ttl = ttl
+        self.cache = caches[alias]
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+
+    def _cle(self, key):
+        version = self.cache.get(f"{self.prefix}:version", 0)
+        return f"{self.prefix}:{version}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._cle(key))
+
+    def reserve(self, key):
+        # cache.add est atomique (SET NX sous Redis)
+        return self.cache.add(self._cle(key), EN_COURS, self.lock_ttl)
+
+    def set(self, key, value):
+        # Seul le détenteur de la réservation écrit : il ne remplace que son marqueur.
+        cle = self._cle(key)
+        if self.cache.get(cle) in (None, EN_COURS):
+            self.cache.set(cle, value, self.ttl)
+
+    def release(self, key):
+        cle = self._cle(key)
+        if self.cache.get(cle) == EN_COURS:
+            self.cache.delete(cle)
+
+    def clear(self):
+        self.cache.set(f"{self.prefix}:version", time.time_ns(), None)
+
+
+_store = None
+
+
+def get_idempotency_store():
+    """Instance unique du stockage configuré."""
+    global _store
+    if _store is None:
+        store_class = import_string(
+            getattr(settings, "IDEMPOTENCY_STORE", "core.idempotency.MemoryIdempotencyStore")
+        )
+        _store = store_class(**getattr(settings, "IDEMPOTENCY_STORE_OPTIONS", {}))
+    return _store
+
+
+class IdempotencyMixin:
+    """
+    Mixin pour APIView : rejoue la réponse mémorisée quand une requête
+    mutante est renvoyée avec le même `Idempotency-Key`.
+
+    La clé est rattachée au jeton présenté (en-tête Authorization ou cookie),
+    à la méthode et au chemin : deux utilisateurs ne partagent jamais une réponse.
+    Seules les réponses < 500 sont mémorisées ; une erreur serveur libère la
+    clé et reste rejouable. Un rejeu pendant le traitement reçoit 409.
+    """
+
+    idempotent_methods = ("POST",)
+
+    def get_idempotency_key(self, request):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in self.idempotent_methods or len(key) > 255:
+            return None
+
+        credentials = request.headers.get("Authorization") or request.COOKIES.get("jwt", "")
+        raw = "\n".join([credentials, request.method, request.get_full_path(), key])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        key = self.get_idempotency_key(request)
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        store = get_idempotency_store()
+        stored = store.get(key)
+        if stored is None:
+            if store.reserve(key):
+                return self.dispatch_reserve(store, key, request, *args, **kwargs)
+            # Réservée entre-temps par un rejeu concurrent
+            stored = store.get(key)
+        if stored is None or stored == EN_COURS:
+            response = JsonResponse(
+                {"detail": "Une requête avec cette clé d'idempotence est en cours de traitement."}, status=409
+            )
+            response["Retry-After"] = "1"
+            return response
+        status_code, content, content_type = stored
+        response = HttpResponse(content, status=status_code, content_type=content_type)
+        response[REPLAY_HEADER] = "true"
+        return response
+
+    def dispatch_reserve(self, store, key, request, *args, **kwargs):
+        """Traite la requête dont la clé vient d'être réservée, puis mémorise sa réponse."""
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            store.release(key)
+            raise
+        if response.status_code < 500:
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            store.set(key, (response.status_code, response.content, response.get("Content-Type")))
+        else:
+            store.release(key)
+        return response
@@ -2,29 +2,16 @@
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from users.authentication import JWTAuthentication
+from .permissions import filtrer_abac
+
 
 class PermissionMixin:
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-
-        # Si superuser ou admin → accès complet
-        if user.is_superuser or user.is_admin:
-            return super().get_queryset()
-
-        qs = super().get_queryset()
-
-        # Pour les modèles liés à un User (ex: Employe)
-        if hasattr(qs.model, "user"):
-            return qs.filter(user=user)
-
-        # Pour les modèles liés à un Employe (ex: Presence, Rapport)
-        if hasattr(qs.model, "employe"):
-            return qs.filter(employe__user=user)
-
-        return qs
+        # Admin → tout ; sinon les objets liés à l'utilisateur (règles ABAC)
+        return filtrer_abac(super().get_queryset(), self.request.user)
 
     def perform_create(self, serializer):
         user = self.request.user
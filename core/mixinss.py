@@ -1,7 +1,7 @@
 
 
 from rest_framework.exceptions import PermissionDenied, ValidationError
-from .permissions import RBACPermission, ABACPermission, GBACPermission
+from .permissions import RBACPermission, ABACPermission, GBACPermission, filtrer_abac
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -24,42 +24,14 @@ class PermissionMixin:
     allowed_groups = []
     abac_check = True  # On appliquer ABAC sur les objets (RetrieveUpdateDestroy)
 
-    """
-    
-      def get_queryset(self):
-        
-        #Filtre automatique selon RBAC + ABAC + GBAC
-        
-        user = self.request.user
-
-        # RBAC : admin / manager → accès complet
-        if RBACPermission().has_permission(self.request, self):
-            qs = super().get_queryset()
-        else:
-            # Staff → restreint aux objets liés à l'utilisateur
-            qs = super().get_queryset()
-            # ABAC filtrage : objets liés à user
-            if hasattr(qs.model, "user"):
-                qs = qs.filter(user=user)
-            elif hasattr(qs.model, "employe"):
-                qs = qs.filter(employe__user=user)
-        return qs
-    
-    """
-    
     def get_queryset(self):
-        user = self.request.user
         qs = super().get_queryset()  # ← On part du queryset de la vue (déjà optimisé)
 
         if RBACPermission().has_permission(self.request, self):
             return qs
 
-        if hasattr(qs.model, "user"):
-            qs = qs.filter(user=user)
-        elif hasattr(qs.model, "employe"):
-            qs = qs.filter(employe__user=user)
-
-        return qs
+        # ABAC filtrage : objets liés à user, en une clause WHERE
+        return filtrer_abac(qs, self.request.user)
 
     def perform_create(self, serializer):
         """
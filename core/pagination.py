@@ -0,0 +1,142 @@
+# core/pagination.py
+"""
+Pagination par curseur (keyset) sur l'ordre complet du modèle.
+
+Contrairement à l'offset (`LIMIT n OFFSET k`), chaque page filtre sur la
+position de la dernière ligne vue :
+    (date, created_at, id) "après" (d, c, i)
+ce qui, avec un index composite sur les mêmes colonnes, coûte autant pour la
+page 1000 que pour la page 1.
+
+L'ordre utilisé est `view.ordering` ou, à défaut, `Meta.ordering` du modèle,
+complété par `id` pour garantir un ordre total. Les champs d'ordre doivent
+être non nuls et portés directement par le modèle.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _valeur(row, champ):
+    return row[champ] if isinstance(row, dict) else getattr(row, champ)
+
+
+def _serialiser(valeur):
+    return valeur.isoformat() if hasattr(valeur, "isoformat") else valeur
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Curseur invalide."
+
+    def get_ordering(self, queryset, view):
+        ordering = list(getattr(view, "ordering", None) or queryset.model._meta.ordering or [])
+        if not any(champ.lstrip("-") == "id" for champ in ordering):
+            ordering.append("id")
+        return ordering
+
+    def get_page_size(self, request):
+        try:
+            taille = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(taille, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            position, reverse = data["p"], bool(data.get("r"))
+        except (ValueError, KeyError, TypeError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse):
+        position = [_serialiser(_valeur(row, champ.lstrip("-"))) for champ in self.ordering]
+        data = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _apres(ordering, position):
+        """(a, b, c) strictement après (x, y, z) dans l'ordre donné."""
+        condition = Q()
+        egalites = {}
+        for champ, valeur in zip(ordering, position):
+            nom = champ.lstrip("-")
+            lookup = "lt" if champ.startswith("-") else "gt"
+            condition |= Q(**egalites, **{f"{nom}__{lookup}": valeur})
+            egalites[nom] = valeur
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(queryset, view)
+        page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [champ[1:] if champ.startswith("-") else f"-{champ}" for champ in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._apres(ordering, position))
+
+        rows = list(queryset[:page_size + 1])
+        encore = len(rows) > page_size
+        rows = rows[:page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, encore
+        else:
+            self.has_next, self.has_previous = encore, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -1,6 +1,14 @@
+import time
+
+from rest_framework.filters import BaseFilterBackend
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
-from django.contrib.auth.models import Group
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.db.models import Value
+
+from core.cache import cache_partage
 
 # ==============================
 # 1. RBAC (Role-Based Access Control)
@@ -27,6 +35,143 @@ ROLE_PERMISSIONS = {
     },
 }
 
+
+# ==============================
+# 0. Permissions compilées
+# ==============================
+# Toutes les permissions d'un utilisateur en un seul frozenset, calculé par
+# une requête (permissions directes UNION permissions de ses groupes) puis
+# gardé dans le cache Django et sur l'instance User. Contenu :
+#   - "can_x"         : permissions du rôle (ROLE_PERMISSIONS)
+#   - "app.can_x"     : permissions Django (directes et de groupe), comme ModelBackend
+#   - "*.can_x"       : codename d'un groupe, valable avec ou sans préfixe d'app
+#   - "*"             : superutilisateur actif
+# Toute modification de Group, Permission ou des tables m2m change la
+# version (users/signals.py) ; le rôle et les statuts font partie de la clé.
+#
+# Le cache (settings.PERMISSIONS_CACHE_ALIAS) n'est utilisé que s'il est
+# partagé entre workers (core.cache.cache_partage) : une révocation doit
+# atteindre tous les processus. Sinon le frozenset n'est gardé que sur
+# l'instance User, c'est-à-dire le temps d'une requête.
+
+PERMISSIONS_VERSION_CLE = "permissions:version"
+
+
+def _cache_permissions():
+    return cache_partage(getattr(settings, "PERMISSIONS_CACHE_ALIAS", "default"))
+
+
+def _changer_version():
+    cache = _cache_permissions()
+    if cache is not None:
+        cache.set(PERMISSIONS_VERSION_CLE, time.time_ns(), None)
+
+
+def invalider_permissions():
+    # Une requête concurrente peut lire les anciennes lignes avant le commit et
+    # les mettre en cache sous la nouvelle version : on change encore après.
+    _changer_version()
+    transaction.on_commit(_changer_version)
+
+
+def _version_cle(cache, prefixe, user):
+    version = cache.get(PERMISSIONS_VERSION_CLE, 0)
+    return f"{prefixe}:{version}:{user.pk}"
+
+
+def _calculer_permissions(user):
+    role = getattr(user, "role", None)
+    permissions = set(ROLE_PERMISSIONS.get(role, ()))
+    if user.is_active and user.is_superuser:
+        permissions.add("*")
+
+    champs = ("content_type__app_label", "codename", "groupe")
+    directes = Permission.objects.filter(user=user).annotate(groupe=Value(False)).values_list(*champs)
+    de_groupe = Permission.objects.filter(group__user=user).annotate(groupe=Value(True)).values_list(*champs)
+    for app_label, codename, groupe in directes.union(de_groupe, all=True).order_by():
+        if user.is_active:
+            permissions.add(f"{app_label}.{codename}")
+        if groupe:
+            permissions.add(f"*.{codename}")
+    return frozenset(permissions)
+
+
+def permissions_utilisateur(user):
+    """frozenset des permissions de `user` : zéro requête une fois en cache."""
+    permissions = getattr(user, "_permissions_compilees", None)
+    if permissions is not None:
+        return permissions
+
+    cache = _cache_permissions()
+    if cache is None:
+        permissions = _calculer_permissions(user)
+    else:
+        cle = (
+            f"{_version_cle(cache, 'permissions', user)}:{getattr(user, 'role', '')}:"
+            f"{int(user.is_active)}:{int(user.is_superuser)}"
+        )
+        permissions = cache.get(cle)
+        if permissions is None:
+            permissions = _calculer_permissions(user)
+            cache.set(cle, permissions, settings.PERMISSIONS_CACHE_SECONDES)
+    user._permissions_compilees = permissions
+    return permissions
+
+
+def a_permission(user, perm):
+    """
+    Vrai si `user` a `perm` par son rôle, une permission Django ou un de ses
+    groupes : mêmes règles que les anciens parcours, en recherches O(1).
+    """
+    permissions = permissions_utilisateur(user)
+    codename = perm.split(".")[-1]
+    return (
+        perm in permissions
+        or "*" in permissions
+        or f"*.{codename}" in permissions
+    )
+
+
+def user_groups(user):
+    """
+    frozenset des noms de groupes de `user`. Une requête au premier appel,
+    puis cache partagé (même version que les permissions : changée par
+    m2m_changed sur User.groups et par toute écriture de Group, puis de
+    nouveau au commit) ; sans cache
+    partagé, une requête par requête HTTP.
+    """
+    groupes = getattr(user, "_groupes_compiles", None)
+    if groupes is not None:
+        return groupes
+
+    requete = Group.objects.filter(user=user).values_list("name", flat=True)
+    cache = _cache_permissions()
+    if cache is None:
+        groupes = frozenset(requete)
+    else:
+        cle = _version_cle(cache, "groupes", user)
+        groupes = cache.get(cle)
+        if groupes is None:
+            groupes = frozenset(requete)
+            cache.set(cle, groupes, settings.PERMISSIONS_CACHE_SECONDES)
+    user._groupes_compiles = groupes
+    return groupes
+
+
+def user_in_groups(user, groups, require_all=False):
+    """
+    Vrai si `user` appartient à l'un des groupes (ou à tous avec
+    require_all=True). Sans requête une fois user_groups() en cache :
+        user_in_groups(user, ["Managers", "RH"])
+    """
+    if not user or not user.is_authenticated:
+        return False
+    membres = user_groups(user)
+    if require_all:
+        return membres.issuperset(groups)
+    return not membres.isdisjoint(groups)
+
+
 class RBACPermission(BasePermission):
     """
     Permission basée sur les rôles (RBAC).
@@ -50,25 +195,8 @@ class RBACPermission(BasePermission):
         if not perms:
             return True  # accès libre si rien n’est défini
 
-        # Vérifie via le rôle (attribut custom User.role)
-        user_role = getattr(request.user, "role", None)
-        if user_role and user_role in ROLE_PERMISSIONS:
-            for perm in perms:
-                if perm in ROLE_PERMISSIONS[user_role]:
-                    return True
-
-        # Vérifie via les permissions Django
-        for perm in perms:
-            if request.user.has_perm(perm):
-                return True
-
-        # Vérifie via les groupes liés
-        for group in request.user.groups.all():
-            if any(perm.codename in [p.split('.')[-1] for p in perms]
-                   for perm in group.permissions.all()):
-                return True
-
-        return False
+        # Rôle, permissions Django et groupes : voir permissions_utilisateur()
+        return any(a_permission(request.user, perm) for perm in perms)
 
 
 # ==============================
@@ -91,34 +219,86 @@ class GBACPermission(BasePermission):
         if not allowed_groups:
             return True
 
-        return request.user.groups.filter(name__in=allowed_groups).exists()
+        return user_in_groups(request.user, allowed_groups)
 
 
 # ==============================
 # 3. ABAC (Attribute-Based Access Control)
 # ==============================
+def _champs_relation(model):
+    return {f.name for f in model._meta.concrete_fields if f.is_relation}
+
+
+def _est_admin(user):
+    # role "admin" ou superutilisateur (User.is_admin)
+    return getattr(user, "is_admin", False)
+
+
+def _employe_id(user):
+    # Employe déjà chargé avec le principal (users/principal_cache.py)
+    employe = getattr(user, "employe", None)
+    return employe.pk if employe is not None else None
+
+
 class ABACPermission(BasePermission):
     """
     Permission basée sur les attributs de l’utilisateur ou de l’objet.
     Exemple :
       - Admin → accès total
       - Employé → accès à ses propres données
+
+    Compare des identifiants (user_id, employe_id) : aucun objet lié n'est
+    chargé. Pour une liste, utiliser ABACFilterBackend (mêmes règles en WHERE).
     """
 
     def has_object_permission(self, request, view, obj):
-        if getattr(request.user, "role", None) == "admin":
+        if _est_admin(request.user):
             return True
 
+        champs = _champs_relation(type(obj))
         # Cas Employe → accès seulement à ses propres données
-        if hasattr(obj, "user"):  # modèle Employe
-            return obj.user == request.user
+        if "user" in champs:
+            return obj.user_id == request.user.pk
 
-        if hasattr(obj, "employe"):  # modèle Presence ou Rapport
-            return obj.employe.user == request.user
+        if "employe" in champs:  # modèle Presence ou Rapport
+            employe_id = _employe_id(request.user)
+            return employe_id is not None and obj.employe_id == employe_id
 
         return False
 
 
+def filtrer_abac(queryset, user):
+    """
+    Les règles d'ABACPermission.has_object_permission, en une clause WHERE.
+    Périmètre de PermissionMixin, des présences et de la synchro différentielle.
+    """
+    if _est_admin(user):
+        return queryset
+
+    champs = _champs_relation(queryset.model)
+    if "user" in champs:
+        return queryset.filter(user_id=user.pk)
+
+    if "employe" in champs:
+        employe_id = _employe_id(user)
+        if employe_id is None:
+            return queryset.none()
+        return queryset.filter(employe_id=employe_id)
+
+    return queryset.none()
+
+
+class ABACFilterBackend(BaseFilterBackend):
+    """
+    Filtre des vues liste : ne renvoie que les objets que
+    ABACPermission.has_object_permission accepterait, en une requête.
+        filter_backends = [ABACFilterBackend]
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return filtrer_abac(queryset, request.user)
+
+
 # ==============================
 # 4. Helpers globaux
 # ==============================
@@ -129,23 +309,7 @@ def user_has_permission(user, perm_codename: str) -> bool:
     """
     if not user or not user.is_authenticated:
         return False
-
-    # Vérifie permissions Django
-    if user.has_perm(perm_codename):
-        return True
-
-    # Vérifie via rôle (RBAC)
-    user_role = getattr(user, "role", None)
-    if user_role and user_role in ROLE_PERMISSIONS:
-        if perm_codename in ROLE_PERMISSIONS[user_role]:
-            return True
-
-    # Vérifie via groupes
-    for group in user.groups.all():
-        if any(perm.codename == perm_codename.split('.')[-1] for perm in group.permissions.all()):
-            return True
-
-    return False
+    return a_permission(user, perm_codename)
 
 
 def require_permission(user, perm_codename: str):
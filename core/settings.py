@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     "corsheaders",
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
+    'django_filters',
     
     'drf_yasg',
 
@@ -211,16 +212,92 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
-# REST_FRAMEWORK = {
-#     'DEFAULT PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-#     'PAGE_SIZE': 3,
-#     'DEFAULT_PERMISSION_CLASSES': [
-#        'rest_framework.permissions.IsAuthenticated',
-#     ],  
-# }
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
+    # 'DEFAULT_PERMISSION_CLASSES': [
+    #    'rest_framework.permissions.IsAuthenticated',
+    # ],  
+}
 
 AUTH_USER_MODEL = "users.User"
 
+# Permissions compilées et groupes (core/permissions.py) : alias de cache
+# partagé et durée. Toute écriture de Group/Permission/m2m change la version ;
+# la durée borne seulement la vie des entrées. Sans cache partagé, recalcul
+# à chaque requête (une requête SQL).
+PERMISSIONS_CACHE_ALIAS = os.getenv("PERMISSIONS_CACHE_ALIAS", "default")
+PERMISSIONS_CACHE_SECONDES = int(os.getenv("PERMISSIONS_CACHE_SECONDES", 300))
+
+# Cache partagé entre workers (Redis, paquet `redis` requis). Sans REDIS_URL,
+# cache local au processus : les caches d'autorisation sont alors désactivés.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+# ModelBackend + permissions compilées (core.permissions) pour user.has_perm().
+AUTHENTICATION_BACKENDS = ["core.backends.CompiledPermissionBackend"]
+
+# Cache des access tokens vérifiés (users/token_cache.py), par processus.
+# Nombre maximal d'entrées ; 0 désactive le cache.
+JWT_CACHE_TAILLE = int(os.getenv("JWT_CACHE_TAILLE", 10000))
+# Cache du principal (User + Employe, users/principal_cache.py) : alias de
+# cache Django et durée ; 0 désactive le cache. Ignoré si l'alias n'est pas un
+# cache partagé entre workers (voir core/cache.py et CACHES ci-dessous).
+PRINCIPAL_CACHE_ALIAS = os.getenv("PRINCIPAL_CACHE_ALIAS", "default")
+PRINCIPAL_CACHE_SECONDES = int(os.getenv("PRINCIPAL_CACHE_SECONDES", 300))
+
+
+# Pointage
+# Nombre maximal de badgeages acceptés par lot (presences/pointages/).
+POINTAGE_LOT_MAX = int(os.getenv("POINTAGE_LOT_MAX", 500))
+# Nombre maximal d'événements par synchronisation de terminal hors ligne.
+POINTAGE_SYNC_MAX = int(os.getenv("POINTAGE_SYNC_MAX", 20000))
+# Clôture de fin de journée des présences restées ouvertes (commande cloturer_presences) :
+# "heure_defaut" pose la sortie à CLOTURE_HEURE_DEFAUT, "revue" clôt sans heure de sortie.
+# Dans les deux cas la présence est marquée a_verifier pour les RH.
+CLOTURE_POLITIQUE = os.getenv("CLOTURE_POLITIQUE", "heure_defaut")
+CLOTURE_HEURE_DEFAUT = os.getenv("CLOTURE_HEURE_DEFAUT", "18:00")
+
+# Ponctualité (presences/ponctualite/) : retard = arrivée après
+# PONCTUALITE_HEURE_DEBUT + PONCTUALITE_TOLERANCE_MINUTES. Résultats en cache
+# par périmètre et fenêtre pendant PONCTUALITE_CACHE_SECONDES.
+PONCTUALITE_HEURE_DEBUT = os.getenv("PONCTUALITE_HEURE_DEBUT", "09:00")
+PONCTUALITE_TOLERANCE_MINUTES = int(os.getenv("PONCTUALITE_TOLERANCE_MINUTES", 0))
+PONCTUALITE_CACHE_SECONDES = int(os.getenv("PONCTUALITE_CACHE_SECONDES", 300))
+
+# Diffusion temps réel des pointages (flux SSE presences/flux/, servi via core.asgi)
+# MemoryBackend ne relie que les abonnés d'un même processus.
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "core.broadcast.MemoryBackend")
+BROADCAST_BACKEND_OPTIONS = {
+    "max_messages": int(os.getenv("BROADCAST_MAX_MESSAGES", 100)),
+}
+
+# Horizon de la table chaude des présences (mois) : archiver_presences déplace
+# les mois antérieurs vers PresenceArchive, les lectures plus anciennes passent
+# par la vue PresenceHistorique. Au moins 13 pour garder l'année en cours à chaud.
+PRESENCE_HORIZON_MOIS = int(os.getenv("PRESENCE_HORIZON_MOIS", 13))
+
+# Écart maximal (jours) entre date_after et date_before sur les listes et exports de présences.
+PRESENCE_FILTRE_MAX_JOURS = int(os.getenv("PRESENCE_FILTRE_MAX_JOURS", 366))
+
+# Synchronisation différentielle (sync/) : les lignes modifiées depuis moins de
+# SYNC_MARGE_SECONDES sont différées à l'appel suivant (transactions en cours).
+SYNC_MARGE_SECONDES = int(os.getenv("SYNC_MARGE_SECONDES", 2))
+
+# Idempotency-Key sur les POST de pointage
+# "core.idempotency.CacheIdempotencyStore" pour partager les clés entre workers.
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "core.idempotency.MemoryIdempotencyStore")
+IDEMPOTENCY_STORE_OPTIONS = {
+    "ttl": int(os.getenv("IDEMPOTENCY_TTL", 24 * 3600)),
+    # Durée max de la réservation d'une clé pendant le traitement de la requête
+    "lock_ttl": int(os.getenv("IDEMPOTENCY_LOCK_TTL", 60)),
+}
+
 
 
 
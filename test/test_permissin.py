@@ -55,8 +55,8 @@ class PermissionTest(TestCase):
         self.authenticate(self.staff)
         response = self.client.get("/api/employes/")
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['id'], self.staff_employe.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.staff_employe.id)
 
     def test_staff_can_create_own_presence(self):
         self.authenticate(self.staff)
@@ -4,36 +4,51 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from .principal_cache import charger_principal
+from .token_cache import get_token_cache
+
 User = get_user_model()
 SECRET_KEY = settings.SECRET_KEY
 
 class JWTAuthentication(BaseAuthentication):
-    def authenticate(self, request):
+    @staticmethod
+    def get_token(request):
         # Vérifier d'abord dans les headers Authorization
         auth_header = request.headers.get("Authorization")
-        token = None
-        
         if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-        else:
-            # Vérifier aussi dans les cookies si pas trouvé dans headers
-            token = request.COOKIES.get("jwt")
-        
-        # Si aucun token n'est trouvé, retournons None 
-        if not token:
-            return None
-        
+            return auth_header.split(" ")[1]
+        # Vérifier aussi dans les cookies si pas trouvé dans headers
+        return request.COOKIES.get("jwt")
+
+    @staticmethod
+    def decode(token):
+        """Payload vérifié, depuis le cache des tokens si possible (users/token_cache.py)."""
+        cache = get_token_cache()
+        payload = cache.get(token)
+        if payload is not None:
+            return payload
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         except jwt.ExpiredSignatureError:
             raise AuthenticationFailed("Token expiré")
         except jwt.InvalidTokenError:
             raise AuthenticationFailed("Token invalide")
+        cache.set(token, payload)
+        return payload
+
+    def authenticate(self, request):
+        token = self.get_token(request)
+
+        # Si aucun token n'est trouvé, retournons None 
+        if not token:
+            return None
+
+        payload = self.decode(token)
 
         if payload.get("type") != "access":
             raise AuthenticationFailed("Ce n'est pas un access token")
 
-        user = User.objects.filter(id=payload["id"]).first()
+        user = charger_principal(payload["id"])
         if not user:
             raise AuthenticationFailed("Utilisateur introuvable")
         
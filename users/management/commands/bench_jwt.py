@@ -0,0 +1,67 @@
+# users/management/commands/bench_jwt.py
+import datetime
+import time
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import JWTAuthentication
+from users.token_cache import get_token_cache
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare la latence de JWTAuthentication.authenticate() cache des tokens froid et chaud"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000, help="Appels mesurés par scénario")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.mesurer(options['iterations'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Utilisateur de test annulé (rollback).")
+
+    def chronometrer(self, fonction, iterations, froid):
+        cache = get_token_cache()
+        cache.vider()
+        if not froid:
+            fonction()
+        debut = time.perf_counter()
+        for _ in range(iterations):
+            if froid:
+                cache.vider()
+            fonction()
+        return (time.perf_counter() - debut) / iterations * 1e6
+
+    def mesurer(self, iterations):
+        user = User.objects.create(username="bench-jwt", email="bench-jwt@example.com")
+        token = jwt.encode(
+            {"id": user.id, "type": "access", "exp": datetime.datetime.utcnow() + datetime.timedelta(days=5)},
+            settings.SECRET_KEY, algorithm="HS256",
+        )
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        auth = JWTAuthentication()
+
+        for nom, fonction in (
+            ("decode()      ", lambda: auth.decode(token)),
+            ("authenticate()", lambda: auth.authenticate(request)),
+        ):
+            froid = self.chronometrer(fonction, iterations, froid=True)
+            chaud = self.chronometrer(fonction, iterations, froid=False)
+            self.stdout.write(
+                f"{nom} : froid {froid:8.1f} µs  chaud {chaud:8.1f} µs  (x{froid / chaud:.1f})"
+            )
+        self.stdout.write(f"Compteurs : {get_token_cache().stats()}")
+        get_token_cache().vider()
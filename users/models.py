@@ -11,6 +11,9 @@ class User(AbstractUser):
     )
     email = models.EmailField(unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="staff")
+    # Validateurs ETag des présences (nom d'utilisateur affiché) ; last_login
+    # est écrit avec update_fields et ne le change pas.
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.username} - ({self.role})"
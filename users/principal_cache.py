@@ -0,0 +1,100 @@
+# users/principal_cache.py
+"""
+Cache du principal : l'utilisateur authentifié et son Employe.
+
+JWTAuthentication charge User + Employe en une requête jointe
+(select_related) et garde un principal réduit dans le cache Django
+(settings.PRINCIPAL_CACHE_ALIAS) pendant PRINCIPAL_CACHE_SECONDES :
+identifiants, rôle, statuts et nom/poste de l'employé, jamais le mot de
+passe. Un utilisateur actif arrive donc dans la vue sans aucune requête
+d'identité, `request.user.employe` compris ; les autres champs sont différés
+et chargés à la demande.
+
+Les clés sont versionnées par utilisateur : toute écriture sur le User ou son
+Employe (post_save / post_delete, users/signals.py) change la version, et les
+entrées précédentes ne sont plus jamais lues. La version est changée tout de
+suite et de nouveau au commit, pour qu'une lecture concurrente faite avant
+le commit ne puisse pas remettre l'ancien état en cache.
+
+Le cache n'est utilisé que si l'alias est partagé entre workers
+(core.cache.cache_partage) : sinon un compte désactivé resterait accepté
+par les autres processus.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from api.models import Employe
+from core.cache import cache_partage
+
+User = get_user_model()
+
+# À incrémenter si la forme du principal mis en cache change.
+FORMAT = 2
+CHAMPS_USER = ("id", "username", "email", "role", "is_active", "is_superuser", "is_staff")
+CHAMPS_EMPLOYE = ("id", "nom", "poste", "user_id")
+
+
+def _cache():
+    return cache_partage(getattr(settings, "PRINCIPAL_CACHE_ALIAS", "default"))
+
+
+def _cle_version(user_id):
+    return f"principal:{user_id}:version"
+
+
+def _reduire(user):
+    employe = getattr(user, "employe", None)
+    return {
+        "user": {champ: getattr(user, champ) for champ in CHAMPS_USER},
+        "employe": {champ: getattr(employe, champ) for champ in CHAMPS_EMPLOYE} if employe else None,
+    }
+
+
+def _instance(model, valeurs):
+    # Champs absents différés : chargés par une requête seulement si on les lit
+    champs = [f.attname for f in model._meta.concrete_fields if f.attname in valeurs]
+    return model.from_db("default", champs, [valeurs[champ] for champ in champs])
+
+
+def _reconstruire(principal):
+    user = _instance(User, principal["user"])
+    employe = None
+    if principal["employe"] is not None:
+        employe = _instance(Employe, principal["employe"])
+        Employe.user.field.set_cached_value(employe, user)
+    User.employe.related.set_cached_value(user, employe)
+    return user
+
+
+def charger_principal(user_id):
+    """User (avec son Employe déjà chargé) ou None s'il n'existe pas."""
+    timeout = getattr(settings, "PRINCIPAL_CACHE_SECONDES", 300)
+    requete = User.objects.select_related("employe").filter(id=user_id)
+    cache = _cache() if timeout else None
+    if cache is None:
+        return requete.first()
+
+    version = cache.get(_cle_version(user_id), 0)
+    cle = f"principal:v{FORMAT}:{user_id}:{version}"
+    principal = cache.get(cle)
+    if principal is not None:
+        return _reconstruire(principal)
+
+    user = requete.first()
+    if user is not None:
+        cache.set(cle, _reduire(user), timeout)
+    return user
+
+
+def _changer_version(user_id):
+    cache = _cache()
+    if cache is not None:
+        cache.set(_cle_version(user_id), time.time_ns(), None)
+
+
+def invalider_principal(user_id):
+    _changer_version(user_id)
+    transaction.on_commit(lambda: _changer_version(user_id))
@@ -0,0 +1,45 @@
+# users/signals.py
+"""Invalidation des caches d'authentification quand un compte change."""
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.permissions import invalider_permissions
+from users.models import User
+from users.principal_cache import invalider_principal
+from users.token_cache import get_token_cache
+
+
+@receiver(post_save, sender=User, dispatch_uid="tokens_compte_desactive")
+def revoquer_tokens_compte_desactive(sender, instance, **kwargs):
+    if not instance.is_active:
+        get_token_cache().revoquer_utilisateur(instance.pk)
+
+
+@receiver(post_delete, sender=User, dispatch_uid="tokens_compte_supprime")
+def revoquer_tokens_compte_supprime(sender, instance, **kwargs):
+    get_token_cache().revoquer_utilisateur(instance.pk)
+
+
+@receiver(post_save, sender=User, dispatch_uid="principal_user_modifie")
+@receiver(post_delete, sender=User, dispatch_uid="principal_user_supprime")
+def invalider_principal_user(sender, instance, **kwargs):
+    invalider_principal(instance.pk)
+
+
+@receiver(post_save, sender="api.Employe", dispatch_uid="principal_employe_modifie")
+@receiver(post_delete, sender="api.Employe", dispatch_uid="principal_employe_supprime")
+def invalider_principal_employe(sender, instance, **kwargs):
+    invalider_principal(instance.user_id)
+
+
+@receiver(post_save, sender=Group, dispatch_uid="permissions_groupe_modifie")
+@receiver(post_delete, sender=Group, dispatch_uid="permissions_groupe_supprime")
+@receiver(post_save, sender=Permission, dispatch_uid="permissions_permission_modifiee")
+@receiver(post_delete, sender=Permission, dispatch_uid="permissions_permission_supprimee")
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid="permissions_groupes_utilisateur")
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid="permissions_utilisateur")
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid="permissions_du_groupe")
+def invalider_permissions_compilees(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        invalider_permissions()
@@ -1,7 +1,27 @@
 # tests/test_auth.py
-from django.test import TestCase
+import datetime
+import tempfile
+import time
+from unittest import mock
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.models import Employe, Presence
+from core.permissions import (
+    ABACFilterBackend, ABACPermission, GBACPermission, RBACPermission, permissions_utilisateur, user_groups, user_has_permission, user_in_groups,
+    _version_cle,
+)
+from users.authentication import JWTAuthentication
+from users.principal_cache import charger_principal
+
+from users.token_cache import TokenCache, get_token_cache
 
 User = get_user_model()
 
@@ -27,4 +47,276 @@ class AuthTest(TestCase):
             "password": "password123"
         })
         self.assertEqual(response.status_code, 200)
-        self.assertIn("access", response.data)
\ No newline at end of file
+        self.assertIn("access", response.data)
+
+class TokenCacheTest(TestCase):
+    def setUp(self):
+        get_token_cache().vider()
+        self.user = User.objects.create_user(username="cache", password="password123", role="admin", is_staff=True)
+        self.token = self.jeton(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def tearDown(self):
+        get_token_cache().vider()
+
+    @staticmethod
+    def jeton(user, **delta):
+        exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(**(delta or {"days": 5}))
+        return jwt.encode({"id": user.id, "type": "access", "exp": exp}, settings.SECRET_KEY, algorithm="HS256")
+
+    def test_lru_borne_et_expiration(self):
+        cache = TokenCache(taille=2)
+        futur = time.time() + 60
+        for i in range(3):
+            cache.set(f"t{i}", {"id": i, "exp": futur})
+        self.assertIsNone(cache.get("t0"))
+        self.assertEqual(cache.get("t2")["id"], 2)
+        cache.set("perime", {"id": 9, "exp": time.time() - 1})
+        self.assertIsNone(cache.get("perime"))
+        self.assertEqual(
+            {k: cache.stats()[k] for k in ("taille", "hits", "misses", "evictions")},
+            {"taille": 1, "hits": 1, "misses": 2, "evictions": 2},
+        )
+
+    def test_token_verifie_une_seule_fois(self):
+        with mock.patch("users.authentication.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(self.client.get("/api/users/list/").status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(get_token_cache().stats()["hits"], 2)
+
+    def test_revocation(self):
+        self.client.get("/api/users/list/")
+        self.client.post("/api/users/logout/")
+        self.assertEqual(get_token_cache().stats()["taille"], 0)
+
+        self.client.get("/api/users/list/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(get_token_cache().stats()["taille"], 0)
+        self.assertEqual(self.client.get("/api/users/list/").status_code, 403)
+
+    def test_token_expire_refuse(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.jeton(self.user, seconds=-1)}")
+        self.assertEqual(self.client.get("/api/users/list/").status_code, 403)
+        self.assertEqual(get_token_cache().stats()["taille"], 0)
+
+
+CACHE_PARTAGE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "partage": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tempfile.mkdtemp()},
+}
+
+
+@override_settings(CACHES=CACHE_PARTAGE, PRINCIPAL_CACHE_ALIAS="partage")
+class PrincipalCacheTest(TestCase):
+    def setUp(self):
+        caches["partage"].clear()
+        get_token_cache().vider()
+        self.user = User.objects.create_user(username="principal", password="password123", role="staff")
+        self.employe = Employe.objects.create(user=self.user, nom="Principal", poste="Accueil")
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {TokenCacheTest.jeton(self.user)}")
+
+    def authentifier(self):
+        return JWTAuthentication().authenticate(self.request)[0]
+
+    def test_aucune_requete_identite_a_chaud(self):
+        with self.assertNumQueries(1):
+            self.authentifier()
+        with self.assertNumQueries(0):
+            user = self.authentifier()
+            self.assertEqual(user.employe.nom, "Principal")
+
+    def test_invalidation_user_et_employe(self):
+        self.authentifier()
+        self.employe.nom = "Renommé"
+        self.employe.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authentifier().employe.nom, "Renommé")
+
+        self.employe.delete()
+        self.assertFalse(hasattr(self.authentifier(), "employe"))
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(AuthenticationFailed, "Compte désactivé"):
+            self.authentifier()
+
+    def test_principal_reduit(self):
+        self.authentifier()
+        user = self.authentifier()
+        self.assertEqual((user.role, user.employe.poste), ("staff", "Accueil"))
+        self.assertNotIn("password", user.__dict__)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.password)
+
+    @override_settings(PRINCIPAL_CACHE_ALIAS="default")
+    def test_cache_local_au_processus_ignore(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.authentifier()
+
+
+@override_settings(CACHES=CACHE_PARTAGE, PERMISSIONS_CACHE_ALIAS="partage")
+class PermissionsCompileesTest(TestCase):
+    def setUp(self):
+        caches["partage"].clear()
+        self.user = User.objects.create_user(username="perm", password="password123", role="staff")
+        self.groupe = Group.objects.create(name="Managers")
+        self.groupe.permissions.add(Permission.objects.get(codename="change_group"))
+        self.user.groups.add(self.groupe)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_permission"))
+
+    def frais(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_memes_regles_que_les_parcours(self):
+        user = self.frais()
+        attendus = {
+            "can_create_presence": True,            # rôle staff
+            "api.can_create_presence": False,       # le rôle ne vaut que sans préfixe
+            "auth.view_permission": True,           # permission directe
+            "view_permission": False,
+            "auth.change_group": True,              # groupe
+            "change_group": True,
+            "autre.change_group": True,
+            "auth.delete_group": False,
+        }
+        for perm, attendu in attendus.items():
+            self.assertEqual(user_has_permission(user, perm), attendu, perm)
+        self.assertTrue(user.has_perm("auth.change_group"))
+        self.assertFalse(user.has_perm("change_group"))
+        self.assertEqual(user.get_all_permissions(), {"auth.view_permission", "auth.change_group"})
+
+    def test_zero_requete_apres_chauffe(self):
+        premier = self.frais()
+        with self.assertNumQueries(1):
+            permissions_utilisateur(premier)
+        # Autre instance (requête suivante) : lue depuis le cache
+        user = self.frais()
+        request = APIRequestFactory().get("/")
+        request.user = user
+        vue = type("Vue", (), {"required_permissions": ["api.can_manage_presence", "auth.change_group"]})()
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                self.assertTrue(RBACPermission().has_permission(request, vue))
+                self.assertTrue(user.has_perm("auth.view_permission"))
+                self.assertFalse(user_has_permission(user, "api.can_manage_employee"))
+
+    @override_settings(PERMISSIONS_CACHE_ALIAS="default")
+    def test_cache_local_au_processus_ignore(self):
+        permissions_utilisateur(self.frais())
+        user = self.frais()
+        with self.assertNumQueries(1):
+            self.assertTrue(user_has_permission(user, "auth.change_group"))
+            self.assertTrue(user_has_permission(user, "auth.view_permission"))
+
+    def test_version_changee_par_les_m2m(self):
+        self.assertFalse(user_has_permission(self.frais(), "auth.delete_group"))
+        self.groupe.permissions.add(Permission.objects.get(codename="delete_group"))
+        self.assertTrue(user_has_permission(self.frais(), "auth.delete_group"))
+        self.user.groups.remove(self.groupe)
+        self.assertFalse(user_has_permission(self.frais(), "change_group"))
+
+    def test_version_changee_apres_le_commit(self):
+        avant = permissions_utilisateur(self.frais())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.groupe.permissions.remove(Permission.objects.get(codename="change_group"))
+            # Requête concurrente : lit les lignes d'avant le commit, les met en cache sous la nouvelle version
+            with mock.patch("core.permissions._calculer_permissions", return_value=avant):
+                self.assertTrue(user_has_permission(self.frais(), "change_group"))
+        self.assertFalse(user_has_permission(self.frais(), "change_group"))
+
+
+@override_settings(CACHES=CACHE_PARTAGE, PERMISSIONS_CACHE_ALIAS="partage")
+class GroupesEnCacheTest(TestCase):
+    def setUp(self):
+        caches["partage"].clear()
+        self.user = User.objects.create_user(username="gbac", password="password123", role="manager")
+        self.managers = Group.objects.create(name="Managers")
+        self.rh = Group.objects.create(name="RH")
+        self.user.groups.add(self.managers)
+
+    def test_plusieurs_controles_sans_requete(self):
+        user_groups(User.objects.get(pk=self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        request = APIRequestFactory().get("/")
+        request.user = user
+        vue = type("Vue", (), {"allowed_groups": ["RH", "Managers"]})()
+        with self.assertNumQueries(0):
+            self.assertTrue(GBACPermission().has_permission(request, vue))
+            self.assertTrue(user_in_groups(user, ["Managers"]))
+            self.assertFalse(user_in_groups(user, ["Managers", "RH"], require_all=True))
+            self.assertEqual(user_groups(user), {"Managers"})
+
+    def test_invalidation_par_m2m(self):
+        self.assertFalse(user_in_groups(User.objects.get(pk=self.user.pk), ["RH"]))
+        self.rh.user_set.add(self.user)
+        self.assertTrue(user_in_groups(User.objects.get(pk=self.user.pk), ["RH"]))
+        self.user.groups.clear()
+        self.assertEqual(user_groups(User.objects.get(pk=self.user.pk)), frozenset())
+
+    def test_retrait_du_groupe_apres_le_commit(self):
+        partage = caches["partage"]
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            self.user.groups.remove(self.managers)  # m2m_changed post_remove
+            # Requête concurrente : lit les groupes d'avant le commit, les met en cache sous la nouvelle version
+            partage.set(_version_cle(partage, "groupes", self.user), frozenset({"Managers"}))
+            self.assertTrue(user_in_groups(User.objects.get(pk=self.user.pk), ["Managers"]))
+        self.assertEqual(len(rappels), 1)
+        self.assertFalse(user_in_groups(User.objects.get(pk=self.user.pk), ["Managers"]))
+
+    @override_settings(PERMISSIONS_CACHE_ALIAS="default")
+    def test_cache_local_au_processus_ignore(self):
+        user_groups(User.objects.get(pk=self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user_in_groups(user, ["Managers"]))
+            self.assertFalse(user_in_groups(user, ["RH"]))
+
+
+class AbacFiltreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="abac-admin", email="abac-admin@example.com", password="password123", role="admin")
+        self.staff = User.objects.create_user(username="abac-staff", email="abac-staff@example.com", password="password123", role="staff")
+        self.sans_employe = User.objects.create_user(username="abac-seul", email="abac-seul@example.com", password="password123", role="manager")
+        self.employes = [
+            Employe.objects.create(user=self.staff, nom="Staff", poste="Accueil"),
+            Employe.objects.create(user=User.objects.create(username="abac-autre", email="autre@example.com"), nom="Autre", poste="Atelier"),
+        ]
+        for employe in self.employes:
+            for jour in range(1, 4):
+                Presence.objects.create(employe=employe, date=datetime.date(2025, 3, jour))
+
+    @staticmethod
+    def regle_historique(user, obj):
+        # Règle d'origine, objets liés chargés
+        if user.role == "admin":
+            return True
+        if hasattr(obj, "user"):
+            return obj.user == user
+        return obj.employe.user == user
+
+    def test_equivalence_avec_les_regles_actuelles(self):
+        for user in (self.admin, self.staff, self.sans_employe):
+            request = APIRequestFactory().get("/")
+            request.user = charger_principal(user.pk)
+            for modele in (Employe, Presence):
+                filtres = set(ABACFilterBackend().filter_queryset(request, modele.objects.all(), None))
+                for obj in modele.objects.all():
+                    attendu = self.regle_historique(user, obj)
+                    self.assertEqual(ABACPermission().has_object_permission(request, None, obj), attendu)
+                    self.assertEqual(obj in filtres, attendu, (user.username, obj))
+
+    def test_nombre_de_requetes_constant(self):
+        request = APIRequestFactory().get("/")
+        request.user = charger_principal(self.staff.pk)
+        with self.assertNumQueries(1):
+            presences = list(ABACFilterBackend().filter_queryset(request, Presence.objects.all(), None))
+        self.assertEqual(len(presences), 3)
+        tout = list(Presence.objects.all())
+        with self.assertNumQueries(0):
+            autorises = [p for p in tout if ABACPermission().has_object_permission(request, None, p)]
+        self.assertEqual(autorises, [p for p in tout if p.employe_id == self.employes[0].pk])
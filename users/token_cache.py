@@ -0,0 +1,108 @@
+# users/token_cache.py
+"""
+Cache des access tokens déjà vérifiés.
+
+Un même access token est présenté des centaines de fois pendant sa durée de
+vie : JWTAuthentication garde le payload décodé dans un LRU borné, indexé
+par l'empreinte SHA-256 du token (jamais le token lui-même), jusqu'à son
+`exp`. Seule la vérification HS256 est évitée : l'utilisateur est toujours
+relu et son statut actif contrôlé à chaque requête.
+
+Révocation : `revoquer(token)` à la déconnexion, `revoquer_utilisateur(id)`
+à la désactivation d'un compte (signal post_save, users/signals.py).
+
+Taille : settings.JWT_CACHE_TAILLE (0 désactive le cache). Le cache est
+propre à chaque processus.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+
+
+def empreinte(token):
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """LRU thread-safe empreinte -> payload, avec expiration et compteurs."""
+
+    def __init__(self, taille=10000):
+        self.taille = taille
+        self._entrees = OrderedDict()
+        self._par_utilisateur = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _retirer(self, cle):
+        payload = self._entrees.pop(cle, None)
+        if payload is not None:
+            cles = self._par_utilisateur.get(payload.get("id"))
+            if cles is not None:
+                cles.discard(cle)
+                if not cles:
+                    del self._par_utilisateur[payload.get("id")]
+
+    def get(self, token):
+        """Payload vérifié, ou None (absent ou expiré : il faut décoder)."""
+        cle = empreinte(token)
+        with self._lock:
+            payload = self._entrees.get(cle)
+            if payload is None or payload["exp"] <= time.time():
+                if payload is not None:
+                    self._retirer(cle)
+                self.misses += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload):
+        if self.taille <= 0 or "exp" not in payload:
+            return
+        cle = empreinte(token)
+        with self._lock:
+            self._retirer(cle)
+            self._entrees[cle] = payload
+            self._par_utilisateur[payload.get("id")].add(cle)
+            while len(self._entrees) > self.taille:
+                self._retirer(next(iter(self._entrees)))
+                self.evictions += 1
+
+    def revoquer(self, token):
+        with self._lock:
+            self._retirer(empreinte(token))
+
+    def revoquer_utilisateur(self, user_id):
+        with self._lock:
+            for cle in list(self._par_utilisateur.get(user_id, ())):
+                self._retirer(cle)
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+            self._par_utilisateur.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "taille": len(self._entrees),
+                "taille_max": self.taille,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cache = None
+
+
+def get_token_cache():
+    """Instance unique du cache, dimensionnée par settings.JWT_CACHE_TAILLE."""
+    global _cache
+    if _cache is None:
+        _cache = TokenCache(getattr(settings, "JWT_CACHE_TAILLE", 10000))
+    return _cache
@@ -8,6 +8,8 @@ from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from .serializers import UserSerializer, LoginSerializer, RegisterSerializer
 from .authentication import JWTAuthentication
+from .token_cache import get_token_cache
+from core.pagination import KeysetPagination
 import datetime, jwt
 
 User = get_user_model()
@@ -118,6 +120,9 @@ class UserDetailView(APIView):
 
 class UserLogoutView(APIView):
     def post(self, request):
+        token = JWTAuthentication.get_token(request)
+        if token:
+            get_token_cache().revoquer(token)
         response = Response()
         response.delete_cookie("jwt")
         response.data = {"message": "Déconnexion réussie"}
@@ -127,7 +132,9 @@ class UserLogoutView(APIView):
 class UserListView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAdminUser]  
+    ordering = ['id']
 
     def get(self, request):
-        users = User.objects.all()
-        return Response(UserSerializer(users, many=True).data)
\ No newline at end of file
+        paginator = KeysetPagination()
+        users = paginator.paginate_queryset(User.objects.all(), request, view=self)
+        return paginator.get_paginated_response(UserSerializer(users, many=True).data)
\ No newline at end of file